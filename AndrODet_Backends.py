@@ -0,0 +1,131 @@
+# ************************ General Information ************************
+'''
+VERSION:
+-------
+
+Version (by release date): 2019-11-25
+
+DEVELOPER INFORMATION:
+---------------------
+
+Name: Omid Mirzaei
+Laboratory: Computer Security Lab (COSEC)
+University: Universidad Carlos III de Madrid
+Website: https://cosec.inf.uc3m.es/~omid-mirzaei/
+
+PUBLICATION:
+-----------
+
+AndrODet: An Adaptive Android Obfuscation Detector
+O. Mirzaei, J. M. de Fuentes, J. E. Tapiador, L. Gonzalez-Manzano
+Future Generation Computer Systems, Elsevier (January 2019)
+
+COPYRIGHT NOTICE:
+----------------
+
+All rights reserved for the above developer and research center.
+Please, take a look at the "License.txt" file for more detailed information regarding the usage and distribution of these source codes.
+
+ACKNOWLEDGEMENT:
+---------------
+
+This work has been partially supported by the:
+MINECO grant TIN2016-79095-C2-2-R (SMOG-DEV);
+CAM grant S2013/ICE-3095 (CIBERDINE);
+co-funded with European FEDER funds;
+partially supported by the UC3M's grant Programa de Ayudas para la Movilidad.
+The authors would like to thank the Allatori technical team for its valuable assistance, and, also, the authors of the AMD and PraGuard datasets which made their repositories available to us.
+'''
+# ************************ End of General Information ************************
+
+# ************************ Module Information ************************
+'''
+MAIN FUNCTIONALITY:
+------------------
+
+This module checks that the dexdump and native backends give identical IR, SE and CF feature vectors for every Android application in a directory.
+
+ARGUMENTS:
+---------
+
+-a:     Directory of Android applications (.apk files)
+-d:     Directory of dexdump disassembler.
+-g:     Directory of androguard tool.
+
+
+USAGE:
+-----
+
+python AndrODet_Backends.py -a '/Directory/of/apps' -d '/Directory/of/dexdump' -g '/Directory/of/androguard'
+'''
+# ************************ End of Module Information  ************************
+
+# ************************ Importing Modules ************************
+
+import os
+from optparse import OptionParser
+from feature_extraction import EFI
+from feature_extraction import EFS
+from feature_extraction import EFC
+from feature_extraction import Disassembly
+
+# ************************ End of Importing Modules ************************
+
+# ************************ Initialization ************************
+
+# --------------- Setting command-line options ---------------
+option_1 = { 'name' : ('-a', '--apps_dir'), 'help' : 'Directory of apk files', 'nargs' : 1 }
+option_2 = { 'name' : ('-d', '--dexdump_dir'), 'help' : 'Directory of dexdump', 'nargs' : 1 }
+option_3 = { 'name' : ('-g', '--androguard_dir'), 'help' : 'Directory of androguard', 'nargs' : 1 }
+
+options = [option_1, option_2, option_3]
+# --------------- End of Setting command-line options ---------------
+
+# ********************* End of Initialization *********************
+
+# ********************* Functions *********************
+
+def compare_backends(appfile, dexdump_dir, androguard_dir):
+    dirname, filename = os.path.split(appfile)
+    dirname = os.path.join(dirname, 'apps_features')
+    features = {}
+    for backend in ['dexdump', 'native']:
+        context = Disassembly.Disassembly_Context(appfile, dexdump_dir, dirname, 'memory', backend, androguard_dir)
+        try:
+            features[backend] = (EFI.extract_features(appfile, None, dexdump_dir, dirname, context), \
+                                 EFS.extract_features(appfile, None, dexdump_dir, dirname, context), \
+                                 EFC.extract_features(appfile, None, androguard_dir, dexdump_dir, dirname, context))
+        finally:
+            context.cleanup()
+
+    return features['dexdump'], features['native']
+
+# ********************* End of Functions *********************
+
+# ********************* Main Body *********************
+
+if __name__ == '__main__':
+
+    parser = OptionParser()
+    for option in options:
+        param = option['name']
+        del option['name']
+        parser.add_option(*param, **option)
+    options, arguments = parser.parse_args()
+
+    num_apps = 0
+    mismatches = []
+    for root, directories, filenames in os.walk(options.apps_dir):
+        for filename in filenames:
+            if '.DS_Store' not in filename  and '.apk' in filename:
+                appfile = os.path.join(root, filename)
+                features_dexdump, features_native = compare_backends(appfile, options.dexdump_dir, options.androguard_dir)
+                num_apps += 1
+                if features_dexdump != features_native:
+                    mismatches.append(appfile)
+                    print('Backends disagree on app %s:' %appfile)
+                    print('    dexdump: %s' %str(features_dexdump))
+                    print('    native:  %s' %str(features_native))
+
+    print('%d of %d apps have identical IR, SE and CF features in both backends.' %(num_apps - len(mismatches), num_apps))
+# ********************* End of Main Body *********************
@@ -0,0 +1,247 @@
+# ************************ General Information ************************
+'''
+VERSION:
+-------
+
+Version (by release date): 2019-11-25
+
+DEVELOPER INFORMATION:
+---------------------
+
+Name: Omid Mirzaei
+Laboratory: Computer Security Lab (COSEC)
+University: Universidad Carlos III de Madrid
+Website: https://cosec.inf.uc3m.es/~omid-mirzaei/
+
+PUBLICATION:
+-----------
+
+AndrODet: An Adaptive Android Obfuscation Detector
+O. Mirzaei, J. M. de Fuentes, J. E. Tapiador, L. Gonzalez-Manzano
+Future Generation Computer Systems, Elsevier (January 2019)
+
+COPYRIGHT NOTICE:
+----------------
+
+All rights reserved for the above developer and research center.
+Please, take a look at the "License.txt" file for more detailed information regarding the usage and distribution of these source codes.
+
+ACKNOWLEDGEMENT:
+---------------
+
+This work has been partially supported by the:
+MINECO grant TIN2016-79095-C2-2-R (SMOG-DEV);
+CAM grant S2013/ICE-3095 (CIBERDINE);
+co-funded with European FEDER funds;
+partially supported by the UC3M's grant Programa de Ayudas para la Movilidad.
+The authors would like to thank the Allatori technical team for its valuable assistance, and, also, the authors of the AMD and PraGuard datasets which made their repositories available to us.
+'''
+# ************************ End of General Information ************************
+
+# ************************ Module Information ************************
+'''
+MAIN FUNCTIONALITY:
+------------------
+
+This module benchmarks AndrODet on deterministic synthetic Android applications (see benchmarks/Synthetic_APK.py).
+A corpus is generated for every size class, with apps of each kind of obfuscation (IR/YES, IR/NO, SE/YES, SE/NO, CF/YES, CF/NO).
+Each feature extractor (EFI, EFS and EFC) is then run alone over every size class in a fresh process, and, optionally, the end-to-end flow of AndrODet_MOA.py as well.
+Throughput (apps/s), latency percentiles of every stage and peak memory are printed and saved to benchmark_results.json in the output directory.
+
+ARGUMENTS:
+---------
+
+-d:     Directory of dexdump disassembler.
+-g:     Directory of androguard tool.
+-o:     Directory of output (the synthetic corpus, the timing logs and the results are written into it).
+-s:     Size classes to benchmark, separated by commas (default: small,medium,large,multidex).
+-n:     Number of apps of each size class generated for each kind of obfuscation (default: 2).
+-r:     Seed of the synthetic apps (default: 0). The same seed always gives the same apps.
+-b:     Backend of the IR and SE features: 'dexdump' (default) or 'native'.
+-e:     Also benchmark the end-to-end flow of AndrODet_MOA.py on every size class.
+-l:     Learner backend of the end-to-end flow: 'python' (default, no JVM needed) or 'moa'.
+
+
+USAGE:
+-----
+
+python AndrODet_Benchmark.py -d '/Directory/of/dexdump' -g '/Directory/of/androguard' -o '/Directory/of/output' -e
+'''
+# ************************ End of Module Information  ************************
+
+# ************************ Importing Modules ************************
+
+import os
+import sys
+import json
+import time
+import shutil
+import subprocess
+import multiprocessing
+import numpy as np
+from optparse import OptionParser
+from benchmarks import Synthetic_APK
+from feature_extraction import EFI
+from feature_extraction import EFS
+from feature_extraction import EFC
+from feature_extraction import Disassembly
+from feature_extraction import Instrumentation
+
+# ************************ End of Importing Modules ************************
+
+# ************************ Initialization ************************
+
+Home_Dir = os.path.dirname(os.path.abspath(__file__))  # Home directory
+Extractors = ['EFI', 'EFS', 'EFC']                      # Feature extractors benchmarked one by one
+Percentiles = [50, 90, 99]                              # Latency percentiles reported for every stage
+
+# --------------- Setting command-line options ---------------
+option_1 = { 'name' : ('-d', '--dexdump_dir'), 'help' : 'Directory of dexdump', 'nargs' : 1 }
+option_2 = { 'name' : ('-g', '--androguard_dir'), 'help' : 'Directory of androguard', 'nargs' : 1 }
+option_3 = { 'name' : ('-o', '--output_dir'), 'help' : 'Directory of output', 'nargs' : 1 }
+option_4 = { 'name' : ('-s', '--size_classes'), 'help' : 'Size classes separated by commas', 'nargs' : 1, 'default' : 'small,medium,large,multidex' }
+option_5 = { 'name' : ('-n', '--apps_per_kind'), 'help' : 'Apps of each size class per kind of obfuscation', 'type' : 'int', 'default' : 2 }
+option_6 = { 'name' : ('-r', '--seed'), 'help' : 'Seed of the synthetic apps', 'type' : 'int', 'default' : 0 }
+option_7 = { 'name' : ('-b', '--backend'), 'help' : 'dexdump or native backend for IR and SE features', 'type' : 'choice', 'choices' : ['dexdump', 'native'], 'default' : 'dexdump' }
+option_8 = { 'name' : ('-e', '--end_to_end'), 'help' : 'Also benchmark AndrODet_MOA.py', 'action' : 'store_true', 'default' : False }
+option_9 = { 'name' : ('-l', '--learner_backend'), 'help' : 'moa or python learner backend of the end-to-end flow', 'type' : 'choice', 'choices' : ['moa', 'python'], 'default' : 'python' }
+
+options = [option_1, option_2, option_3, option_4, option_5, option_6, option_7, option_8, option_9]
+# --------------- End of Setting command-line options ---------------
+
+# ********************* End of Initialization *********************
+
+# ********************* Functions *********************
+
+# --------------- Running the feature extractors ---------------
+
+def run_extractor(extractor, apps, dexdump_dir, androguard_dir, backend, output_dir, timing_log):
+    # Runs in a fresh process, so that the peak RSS of the records belongs to this extractor and size class only
+    Instrumentation.configure(timing_log)
+    for size_class, kind, appfile in apps:
+        context = Disassembly.Disassembly_Context(appfile, dexdump_dir, output_dir, 'memory', backend, androguard_dir)
+        try:
+            with Instrumentation.stage(extractor, os.path.basename(appfile)[:-4], size_class=size_class, kind=kind, apk_bytes=os.path.getsize(appfile)) as sizes:
+                if extractor == 'EFI':
+                    features = EFI.extract_features(appfile, None, dexdump_dir, output_dir, context)
+                elif extractor == 'EFS':
+                    features = EFS.extract_features(appfile, None, dexdump_dir, output_dir, context)
+                else:
+                    features = EFC.extract_features(appfile, None, androguard_dir, dexdump_dir, output_dir, context)
+                sizes['features'] = len(features)                                   # 0 when the extractor failed on the app
+        finally:
+            context.cleanup()
+
+
+def benchmark_extractor(extractor, size_class, apps, options, timings_dir):
+    timing_log = os.path.join(timings_dir, '%s_%s.jsonl' %(extractor, size_class))
+    if os.path.exists(timing_log):
+        os.remove(timing_log)
+    work_dir = os.path.join(options.output_dir, 'apps_features')
+    pool = multiprocessing.Pool(1)
+    start = time.time()
+    try:
+        pool.apply(run_extractor, (extractor, apps, options.dexdump_dir, options.androguard_dir, options.backend, work_dir, timing_log))
+    finally:
+        pool.close()
+        pool.join()
+    wall = time.time() - start
+    records = Instrumentation.Read_Records(timing_log)
+    failed = sum(1 for record in records if record['stage'] == extractor and (record['status'] != 'ok' or not record['sizes']['features']))
+    return benchmark_result(extractor, size_class, len(apps), failed, wall, records)
+
+# --------------- End of Running the feature extractors ---------------
+
+# --------------- Running AndrODet_MOA.py ---------------
+
+def benchmark_end_to_end(size_class, corpus_dir, num_apps, options, timings_dir):
+    timing_log = os.path.join(timings_dir, 'AndrODet_MOA_%s.jsonl' %size_class)
+    if os.path.exists(timing_log):
+        os.remove(timing_log)
+    output_dir = os.path.join(options.output_dir, 'end_to_end', size_class)
+    if os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+    os.makedirs(output_dir)
+    command = [sys.executable, os.path.join(Home_Dir, 'AndrODet_MOA.py'), '-a', corpus_dir, '-d', os.path.abspath(options.dexdump_dir), \
+               '-g', os.path.abspath(options.androguard_dir), '-o', output_dir, '-b', options.backend, '-l', options.learner_backend, \
+               '-x', 'memory', '--no_cache', '-t', timing_log]
+    start = time.time()
+    with open(os.path.join(output_dir, 'AndrODet_MOA.log'), 'w') as log:
+        return_code = subprocess.call(command, cwd=Home_Dir, stdout=log, stderr=subprocess.STDOUT)   # MOA is found relative to the home directory
+    wall = time.time() - start
+    if return_code != 0:
+        print('AndrODet_MOA.py failed on the %s apps (exit code %d), see %s' %(size_class, return_code, os.path.join(output_dir, 'AndrODet_MOA.log')))
+    records = Instrumentation.Read_Records(timing_log) if os.path.exists(timing_log) else []
+    failed = sum(1 for record in records if record['stage'] == 'app' and record['status'] != 'ok')
+    if return_code != 0:
+        failed = num_apps
+    return benchmark_result('AndrODet_MOA', size_class, num_apps, failed, wall, records)
+
+# --------------- End of Running AndrODet_MOA.py ---------------
+
+# --------------- Summarizing the results ---------------
+
+def benchmark_result(name, size_class, num_apps, failed, wall, records):
+    stages = {}
+    for record in records:
+        stages.setdefault(record['stage'], []).append(record['wall'])
+    latencies = {}
+    for stage, walls in stages.items():
+        latencies[stage] = dict(('p%d' %percentile, round(float(np.percentile(walls, percentile)), 6)) for percentile in Percentiles)
+        latencies[stage]['count'] = len(walls)
+    peak_rss_kb = max([0] + [max(record['peak_rss_kb'], record['children_peak_rss_kb']) for record in records])
+    return {'benchmark' : name, 'size_class' : size_class, 'apps' : num_apps, 'failed' : failed, 'wall' : round(wall, 3), \
+            'apps_per_second' : round(num_apps / wall, 3) if wall > 0 else None, 'peak_rss_kb' : peak_rss_kb, 'latency' : latencies}
+
+
+def print_result(result):
+    print('%-14s %-9s %5d %6d %9.3f %9.3f %13.1f' %(result['benchmark'], result['size_class'], result['apps'], result['failed'], \
+          result['wall'], result['apps_per_second'] or 0.0, result['peak_rss_kb'] / 1024.0))
+    for stage in sorted(result['latency']):
+        latency = result['latency'][stage]
+        print('    %-16s %6d  %s' %(stage, latency['count'], '  '.join('p%d %.4f s' %(percentile, latency['p%d' %percentile]) for percentile in Percentiles)))
+
+# --------------- End of Summarizing the results ---------------
+
+# ********************* End of Functions *********************
+
+# ********************* Main Body *********************
+
+if __name__ == '__main__':
+
+    parser = OptionParser()
+    for option in options:
+        param = option['name']
+        del option['name']
+        parser.add_option(*param, **option)
+    options, arguments = parser.parse_args()
+
+    size_classes = [size_class.strip() for size_class in options.size_classes.split(',') if size_class.strip()]
+    for size_class in size_classes:
+        if size_class not in Synthetic_APK.Size_Classes:
+            parser.error('Unknown size class %s (choose among %s)' %(size_class, ', '.join(sorted(Synthetic_APK.Size_Classes))))
+    options.output_dir = os.path.abspath(options.output_dir)
+    timings_dir = os.path.join(options.output_dir, 'timings')
+    if not os.path.isdir(timings_dir):
+        os.makedirs(timings_dir)
+
+    results = []
+    print('%-14s %-9s %5s %6s %9s %9s %13s' %('benchmark', 'size', 'apps', 'failed', 'wall (s)', 'apps/s', 'peak RSS (MB)'))
+    for size_class in size_classes:
+        # --------------- Generating the synthetic apps ---------------
+        corpus_dir = os.path.join(options.output_dir, 'corpus', size_class)
+        if os.path.isdir(corpus_dir):
+            shutil.rmtree(corpus_dir)
+        apps = Synthetic_APK.Generate_Corpus(corpus_dir, [size_class], options.apps_per_kind, options.seed)
+        # --------------- End of Generating the synthetic apps ---------------
+        for extractor in Extractors:
+            results.append(benchmark_extractor(extractor, size_class, apps, options, timings_dir))
+            print_result(results[-1])
+        if options.end_to_end:
+            results.append(benchmark_end_to_end(size_class, corpus_dir, len(apps), options, timings_dir))
+            print_result(results[-1])
+
+    with open(os.path.join(options.output_dir, 'benchmark_results.json'), 'w') as results_file:
+        json.dump(results, results_file, indent=1, sort_keys=True)
+    print('Results saved to %s' %os.path.join(options.output_dir, 'benchmark_results.json'))
+# ********************* End of Main Body *********************
@@ -0,0 +1,111 @@
+# ************************ General Information ************************
+'''
+VERSION:
+-------
+
+Version (by release date): 2019-11-25
+
+DEVELOPER INFORMATION:
+---------------------
+
+Name: Omid Mirzaei
+Laboratory: Computer Security Lab (COSEC)
+University: Universidad Carlos III de Madrid
+Website: https://cosec.inf.uc3m.es/~omid-mirzaei/
+
+PUBLICATION:
+-----------
+
+AndrODet: An Adaptive Android Obfuscation Detector
+O. Mirzaei, J. M. de Fuentes, J. E. Tapiador, L. Gonzalez-Manzano
+Future Generation Computer Systems, Elsevier (January 2019)
+
+COPYRIGHT NOTICE:
+----------------
+
+All rights reserved for the above developer and research center.
+Please, take a look at the "License.txt" file for more detailed information regarding the usage and distribution of these source codes.
+
+ACKNOWLEDGEMENT:
+---------------
+
+This work has been partially supported by the:
+MINECO grant TIN2016-79095-C2-2-R (SMOG-DEV);
+CAM grant S2013/ICE-3095 (CIBERDINE);
+co-funded with European FEDER funds;
+partially supported by the UC3M's grant Programa de Ayudas para la Movilidad.
+The authors would like to thank the Allatori technical team for its valuable assistance, and, also, the authors of the AMD and PraGuard datasets which made their repositories available to us.
+'''
+# ************************ End of General Information ************************
+
+# ************************ Module Information ************************
+'''
+MAIN FUNCTIONALITY:
+------------------
+
+This module exports the features of one module (IR, SE or CF) kept in a feature store (see feature_extraction/Feature_Store.py) to an ARFF file, which MOA reads, or to a CSV file.
+
+ARGUMENTS:
+---------
+
+-s:     Directory of the feature store (AndrODet_MOA.py keeps it in feature_store within its output directory).
+-m:     Module whose features are exported: IR, SE or CF.
+-f:     Format of the exported file: 'arff' (default) or 'csv' (with the name of each app in the first column).
+-o:     Exported file.
+
+
+USAGE:
+-----
+
+python AndrODet_Export.py -s '/Directory/of/output/feature_store' -m IR -f arff -o '/Directory/of/output/features_IR.arff'
+'''
+# ************************ End of Module Information  ************************
+
+# ************************ Importing Modules ************************
+
+from optparse import OptionParser
+from feature_extraction import EFI
+from feature_extraction import EFS
+from feature_extraction import EFC
+from feature_extraction import Feature_Store
+
+# ************************ End of Importing Modules ************************
+
+# ************************ Initialization ************************
+
+Extractors = {'IR' : EFI, 'SE' : EFS, 'CF' : EFC}      # Extractor (and so, ARFF header and attributes) of each module
+
+# --------------- Setting command-line options ---------------
+option_1 = { 'name' : ('-s', '--store_dir'), 'help' : 'Directory of the feature store', 'nargs' : 1 }
+option_2 = { 'name' : ('-m', '--module'), 'help' : 'IR, SE or CF', 'type' : 'choice', 'choices' : Feature_Store.Modules }
+option_3 = { 'name' : ('-f', '--format'), 'help' : 'arff or csv', 'type' : 'choice', 'choices' : ['arff', 'csv'], 'default' : 'arff' }
+option_4 = { 'name' : ('-o', '--output_file'), 'help' : 'Exported file', 'nargs' : 1 }
+
+options = [option_1, option_2, option_3, option_4]
+# --------------- End of Setting command-line options ---------------
+
+# ********************* End of Initialization *********************
+
+# ********************* Main Body *********************
+
+if __name__ == '__main__':
+
+    parser = OptionParser()
+    for option in options:
+        param = option['name']
+        del option['name']
+        parser.add_option(*param, **option)
+    options, arguments = parser.parse_args()
+    if not options.store_dir or not options.module or not options.output_file:
+        parser.error('-s, -m and -o are required')
+
+    store = Feature_Store.Feature_Store(options.store_dir)
+    extractor = Extractors[options.module]
+    with open(options.output_file, 'w') as output_file:
+        if options.format == 'arff':
+            store.export_arff(options.module, output_file, extractor.arff_header())
+        else:
+            store.export_csv(options.module, output_file, [name for name, kind in extractor.arff_dataset([])['attributes']])
+
+    print('%d apps exported to %s' %(store.manifest['num_rows'], options.output_file))
+# ********************* End of Main Body *********************
@@ -52,6 +52,43 @@ ARGUMENTS:
 -d:     Directory of dexdump disassembler.
 -g:     Directory of androguard tool.
 -o:     Directory of output.
+-x:     How .dex files are taken out of each app: 'disk' unzips the whole app (default), 'memory' reads only the classes*.dex files.
+-b:     Backend of the IR and SE features: 'dexdump' parses the disassembled code (default), 'native' reads the DEX tables with androguard.
+-c:     Feature cache file (default: features_cache.db in the output directory). Apps with the same SHA-256 digest are only analyzed once.
+--no_cache:     Extract the features of every app again, without reading or filling the feature cache.
+-w:     Test and train the learners in a long-running MOA worker (built by MOA/worker/build.sh) instead of running MOA once per module.
+-s:     Streaming mode (uses the MOA worker): every app is tested and trained on as soon as its features are extracted, and its verdict and the confusion matrix are reported right away.
+-m:     Directory of learner checkpoints (uses the MOA worker). Learners are restored from it at startup, if they were saved before, and saved to it at the end of the run.
+        Apps the saved learners were already trained on (listed by SHA-256 digest in 'learned_apps') are skipped, so only new apps update the model.
+        Each learner backend keeps its own checkpoints: the python backend saves 'IR_module.bagging.model', ... and 'learned_apps.bagging'.
+-l:     Learner backend: 'moa' runs MOA in a JVM (default), 'python' learns in process with an online bagging ensemble built on NumPy (no JVM needed, implies -w).
+-t:     Timing log. Wall time, CPU time, peak RSS and input sizes of every stage of every app are appended to it as JSON lines, and summarized at the end of the run.
+-p:     Number of extraction processes (default: as many as the available cores and memory allow). Apps are dispatched longest first, by the size of their .dex files,
+        and the .dex files of large multidex apps are analyzed by different processes.
+--dex_threads:          .dex files of a multidex app disassembled at the same time by each extraction process (default: the cores left idle by the processes).
+                        Every .dex file gets its own dexdump and parsers, and the parsers are merged in the order of the .dex files (so the features are the same).
+--task_timeout:         Seconds an app (or one .dex file of a split app) may take before its process is killed, along with dexdump (default: 3600).
+--max_rss:              MB of memory an extraction process and its children may use before they are killed (default: no limit).
+--max_tasks_per_child:  Apps after which an extraction process is replaced by a fresh one (default: 50).
+--retries:              Times an app is tried again after its process was killed or crashed (default: 1).
+        Apps which still fail are listed in the 'quarantine' file of the output directory (JSON lines), and skipped by later runs.
+--retry_quarantine:     Analyze the apps of the quarantine file again.
+--feature_store:        Directory of the feature store (default: feature_store in the output directory). The IR, SE and CF features, labels and names of the apps
+                        of every run are appended to it as chunks of NumPy arrays; AndrODet_Export.py exports them to ARFF or CSV.
+                        The features_*.arff files MOA reads are only exported when the learners run through moa.DoTask (without -w).
+--coordinator:          host:port to serve the extraction tasks on, instead of running them here. Worker nodes (started with --worker) take them one at a time
+                        while they have an idle process, and the tasks of a node which stops answering are handed to the others. Results are merged, tested
+                        and stored here, as in a local run.
+--worker:               host:port of a coordinator to run extraction tasks for (-a is not needed; -d, -g and -o are local to the node, -p its number of processes).
+                        Apps are read from the path the coordinator gives when it exists on the node, and sent by the coordinator otherwise.
+--authkey:              Key shared by the coordinator and its worker nodes (required by --coordinator and --worker, there is no default).
+                        Tasks and results travel as pickles, so use a secret key and trusted networks only.
+--manifest:             Corpus manifest (default: corpus_manifest.db in the output directory). The path, size, modification time, digest, labels and status
+                        of every app are kept in it, and only the directories which changed since the last run are listed again.
+--rescan:               List every directory of the apps again (apps rewritten in place are only found this way).
+--watch:                Daemon mode (implies -s): the apps directory is polled every given number of seconds, and only new or changed apps are extracted,
+                        tested and trained on. Apps which were already processed by an earlier run are not analyzed again. Stop it with SIGTERM or Ctrl-C;
+                        the running apps are finished, and the learners are saved with -m (also after every poll).
 
 
 USAGE:
@@ -64,12 +101,27 @@ python AndrODet_MOA.py -a '/Directory/of/apps' -d '/Directory/of/dexdump' -g '/D
 # ************************ Importing Modules ************************
 
 import os
+import sys
+import json
+import time
+import signal
+import shutil
+import functools
 import subprocess
-import multiprocessing
 from optparse import OptionParser
 from feature_extraction import EFI
 from feature_extraction import EFS
 from feature_extraction import EFC
+from feature_extraction import Disassembly
+from feature_extraction import Feature_Cache
+from feature_extraction import Feature_Store
+from feature_extraction import Corpus_Manifest
+from feature_extraction import Instrumentation
+from feature_extraction import Scheduling
+from feature_extraction import Supervised_Pool
+from feature_extraction import Coordinator
+from learners import MOA_Worker
+from learners import Online_Bagging
 from sklearn.metrics import confusion_matrix, accuracy_score
 import numpy as np
 
@@ -79,19 +131,45 @@ import numpy as np
 
 Home_Dir = os.path.curdir                               # Home directory
 MOA_CP = os.path.join(Home_Dir, 'MOA')                  # MOA directory
-n_procs = 20                                            # Number of processes
+n_procs = None                                          # Number of processes (None: adapted to the cores, the memory and the apps)
 num_features_IR = 15                                    # Number of features for IR
 num_features_SE = 8                                     # Number of features for SE
 num_features_CF = 7                                     # Number of features for CF
 Real_Classes = {}                                       # Real classes of apps
+App_Digests = {}                                        # SHA-256 digest of each app, as the corpus manifest recorded it (it keys the feature cache)
+Checkpoint_Suffixes = {'moa' : '', 'python' : '.bagging'}    # Checkpoint names of each learner backend (e.g. IR_module.bagging.model)
 
 # --------------- Setting command-line options ---------------
 option_1 = { 'name' : ('-a', '--apps_dir'), 'help' : 'Directory of apk files', 'nargs' : 1 }
 option_2 = { 'name' : ('-d', '--dexdump_dir'), 'help' : 'Directory of dexdump', 'nargs' : 1 }
 option_3 = { 'name' : ('-g', '--androguard_dir'), 'help' : 'Directory of androguard', 'nargs' : 1 }
 option_4 = { 'name' : ('-o', '--output_dir'), 'help' : 'Directory of output', 'nargs' : 1 }
-
-options = [option_1, option_2, option_3, option_4]
+option_5 = { 'name' : ('-x', '--extract_mode'), 'help' : 'disk or memory extraction of .dex files', 'type' : 'choice', 'choices' : ['disk', 'memory'], 'default' : 'disk' }
+option_6 = { 'name' : ('-b', '--backend'), 'help' : 'dexdump or native backend for IR and SE features', 'type' : 'choice', 'choices' : ['dexdump', 'native'], 'default' : 'dexdump' }
+option_7 = { 'name' : ('-c', '--cache_file'), 'help' : 'Feature cache file', 'nargs' : 1 }
+option_8 = { 'name' : ('--no_cache',), 'help' : 'Do not use the feature cache', 'action' : 'store_true', 'default' : False }
+option_9 = { 'name' : ('-w', '--moa_worker'), 'help' : 'Use a long-running MOA worker', 'action' : 'store_true', 'default' : False }
+option_10 = { 'name' : ('-s', '--stream'), 'help' : 'Test and train on each app as soon as it is extracted', 'action' : 'store_true', 'default' : False }
+option_11 = { 'name' : ('-m', '--checkpoint_dir'), 'help' : 'Directory of learner checkpoints', 'nargs' : 1 }
+option_12 = { 'name' : ('-l', '--learner_backend'), 'help' : 'moa or python learner backend', 'type' : 'choice', 'choices' : ['moa', 'python'], 'default' : 'moa' }
+option_13 = { 'name' : ('-t', '--timing_log'), 'help' : 'JSON lines file of stage timings', 'nargs' : 1 }
+option_14 = { 'name' : ('-p', '--processes'), 'help' : 'Number of extraction processes', 'type' : 'int', 'default' : n_procs }
+option_15 = { 'name' : ('--task_timeout',), 'help' : 'Seconds an app may take', 'type' : 'float', 'default' : 3600 }
+option_16 = { 'name' : ('--max_rss',), 'help' : 'MB of memory an extraction process may use', 'type' : 'int' }
+option_17 = { 'name' : ('--max_tasks_per_child',), 'help' : 'Apps after which an extraction process is replaced', 'type' : 'int', 'default' : 50 }
+option_18 = { 'name' : ('--retries',), 'help' : 'Times a failed app is tried again', 'type' : 'int', 'default' : 1 }
+option_19 = { 'name' : ('--retry_quarantine',), 'help' : 'Analyze the quarantined apps again', 'action' : 'store_true', 'default' : False }
+option_20 = { 'name' : ('--feature_store',), 'help' : 'Directory of the feature store', 'nargs' : 1 }
+option_21 = { 'name' : ('--coordinator',), 'help' : 'host:port to serve the extraction tasks on', 'nargs' : 1 }
+option_22 = { 'name' : ('--worker',), 'help' : 'host:port of the coordinator to work for', 'nargs' : 1 }
+option_23 = { 'name' : ('--authkey',), 'help' : 'Key shared by the coordinator and its workers', 'nargs' : 1 }
+option_24 = { 'name' : ('--manifest',), 'help' : 'Corpus manifest file', 'nargs' : 1 }
+option_25 = { 'name' : ('--rescan',), 'help' : 'List every directory of the apps again', 'action' : 'store_true', 'default' : False }
+option_26 = { 'name' : ('--watch',), 'help' : 'Seconds between two polls of the apps directory (daemon mode)', 'type' : 'float' }
+option_27 = { 'name' : ('--dex_threads',), 'help' : '.dex files of an app disassembled at the same time', 'type' : 'int' }
+
+options = [option_1, option_2, option_3, option_4, option_5, option_6, option_7, option_8, option_9, option_10, option_11, option_12, option_13, option_14, \
+           option_15, option_16, option_17, option_18, option_19, option_20, option_21, option_22, option_23, option_24, option_25, option_26, option_27]
 # --------------- End of Setting command-line options ---------------
 
 # --------------- Configuring MOA settings ---------------
@@ -102,22 +180,40 @@ class IR_Detector():
         self.learner_IR = 'meta.LeveragingBag'                          # Learning algorithm for identifier renaming
         self.class_col_num_IR = str(num_features_IR + 1)                # Class column number in .arff file
 
-    def extract_features(self, appfile):
+    def extract_features(self, appfile, context=None):
         dirname, filename = os.path.split(appfile)
         dirname = os.path.join(dirname, 'apps_features')
         app_name = filename[:-4]
-        features_IDs = EFI.extract_features(appfile, options.apps_dir, options.dexdump_dir, dirname)
+        features_IDs = EFI.extract_features(appfile, options.apps_dir, options.dexdump_dir, dirname, context)
         return features_IDs
     
     def test(self, arff_file):
-        subprocess.call(['java', '-cp', os.path.join(MOA_CP, 'moa.jar'), \
-                        '-javaagent:' + os.path.join(MOA_CP, 'sizeofag-1.0.0.jar'), 'moa.DoTask', \
-                        'EvaluatePrequential', '-l', '(' + self.learner_IR, '-s', '20)', \
-                        '-s', '(ArffFileStream', '-f', arff_file, '-c', self.class_col_num_IR + ')', \
-                        '-i', '-1', '-f', '1', '-o', os.path.join(options.output_dir, 'predictions_IR_module')])
+        with Instrumentation.stage('moa_test', None, module='IR', arff_bytes=os.path.getsize(arff_file)):
+            subprocess.call(['java', '-cp', os.path.join(MOA_CP, 'moa.jar'), \
+                            '-javaagent:' + os.path.join(MOA_CP, 'sizeofag-1.0.0.jar'), 'moa.DoTask', \
+                            'EvaluatePrequential', '-l', '(' + self.learner_IR, '-s', '20)', \
+                            '-s', '(ArffFileStream', '-f', arff_file, '-c', self.class_col_num_IR + ')', \
+                            '-i', '-1', '-f', '1', '-o', os.path.join(options.output_dir, 'predictions_IR_module')])
         output_file = open(os.path.join(options.output_dir, 'predictions_IR_module'), 'rb')
         result = output_file.readlines()
         return result
+
+    def open_worker(self, worker, checkpoint_dir=None):
+        learner = self.learner_IR + ' -s 20'
+        if checkpoint_dir and os.path.exists(checkpoint_file(checkpoint_dir, 'IR_module', '.model')):
+            learner = 'file:' + os.path.abspath(checkpoint_file(checkpoint_dir, 'IR_module', '.model'))          # Resuming from the saved learner
+        worker.open_learner('IR', learner, self.class_col_num_IR, EFI.arff_header())
+
+    def save_worker(self, worker, checkpoint_dir):
+        worker.save_learner('IR', checkpoint_file(checkpoint_dir, 'IR_module', '.model'))
+
+    def test_instance(self, worker, features):
+        with Instrumentation.stage('moa_test', None, module='IR', instances=1):
+            return worker.test_then_train('IR', features)
+
+    def test_batch(self, worker, all_features):
+        with Instrumentation.stage('moa_test', None, module='IR', instances=len(all_features)):
+            return worker.test_then_train_batch('IR', all_features) if all_features else []
         
 
 class SE_Detector():
@@ -126,23 +222,41 @@ class SE_Detector():
         self.learner_SE = 'meta.LeveragingBag'                           # Learning algorithm for string encryption
         self.class_col_num_SE = str(num_features_SE + 1)                 # Class column number in .arff file
 
-    def extract_features(self, appfile):
+    def extract_features(self, appfile, context=None):
         dirname, filename = os.path.split(appfile)
         dirname = os.path.join(dirname, 'apps_features')
         app_name = filename[:-4]
-        features_STs = EFS.extract_features(appfile, options.apps_dir, options.dexdump_dir, dirname)
+        features_STs = EFS.extract_features(appfile, options.apps_dir, options.dexdump_dir, dirname, context)
         return features_STs
 
     def test(self, arff_file):
-        subprocess.call(['java', '-cp', os.path.join(MOA_CP, 'moa.jar'), \
-                        '-javaagent:' + os.path.join(MOA_CP, 'sizeofag-1.0.0.jar'), 'moa.DoTask', \
-                        'EvaluatePrequential', '-l', '(' + self.learner_SE, '-s', '20)', \
-                        '-s', '(ArffFileStream', '-f', arff_file, '-c', self.class_col_num_SE + ')', \
-                        '-i', '-1', '-f', '1', '-o', os.path.join(options.output_dir, 'predictions_SE_module')])
+        with Instrumentation.stage('moa_test', None, module='SE', arff_bytes=os.path.getsize(arff_file)):
+            subprocess.call(['java', '-cp', os.path.join(MOA_CP, 'moa.jar'), \
+                            '-javaagent:' + os.path.join(MOA_CP, 'sizeofag-1.0.0.jar'), 'moa.DoTask', \
+                            'EvaluatePrequential', '-l', '(' + self.learner_SE, '-s', '20)', \
+                            '-s', '(ArffFileStream', '-f', arff_file, '-c', self.class_col_num_SE + ')', \
+                            '-i', '-1', '-f', '1', '-o', os.path.join(options.output_dir, 'predictions_SE_module')])
         output_file = open(os.path.join(options.output_dir, 'predictions_SE_module'), 'rb')
         result = output_file.readlines()
         return result
 
+    def open_worker(self, worker, checkpoint_dir=None):
+        learner = self.learner_SE + ' -s 20'
+        if checkpoint_dir and os.path.exists(checkpoint_file(checkpoint_dir, 'SE_module', '.model')):
+            learner = 'file:' + os.path.abspath(checkpoint_file(checkpoint_dir, 'SE_module', '.model'))          # Resuming from the saved learner
+        worker.open_learner('SE', learner, self.class_col_num_SE, EFS.arff_header())
+
+    def save_worker(self, worker, checkpoint_dir):
+        worker.save_learner('SE', checkpoint_file(checkpoint_dir, 'SE_module', '.model'))
+
+    def test_instance(self, worker, features):
+        with Instrumentation.stage('moa_test', None, module='SE', instances=1):
+            return worker.test_then_train('SE', features)
+
+    def test_batch(self, worker, all_features):
+        with Instrumentation.stage('moa_test', None, module='SE', instances=len(all_features)):
+            return worker.test_then_train_batch('SE', all_features) if all_features else []
+
 
 class CF_Detector():
 
@@ -150,22 +264,40 @@ class CF_Detector():
         self.learner_CF = 'meta.LeveragingBag'                            # Learning algorithm for control flow obfuscation
         self.class_col_num_CF = str(num_features_CF + 1)                  # Class column number in .arff file
 
-    def extract_features(self, appfile):
+    def extract_features(self, appfile, context=None):
         dirname, filename = os.path.split(appfile)
         dirname = os.path.join(dirname, 'apps_features')
         app_name = filename[:-4]
-        features_CFs = EFC.extract_features(appfile, options.apps_dir, options.androguard_dir, options.dexdump_dir, dirname)
+        features_CFs = EFC.extract_features(appfile, options.apps_dir, options.androguard_dir, options.dexdump_dir, dirname, context)
         return features_CFs
 
     def test(self, arff_file):
-        subprocess.call(['java', '-cp', os.path.join(MOA_CP, 'moa.jar'), \
-                        '-javaagent:' + os.path.join(MOA_CP, 'sizeofag-1.0.0.jar'), 'moa.DoTask', \
-                        'EvaluatePrequential', '-l', '(' + self.learner_CF, '-s', '20)', \
-                        '-s', '(ArffFileStream', '-f', arff_file, '-c', self.class_col_num_CF + ')', \
-                        '-i', '-1', '-f', '1', '-o', os.path.join(options.output_dir, 'predictions_CF_module')])
+        with Instrumentation.stage('moa_test', None, module='CF', arff_bytes=os.path.getsize(arff_file)):
+            subprocess.call(['java', '-cp', os.path.join(MOA_CP, 'moa.jar'), \
+                            '-javaagent:' + os.path.join(MOA_CP, 'sizeofag-1.0.0.jar'), 'moa.DoTask', \
+                            'EvaluatePrequential', '-l', '(' + self.learner_CF, '-s', '20)', \
+                            '-s', '(ArffFileStream', '-f', arff_file, '-c', self.class_col_num_CF + ')', \
+                            '-i', '-1', '-f', '1', '-o', os.path.join(options.output_dir, 'predictions_CF_module')])
         output_file = open(os.path.join(options.output_dir, 'predictions_CF_module'), 'rb')
         result = output_file.readlines()
         return result
+
+    def open_worker(self, worker, checkpoint_dir=None):
+        learner = self.learner_CF + ' -s 20'
+        if checkpoint_dir and os.path.exists(checkpoint_file(checkpoint_dir, 'CF_module', '.model')):
+            learner = 'file:' + os.path.abspath(checkpoint_file(checkpoint_dir, 'CF_module', '.model'))          # Resuming from the saved learner
+        worker.open_learner('CF', learner, self.class_col_num_CF, EFC.arff_header())
+
+    def save_worker(self, worker, checkpoint_dir):
+        worker.save_learner('CF', checkpoint_file(checkpoint_dir, 'CF_module', '.model'))
+
+    def test_instance(self, worker, features):
+        with Instrumentation.stage('moa_test', None, module='CF', instances=1):
+            return worker.test_then_train('CF', features)
+
+    def test_batch(self, worker, all_features):
+        with Instrumentation.stage('moa_test', None, module='CF', instances=len(all_features)):
+            return worker.test_then_train_batch('CF', all_features) if all_features else []
         
 # --------------- End of Configuring MOA settings ---------------
 
@@ -185,26 +317,373 @@ def set_learners():
     return IR_module, SE_module, CF_module
 
 
-def feature_extraction(appfile, IR_module, SE_module, CF_module):
+def start_worker():
+    # Both backends serve the learners of the three modules through the same interface
+    if options.learner_backend == 'python':
+        return Online_Bagging.Online_Bagging_Worker()
+    return MOA_Worker.MOA_Worker(MOA_CP)
+
+
+def checkpoint_file(checkpoint_dir, name, extension=''):
+    # The learners of one backend cannot be restored by the other, so each backend keeps its own checkpoints
+    return os.path.join(checkpoint_dir, name + Checkpoint_Suffixes[options.learner_backend] + extension)
+
+
+def set_feature_cache():
+    if options.no_cache:
+        return None
+    cache_file = options.cache_file
+    if not cache_file:
+        cache_file = os.path.join(options.output_dir, 'features_cache.db')
+    # Features are only shared by runs which extract them the same way (versions of the extractors and backend; both extraction modes select the same .dex files)
+    version = 'IR-%s/SE-%s/CF-%s/%s' %(EFI.Extractor_Version, EFS.Extractor_Version, EFC.Extractor_Version, options.backend)
+    return Feature_Cache.Feature_Cache(cache_file, version)
+
+
+def feature_extraction(appfile, IR_module, SE_module, CF_module, cache=None, dex_parts=None):
     dirname, filename = os.path.split(appfile)
     dirname = os.path.join(dirname, 'apps_features')
     app_name = filename[:-4]
+    context = Disassembly.Disassembly_Context(appfile, options.dexdump_dir, dirname, options.extract_mode, options.backend, options.androguard_dir, None, options.dex_threads)     # The app is disassembled once for all modules
+    if dex_parts is not None:
+        context.merge_dex_parts(dex_parts)                                          # Its .dex files were already analyzed by other processes
+    else:
+        if options.backend == 'dexdump':
+            context.register_parser('IR', EFI.Identifiers_Parser())
+            context.register_parser('SE', EFS.Strings_Parser())
+        context.register_parser('CF', EFC.Code_Parser())
+    try:
+        with Instrumentation.stage('app', app_name, apk_bytes=os.path.getsize(appfile)) as sizes:
+            # --------------- Looking the app up in the feature cache ---------------
+
+            cached_features = None
+            if cache is not None:
+                digest = App_Digests[appfile]                                       # Hashed once, by the corpus manifest
+                cached_features = cache.get(digest)
+
+            # --------------- End of Looking the app up in the feature cache ---------------
+
+            if cached_features:
+                features_IR, features_SE, features_CF = cached_features             # The same app was already analyzed, maybe under another name
+                sizes['cached'] = True
+            else:
+                # --------------- Extracting features ---------------
+
+                features_IR = IR_module.extract_features(appfile, context)
+                features_SE = SE_module.extract_features(appfile, context)
+                features_CF = CF_module.extract_features(appfile, context)
+
+                # --------------- End of Extracting features ---------------
+
+                if cache is not None and features_IR and len(features_IR) == num_features_IR and features_SE and len(features_SE) == num_features_SE and features_CF and len(features_CF) == num_features_CF:
+                    cache.put(digest, features_IR, features_SE, features_CF)
+
+            if features_IR and len(features_IR) == num_features_IR and features_SE and len(features_SE) == num_features_SE and features_CF and len(features_CF) == num_features_CF:
+                features_IR.append(Real_Classes[app_name][0])
+                features_SE.append(Real_Classes[app_name][1])
+                features_CF.append(Real_Classes[app_name][2])
+                sizes['complete'] = True
+                return app_name, features_IR, features_SE, features_CF
+            sizes['complete'] = False                                               # An extractor failed and printed why
+    except Exception as error:
+        print('features extraction failed for app', appfile, error)
+    finally:
+        context.cleanup()
+
+
+def dex_part_extraction(appfile, member):
+    # Analyzes one .dex file of a split app; the parts are merged by feature_extraction once all of them are done
+    dirname, filename = os.path.split(appfile)
+    dirname = os.path.join(dirname, 'apps_features')
+    context = Disassembly.Disassembly_Context(appfile, options.dexdump_dir, dirname, options.extract_mode, options.backend, options.androguard_dir, [member])
+    context.register_parser('IR', EFI.Identifiers_Parser(keep_dex_lists=True))
+    context.register_parser('SE', EFS.Strings_Parser(keep_dex_lists=True))
+    context.register_parser('CF', EFC.Code_Parser())
+    try:
+        with Instrumentation.stage('dex_part', filename[:-4], member=member):
+            for name in ['IR', 'SE', 'CF']:
+                context.get_parser(name, None)
+            EFC.Extract_Features_CFGs(appfile, options.androguard_dir, context)
+        return context.dex_part()
+    except Exception as error:
+        print('features extraction failed for %s of app %s: %s' %(member, appfile, error))
+    finally:
+        context.cleanup()
+
+
+def set_feature_store():
+    store_dir = options.feature_store
+    if not store_dir:
+        store_dir = os.path.join(options.output_dir, 'feature_store')
+    return Feature_Store.Feature_Store(store_dir)
+
+
+def store_features(store, app_names, features_IR, features_SE, features_CF):
+    # The class is the last value of every row; returns the chunk of the store the rows went to
+    with Instrumentation.stage('feature_store', None, apps=len(app_names)):
+        return store.append(app_names, [features[:-1] for features in features_IR], [features[:-1] for features in features_SE], [features[:-1] for features in features_CF], \
+                            [[IR[-1], SE[-1], CF[-1]] for IR, SE, CF in zip(features_IR, features_SE, features_CF)])
+
+
+def set_corpus_manifest():
+    manifest_file = options.manifest
+    if not manifest_file:
+        manifest_file = os.path.join(options.output_dir, 'corpus_manifest.db')
+    return Corpus_Manifest.Corpus_Manifest(manifest_file)
+
+
+def scan_corpus(settle=0):
+    # Refreshes the manifest from the apps directory; returns the number of new or changed apps
+    with Instrumentation.stage('corpus_scan', None) as sizes:
+        sizes['changed_apps'] = manifest.refresh(options.apps_dir, options.rescan, settle)
+    return sizes['changed_apps']
+
+
+def add_labels(appfile, labels):
+    # Apps of the same name in several directories get the classes of all of them
+    app_name = os.path.basename(appfile)[:-4]
+    if app_name not in Real_Classes:
+        Real_Classes[app_name] = np.zeros(3, dtype=int)
+    Real_Classes[app_name] |= np.array(labels, dtype=int)
+
+
+def watched_tasks(worker, watch):
+    # Task source of the daemon: the tasks of the new or changed apps, each time the apps directory is polled
+    if watch['stopped']:
+        raise StopIteration
+    now = time.time()
+    if now < watch['next_poll']:
+        return []
+    watch['next_poll'] = now + options.watch
+    if options.checkpoint_dir:
+        learned_since = manifest.digests(Corpus_Manifest.Done, watch['saved'])
+        if learned_since:
+            save_checkpoints(worker, learned_since)
+        watch['saved'] = now
+    scan_corpus(Corpus_Manifest.settle_seconds)
+    learned = learned_apps() if options.checkpoint_dir else set()
+    quarantined = quarantined_apps()
+    new_apps = []
+    for appfile, digest, labels, status in manifest.apps(options.apps_dir, Corpus_Manifest.New):
+        if digest in learned:
+            manifest.set_status([appfile], Corpus_Manifest.Done)                 # Learned by the restored learners
+        elif appfile in quarantined:
+            manifest.set_status([appfile], Corpus_Manifest.Quarantined)
+        else:
+            add_labels(appfile, labels)
+            App_Digests[appfile] = digest
+            new_apps.append(appfile)
+    if not new_apps:
+        return []
+    manifest.set_status(new_apps, Corpus_Manifest.Queued)
+    tasks = Scheduling.Plan_Tasks(new_apps, split_app)
+    print('Extracting features of %d new apps (%d tasks)' %(len(new_apps), len(tasks)))
+    return tasks
+
+
+def watch_corpus(store):
+    # --------------- Daemon mode: streaming the new or changed apps of the apps directory ---------------
+
+    watch = {'stopped' : [], 'next_poll' : 0, 'saved' : time.time()}
+    def stop(signum, frame):
+        print('Stopping once the running apps are done')
+        watch['stopped'].append(signum)
+    for signum in [signal.SIGTERM, signal.SIGINT]:
+        signal.signal(signum, stop)
+        signal.siginterrupt(signum, False)                                        # Reads from the pool and the worker go on
+    manifest.reset_status(Corpus_Manifest.Queued, Corpus_Manifest.New)            # Apps of an interrupted run
+    num_procs = options.processes or Scheduling.Available_Cores()
+    print('Watching %s every %g s with %d processes' %(options.apps_dir, options.watch, num_procs))
+    pool = start_pool(num_procs)
+    worker = start_worker()
     try:
-        # --------------- Extracting features ---------------
+        IR_module.open_worker(worker, options.checkpoint_dir)
+        SE_module.open_worker(worker, options.checkpoint_dir)
+        CF_module.open_worker(worker, options.checkpoint_dir)
+        conf_matrix = stream_obfuscation_detection(pool, functools.partial(watched_tasks, worker, watch), cache, worker, store)
+        if options.checkpoint_dir:
+            save_checkpoints(worker, manifest.digests(Corpus_Manifest.Done, watch['saved']))
+        pool.close()
+        pool.join()
+    finally:
+        pool.terminate()
+        worker.close()
+
+    # --------------- End of Daemon mode: streaming the new or changed apps of the apps directory ---------------
+
+    return conf_matrix
+
+
+def split_app(appfile):
+    # An app whose features are cached is not worth splitting
+    return cache is None or cache.get(App_Digests[appfile]) is None
+
+
+def feature_extraction_task(task):
+    # Runs one task of Scheduling.Plan_Tasks (a whole app, or one .dex file of a split app) in a process of the pool
+    cost, memory, appfile, member, IR_module, SE_module, CF_module, cache, labels, digest = task
+    Real_Classes[os.path.basename(appfile)[:-4]] = labels                          # The process may have been started before the app was found
+    App_Digests[appfile] = digest
+    if member is None:
+        return appfile, member, feature_extraction(appfile, IR_module, SE_module, CF_module, cache), None
+    return appfile, member, dex_part_extraction(appfile, member), None
 
-        features_IR = IR_module.extract_features(appfile)
-        features_SE = SE_module.extract_features(appfile)
-        features_CF = CF_module.extract_features(appfile)
-        
-        # --------------- End of Extracting features ---------------
 
-        if features_IR and len(features_IR) == num_features_IR and features_SE and len(features_SE) == num_features_SE and features_CF and len(features_CF) == num_features_CF:
-            features_IR.append(Real_Classes[app_name][0])
-            features_SE.append(Real_Classes[app_name][1])
-            features_CF.append(Real_Classes[app_name][2])
-            return app_name, features_IR, features_SE, features_CF
-    except:
-        print('features extraction failed for app', appfile)
+def failed_task(task, reason):
+    # Called by the pool for a task whose process was killed or crashed on every attempt
+    return task[2], task[3], None, reason
+
+
+def start_pool(num_procs, tasks=None, function=feature_extraction_task, retries=None):
+    # tasks are only needed by the coordinator, which serves them instead of running them
+    if options.coordinator and function is feature_extraction_task:
+        print('Serving %d tasks of %d apps to worker nodes on %s' %(len(tasks), len(set(task[2] for task in tasks)), options.coordinator))
+        settings = {'backend' : options.backend, 'extract_mode' : options.extract_mode}                             # The nodes extract the features the same way
+        return Coordinator.Coordinator_Pool(options.coordinator, options.authkey, settings, remote_payload, options.retries)
+    options.dex_threads = Scheduling.Dex_Threads(num_procs, options.dex_threads)     # Inherited by the processes of the pool
+    max_rss_bytes = options.max_rss << 20 if options.max_rss else None
+    if retries is None:
+        retries = options.retries
+    return Supervised_Pool.Supervised_Pool(function, num_procs, options.task_timeout, max_rss_bytes, options.max_tasks_per_child, retries)
+
+
+def remote_payload(task):
+    # What the coordinator sends to a node for a task of Scheduling.Plan_Tasks
+    cost, memory, appfile, member = task[:4]
+    return {'appfile' : appfile, 'member' : member, 'size' : os.path.getsize(appfile), 'labels' : [int(label) for label in Real_Classes[os.path.basename(appfile)[:-4]]], \
+            'digest' : App_Digests[appfile]}
+
+
+def lease_task(client, apps_dir):
+    # Called by the pool of a node whenever one of its processes is idle
+    try:
+        lease = client.table.lease(client.node)
+    except (EOFError, IOError, OSError):
+        print('Coordinator %s is gone' %options.worker)
+        raise StopIteration
+    if lease == 'done':
+        raise StopIteration
+    if lease is None:
+        return None                                                                 # Every task is leased, but some may come back
+    task_id, payload = lease
+    appfile = payload['appfile']
+    if not os.path.isfile(appfile) or os.path.getsize(appfile) != payload['size']:
+        # The node does not share the coordinator's storage, so the app is copied under its own name (which is the name of the app)
+        app_dir = os.path.join(apps_dir, str(task_id))
+        if not os.path.isdir(app_dir):
+            os.makedirs(app_dir)
+        appfile = os.path.join(app_dir, os.path.basename(payload['appfile']))
+        with open(appfile, 'wb') as apk_file:
+            apk_file.write(client.table.read_app(task_id))
+    return task_id, payload, appfile
+
+
+def remote_extraction_task(node_task):
+    # Runs a task of the coordinator in a process of the node
+    task_id, payload, appfile = node_task
+    labels = np.array(payload['labels'], dtype=int)
+    appfile_node, member, result, reason = feature_extraction_task((0, 0, appfile, payload['member'], IR_module, SE_module, CF_module, cache, labels, payload['digest']))
+    return task_id, (payload['appfile'], member, result, reason), None                # The coordinator knows the app by its own path
+
+
+def failed_remote_task(node_task, reason):
+    return node_task[0], None, reason
+
+
+def run_worker_node():
+    global cache
+    client = Coordinator.Coordinator_Client(options.worker, options.authkey)
+    settings = client.table.get_settings()
+    options.backend = settings['backend']
+    options.extract_mode = settings['extract_mode']
+    cache = set_feature_cache()                                                     # Keyed by the settings of the coordinator, not by those of the command line
+    apps_dir = os.path.join(options.output_dir, 'leased_apps')
+    num_procs = options.processes or Scheduling.Available_Cores()
+    print('Working for coordinator %s as %s with %d processes' %(options.worker, client.node, num_procs))
+    pool = start_pool(num_procs, function=remote_extraction_task, retries=0)        # Failed tasks are handed back, and the coordinator decides whether to try again
+    client.start_heartbeat()
+    try:
+        for task_id, result, reason in pool.imap_unordered(functools.partial(lease_task, client, apps_dir), failed_remote_task):
+            shutil.rmtree(os.path.join(apps_dir, str(task_id)), ignore_errors=True)
+            try:
+                if reason is None:
+                    client.table.complete(client.node, task_id, result)
+                else:
+                    client.table.fail(client.node, task_id, reason)
+            except (EOFError, IOError, OSError):
+                print('Coordinator %s is gone' %options.worker)
+                break
+        pool.close()
+        pool.join()
+    finally:
+        pool.terminate()
+        client.stop()
+
+
+def quarantined_apps():
+    quarantined = set()
+    quarantine_file = os.path.join(options.output_dir, 'quarantine')
+    if os.path.exists(quarantine_file):
+        with open(quarantine_file, 'r') as quarantine_list:
+            quarantined = set(json.loads(line)['app'] for line in quarantine_list if line.strip())
+    return quarantined
+
+
+def quarantine(appfile, member, reason):
+    print('App %s was quarantined: %s' %(appfile if member is None else '%s (%s)' %(appfile, member), reason))
+    with open(os.path.join(options.output_dir, 'quarantine'), 'a') as quarantine_list:
+        quarantine_list.write(json.dumps({'app' : appfile, 'member' : member, 'reason' : reason, 'time' : round(time.time(), 3)}, sort_keys=True) + '\n')
+    manifest.set_status([appfile], Corpus_Manifest.Quarantined)
+
+
+def app_members(tasks, members):
+    # .dex files of each split app, in the order of the .apk file
+    for cost, memory, appfile, member in tasks:
+        if member is not None and appfile not in members:
+            members[appfile] = [app_member for app_member, dex_bytes in Scheduling.Dex_Members(appfile)]
+
+
+def pool_task(task, cache):
+    return task + (IR_module, SE_module, CF_module, cache, Real_Classes[os.path.basename(task[2])[:-4]], App_Digests[task[2]])
+
+
+def extracted_apps(pool, tasks, cache):
+    # Yields (appfile, result of feature_extraction) for every app, as soon as the app (or the last of its .dex files) is done.
+    # tasks is a list, or a function which returns the tasks of the new apps (maybe none) and raises StopIteration when there will be no more
+    members = {}
+    if callable(tasks):
+        planned = []
+        def pool_tasks():
+            # Called by the pool whenever a process is idle
+            if not planned:
+                new_tasks = tasks()
+                app_members(new_tasks, members)
+                planned.extend(reversed(new_tasks))
+            return pool_task(planned.pop(), cache) if planned else None
+    else:
+        app_members(tasks, members)
+        pool_tasks = [pool_task(task, cache) for task in tasks]
+    dex_parts = {}
+    for appfile, member, result, reason in pool.imap_unordered(pool_tasks, failed_task):
+        if member is None:
+            if result is None:
+                quarantine(appfile, member, reason or 'features extraction failed')
+            yield appfile, result
+            continue
+        dex_parts.setdefault(appfile, {})[member] = (result, reason)
+        if len(dex_parts[appfile]) < len(members[appfile]):
+            continue
+        app_parts = dex_parts.pop(appfile)
+        failed_members = [app_member for app_member in members[appfile] if app_parts[app_member][0] is None]
+        if failed_members:
+            quarantine(appfile, failed_members[0], app_parts[failed_members[0]][1] or 'features extraction failed')
+            yield appfile, None
+            continue
+        result = feature_extraction(appfile, IR_module, SE_module, CF_module, cache, [app_parts[app_member][0] for app_member in members[appfile]])
+        del members[appfile]
+        if result is None:
+            quarantine(appfile, None, 'features extraction failed')
+        yield appfile, result
 
 
 def detect_obfuscation(IR_arff_fie, SE_arff_fie, CF_arff_fie):
@@ -218,10 +697,40 @@ def detect_obfuscation(IR_arff_fie, SE_arff_fie, CF_arff_fie):
         # --------------- End of Testing the learner ---------------
 
         return predict_output_IR, predict_output_SE, predict_output_CF
-    except:
+    except Exception:
         print('System could not successfully analyze app %s!' %app_name)
         pass
 
+def detect_obfuscation_worker(worker, features_IR, features_SE, features_CF):
+    # --------------- Testing and training the learners of the worker on the feature matrix of each module ---------------
+
+    predict_output_IR = IR_module.test_batch(worker, features_IR)
+    predict_output_SE = SE_module.test_batch(worker, features_SE)
+    predict_output_CF = CF_module.test_batch(worker, features_CF)
+
+    # --------------- End of Testing and training the learners of the worker on the feature matrix of each module ---------------
+
+    return predict_output_IR, predict_output_SE, predict_output_CF
+
+def learned_apps():
+    # Digests of the apps the saved learners were already trained on
+    learned = set()
+    learned_file = checkpoint_file(options.checkpoint_dir, 'learned_apps')
+    if os.path.exists(learned_file):
+        with open(learned_file, 'r') as learned_list:
+            learned = set(line.strip() for line in learned_list if line.strip())
+    return learned
+
+def save_checkpoints(worker, new_apps):
+    if not os.path.exists(options.checkpoint_dir):
+        os.makedirs(options.checkpoint_dir)
+    IR_module.save_worker(worker, options.checkpoint_dir)
+    SE_module.save_worker(worker, options.checkpoint_dir)
+    CF_module.save_worker(worker, options.checkpoint_dir)
+    with open(checkpoint_file(options.checkpoint_dir, 'learned_apps'), 'a') as learned_list:
+        for digest in sorted(new_apps):
+            learned_list.write(digest + '\n')
+
 def confusion_matrix_update(conf_matrix, real_classes, predicted_classes):
 
     row_idx = int(real_classes, 2)
@@ -230,6 +739,41 @@ def confusion_matrix_update(conf_matrix, real_classes, predicted_classes):
     conf_matrix[row_idx][col_idx] += 1    
     return conf_matrix
 
+def stream_obfuscation_detection(pool, tasks, cache, worker, store):
+    # --------------- Testing and training on each app as soon as its features are extracted ---------------
+
+    conf_matrix = np.zeros((8, 8), dtype=int)
+    predictions_file = open(os.path.join(options.output_dir, 'predictions_stream'), 'w')
+    stored = []                                                                     # Apps not appended to the feature store yet
+    try:
+        for appfile, result in extracted_apps(pool, tasks, cache):
+            if not result:
+                continue
+            app_name, features_IR, features_SE, features_CF = result
+            stored.append(result)
+            if len(stored) >= Feature_Store.chunk_rows:
+                store_features(store, *zip(*stored))
+                stored = []
+            predicted_classes = IR_module.test_instance(worker, features_IR).split(',')[0] + \
+                                SE_module.test_instance(worker, features_SE).split(',')[0] + \
+                                CF_module.test_instance(worker, features_CF).split(',')[0]
+            real_classes = str(Real_Classes[app_name][0]) + str(Real_Classes[app_name][1]) + str(Real_Classes[app_name][2])
+            conf_matrix = confusion_matrix_update(conf_matrix, real_classes, predicted_classes)
+
+            predictions_file.write('%s,%s,%s\n' %(app_name, predicted_classes, real_classes))
+            predictions_file.flush()
+            np.savetxt(os.path.join(options.output_dir, 'confusion_matrix_stream'), conf_matrix, fmt='%d')
+            print('App %s: predicted %s (IR/SE/CF), real %s, accuracy so far %.4f' %(app_name, predicted_classes, real_classes, np.trace(conf_matrix) / float(conf_matrix.sum())))
+            manifest.set_status([appfile], Corpus_Manifest.Done)
+    finally:
+        predictions_file.close()
+        if stored:
+            store_features(store, *zip(*stored))
+
+    # --------------- End of Testing and training on each app as soon as its features are extracted ---------------
+
+    return conf_matrix
+
 # ********************* End of Functions *********************
 
 # ********************* Main Body *********************
@@ -242,70 +786,157 @@ if __name__ == '__main__':
         del option['name']
         parser.add_option(*param, **option)
     options, arguments = parser.parse_args()
+    if options.watch and options.coordinator:
+        parser.error('--watch extracts the features locally, and cannot be used with --coordinator')
+    if (options.coordinator or options.worker) and not options.authkey:
+        parser.error('--coordinator and --worker need --authkey, a secret key shared by the coordinator and its worker nodes')
+    if options.watch:
+        options.stream = True
     
     if not os.path.exists(options.output_dir):
         os.mkdir(options.output_dir)
+    if options.timing_log:
+        Instrumentation.configure(os.path.abspath(options.timing_log))
+    if options.checkpoint_dir or options.learner_backend == 'python':
+        options.moa_worker = True                 # Only the workers can restore and save learners, and the python backend is one
 
     IR_module, SE_module, CF_module = set_learners()
-
+    cache = set_feature_cache()
+
+    if options.worker:
+        run_worker_node()                         # Until the coordinator has no task left
+        if options.timing_log:
+            Instrumentation.print_summary(options.timing_log)
+        sys.exit(0)
+
+    store = set_feature_store()
+    manifest = set_corpus_manifest()
+
+    quarantine_file = os.path.join(options.output_dir, 'quarantine')
+    if options.retry_quarantine:
+        if os.path.exists(quarantine_file):
+            os.remove(quarantine_file)              # Apps which fail again are quarantined again
+        manifest.reset_status(Corpus_Manifest.Quarantined, Corpus_Manifest.New)
+
+    if options.watch:
+        conf_matrix = watch_corpus(store)
+        print('Confusion Matrix:')
+        print(conf_matrix)
+        if options.timing_log:
+            Instrumentation.print_summary(options.timing_log)
+        sys.exit(0)
+
+    scan_corpus()
     all_apks = set()                  # To discard possible redundant apk files
-    for root, directories, filenames in os.walk(options.apps_dir):
-        for filename in filenames:
-            if '.DS_Store' not in filename  and '.apk' in filename:
-                all_apks.add(os.path.join(root,filename))
-                if filename[:-4] not in Real_Classes.keys():
-                    Real_Classes[filename[:-4]] = np.zeros(3, dtype=int)
-                if '/IR/YES' in root:
-                    Real_Classes[filename[:-4]][0] = 1
-                if '/SE/YES' in root:
-                    Real_Classes[filename[:-4]][1] = 1
-                if '/CF/YES' in root:
-                    Real_Classes[filename[:-4]][2] = 1
-
-    pool = multiprocessing.Pool(n_procs)
-    results = [pool.apply_async(feature_extraction, [appfile, IR_module, SE_module, CF_module]) for appfile in all_apks]
-    pool.close()
-    pool.join()
-
-    features_IR = []
-    features_SE = []
-    features_CF = []
-    processed_apps = []
-    for res in results:
+    for appfile, digest, labels, status in manifest.apps(options.apps_dir):
+        all_apks.add(appfile)
+        App_Digests[appfile] = digest
+        add_labels(appfile, labels)
+
+    quarantined = quarantined_apps()
+    if quarantined & all_apks:
+        print('Skipping %d quarantined apps (see %s)' %(len(quarantined & all_apks), quarantine_file))
+        all_apks -= quarantined
+
+    if options.checkpoint_dir:
+        learned = learned_apps()
+        for appfile in sorted(all_apks):
+            if App_Digests[appfile] in learned:               # Recorded by the manifest when the app was new or changed
+                all_apks.discard(appfile)
+    run_start = time.time()           # Apps done from now on were tested and learned by this run
+
+    # --------------- Scheduling the apps longest first ---------------
+
+    tasks = Scheduling.Plan_Tasks(all_apks, split_app)
+    num_procs = Scheduling.Worker_Count(tasks, options.processes)
+    if not options.coordinator:
+        print('Extracting features of %d apps (%d tasks) with %d processes' %(len(all_apks), len(tasks), num_procs))
+
+    # --------------- End of Scheduling the apps longest first ---------------
+
+    if options.stream:
+        pool = start_pool(num_procs, tasks)              # Forked before the worker starts, so that no process inherits its pipes (only replaced processes do)
+        worker = start_worker()
         try:
-            if len(res.get()) == 4:
-                app_name = res.get()[0]
-                features_IR.append(res.get()[1])
-                features_SE.append(res.get()[2])
-                features_CF.append(res.get()[3])
-
-                processed_apps.append(app_name)
-        except:
-            pass
-
-    features_file_IR_arff = open(os.path.join(options.output_dir, 'features_IR.arff'), 'wb')
-    features_file_SE_arff = open(os.path.join(options.output_dir, 'features_SE.arff'), 'wb')
-    features_file_CF_arff = open(os.path.join(options.output_dir, 'features_CF.arff'), 'wb')
-
-    EFI.save_features_to_arff(features_IR, features_file_IR_arff)
-    EFS.save_features_to_arff(features_SE, features_file_SE_arff)
-    EFC.save_features_to_arff(features_CF, features_file_CF_arff)
-
-    features_file_IR_arff.close()
-    features_file_SE_arff.close()
-    features_file_CF_arff.close()
-
-    predict_output_IR, predict_output_SE, predict_output_CF =  detect_obfuscation(os.path.join(options.output_dir, 'features_IR.arff'), \
-                                                                                  os.path.join(options.output_dir, 'features_SE.arff'), \
-                                                                                  os.path.join(options.output_dir, 'features_CF.arff'))
-
-    conf_matrix = np.zeros((8, 8), dtype=int)
-    for idx in range(0, len(predict_output_IR)):
-        real_classes = str(Real_Classes[processed_apps[idx]][0]) + str(Real_Classes[processed_apps[idx]][1]) + str(Real_Classes[processed_apps[idx]][2])
-        predicted_classes = predict_output_IR[idx].split(',')[0] + predict_output_SE[idx].split(',')[0] + predict_output_CF[idx].split(',')[0]
-        conf_matrix = confusion_matrix_update(conf_matrix, real_classes, predicted_classes)
-
-    print('Confusion Matrix:')
-    print(conf_matrix)
+            IR_module.open_worker(worker, options.checkpoint_dir)
+            SE_module.open_worker(worker, options.checkpoint_dir)
+            CF_module.open_worker(worker, options.checkpoint_dir)
+            conf_matrix = stream_obfuscation_detection(pool, tasks, cache, worker, store)
+            if options.checkpoint_dir:
+                save_checkpoints(worker, manifest.digests(Corpus_Manifest.Done, run_start))
+            pool.close()
+            pool.join()
+        finally:
+            pool.terminate()                             # Only kills what is still running after an error
+            worker.close()
+
+        print('Confusion Matrix:')
+        print(conf_matrix)
+
+    else:
+        pool = start_pool(num_procs, tasks)
+        try:
+            results = list(extracted_apps(pool, tasks, cache))
+            pool.close()
+            pool.join()
+        finally:
+            pool.terminate()                             # Only kills what is still running after an error
+
+        features_IR = []
+        features_SE = []
+        features_CF = []
+        processed_apps = []
+        for appfile, res in results:
+            try:
+                if len(res) == 4:
+                    app_name = res[0]
+                    features_IR.append(res[1])
+                    features_SE.append(res[2])
+                    features_CF.append(res[3])
+
+                    processed_apps.append(app_name)
+            except Exception:
+                pass
+
+        chunk = store_features(store, processed_apps, features_IR, features_SE, features_CF)
+        manifest.set_status([appfile for appfile, res in results if res], Corpus_Manifest.Done)
+
+        if options.moa_worker:
+            worker = start_worker()
+            try:
+                IR_module.open_worker(worker, options.checkpoint_dir)
+                SE_module.open_worker(worker, options.checkpoint_dir)
+                CF_module.open_worker(worker, options.checkpoint_dir)
+                predict_output_IR, predict_output_SE, predict_output_CF = detect_obfuscation_worker(worker, features_IR, features_SE, features_CF)
+                if options.checkpoint_dir:
+                    save_checkpoints(worker, manifest.digests(Corpus_Manifest.Done, run_start))
+            finally:
+                worker.close()
+        else:
+            # --------------- Exporting the features of this run for moa.DoTask ---------------
+
+            with Instrumentation.stage('arff_write', None, apps=len(processed_apps)):
+                for module, extractor in [('IR', EFI), ('SE', EFS), ('CF', EFC)]:
+                    with open(os.path.join(options.output_dir, 'features_%s.arff' %module), 'w') as arff_file:
+                        if chunk is not None:
+                            store.export_arff(module, arff_file, extractor.arff_header(), [chunk])
+
+            # --------------- End of Exporting the features of this run for moa.DoTask ---------------
+
+            predict_output_IR, predict_output_SE, predict_output_CF =  detect_obfuscation(os.path.join(options.output_dir, 'features_IR.arff'), \
+                                                                                          os.path.join(options.output_dir, 'features_SE.arff'), \
+                                                                                          os.path.join(options.output_dir, 'features_CF.arff'))
+
+        conf_matrix = np.zeros((8, 8), dtype=int)
+        for idx in range(0, len(predict_output_IR)):
+            real_classes = str(Real_Classes[processed_apps[idx]][0]) + str(Real_Classes[processed_apps[idx]][1]) + str(Real_Classes[processed_apps[idx]][2])
+            predicted_classes = predict_output_IR[idx].split(',')[0] + predict_output_SE[idx].split(',')[0] + predict_output_CF[idx].split(',')[0]
+            conf_matrix = confusion_matrix_update(conf_matrix, real_classes, predicted_classes)
+
+        print('Confusion Matrix:')
+        print(conf_matrix)
+
+    if options.timing_log:
+        Instrumentation.print_summary(options.timing_log)
 # ********************* End of Main Body *********************
 
@@ -0,0 +1,162 @@
+/*
+ * AndrODet: An Adaptive Android Obfuscation Detector
+ *
+ * Version (by release date): 2019-11-25
+ *
+ * Long-running MOA worker. It keeps one learner per detection module (IR, SE
+ * and CF) in memory and tests, then trains, each instance as soon as it is
+ * received. Commands are read line by line from stdin and every reply is a
+ * single line on stdout:
+ *
+ *   OPEN <module> <class column> <learner>   followed by the ARFF header (up to @data)
+ *   TEST <module> <v1>,<v2>,...,<class>      replies "<predicted class>,<real class>"
+ *   SAVE <module> <file>                     serializes the learner to a checkpoint file
+ *   QUIT
+ *
+ * A learner given as "file:<checkpoint>" is restored from a checkpoint
+ * written by SAVE and goes on learning from where it stopped.
+ *
+ * Predictions use the same format as "EvaluatePrequential -o". Failed
+ * commands are answered with "ERROR <message>". Every command gets exactly
+ * one reply line, and the ARFF header of an OPEN command is read even when
+ * the command fails, so that its lines are never taken for commands.
+ *
+ * Build: MOA/worker/build.sh
+ */
+
+import java.io.BufferedReader;
+import java.io.File;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+import java.io.StringReader;
+import java.util.HashMap;
+import java.util.Map;
+
+import moa.classifiers.Classifier;
+import moa.core.SerializeUtils;
+import moa.core.Utils;
+import moa.options.ClassOption;
+
+import com.yahoo.labs.samoa.instances.DenseInstance;
+import com.yahoo.labs.samoa.instances.Instance;
+import com.yahoo.labs.samoa.instances.Instances;
+import com.yahoo.labs.samoa.instances.InstancesHeader;
+
+public class AndrODetWorker {
+
+    private static class Module {
+        Instances header;
+        Classifier learner;
+    }
+
+    private final Map<String, Module> modules = new HashMap<String, Module>();
+    private final BufferedReader in;
+    private final PrintStream out;
+
+    public AndrODetWorker(BufferedReader in, PrintStream out) {
+        this.in = in;
+        this.out = out;
+    }
+
+    private String readHeader() throws Exception {
+        StringBuilder arffHeader = new StringBuilder();
+        String line;
+        while ((line = this.in.readLine()) != null) {
+            arffHeader.append(line).append('\n');
+            if (line.trim().toLowerCase().startsWith("@data")) {
+                break;
+            }
+        }
+        return arffHeader.toString();
+    }
+
+    private void open(String[] command, String arffHeader) throws Exception {
+        if (command.length != 4) {
+            throw new Exception("Malformed OPEN command, expected: OPEN <module> <class column> <learner>");
+        }
+        String name = command[1];
+        int classColumn;
+        try {
+            classColumn = Integer.parseInt(command[2]);
+        } catch (NumberFormatException ex) {
+            throw new Exception("Malformed OPEN command, class column is not a number: " + command[2]);
+        }
+        String learnerCli = command[3];
+        Module module = new Module();
+        module.header = new Instances(new StringReader(arffHeader), 1, classColumn);
+        module.header.setClassIndex(classColumn - 1);
+        if (learnerCli.startsWith(ClassOption.FILE_PREFIX_STRING)) {
+            module.learner = (Classifier) SerializeUtils.readFromFile(new File(learnerCli.substring(ClassOption.FILE_PREFIX_STRING.length())));
+        } else {
+            module.learner = (Classifier) ClassOption.cliStringToObject(learnerCli, Classifier.class, null);
+            module.learner.prepareForUse();
+            module.learner.setModelContext(new InstancesHeader(module.header));
+        }
+        this.modules.put(name, module);
+        this.out.println("OK");
+    }
+
+    private void testThenTrain(String name, String row) throws Exception {
+        Module module = this.modules.get(name);
+        if (module == null) {
+            throw new Exception("Module " + name + " is not open");
+        }
+        String[] fields = row.split(",");
+        if (fields.length != module.header.numAttributes()) {
+            throw new Exception("Expected " + module.header.numAttributes() + " values, got " + fields.length);
+        }
+        double[] values = new double[fields.length];
+        for (int i = 0; i < fields.length; i++) {
+            String field = fields[i].trim();
+            values[i] = field.equals("?") ? Double.NaN : Double.parseDouble(field);
+        }
+        Instance inst = new DenseInstance(1.0, values);
+        inst.setDataset(module.header);
+        double[] prediction = module.learner.getVotesForInstance(inst);
+        this.out.println(Utils.maxIndex(prediction) + "," + (inst.classIsMissing() ? " ? " : Integer.toString((int) inst.classValue())));
+        module.learner.trainOnInstance(inst);
+    }
+
+    private void save(String name, String file) throws Exception {
+        Module module = this.modules.get(name);
+        if (module == null) {
+            throw new Exception("Module " + name + " is not open");
+        }
+        SerializeUtils.writeToFile(new File(file), module.learner);
+        this.out.println("OK");
+    }
+
+    public void serve() throws Exception {
+        String line;
+        while ((line = this.in.readLine()) != null) {
+            line = line.trim();
+            if (line.length() == 0) {
+                continue;
+            }
+            String[] command = line.split(" ", 4);
+            try {
+                if (command[0].equals("QUIT")) {
+                    this.out.println("OK");
+                    break;
+                } else if (command[0].equals("OPEN")) {
+                    open(command, readHeader());
+                } else if (command[0].equals("TEST") && command.length == 3) {
+                    testThenTrain(command[1], command[2]);
+                } else if (command[0].equals("SAVE") && command.length >= 3) {
+                    save(command[1], line.split(" ", 3)[2]);
+                } else {
+                    this.out.println("ERROR Unknown command: " + line);
+                }
+            } catch (Throwable ex) {
+                // Whatever went wrong, the driver waits for one reply line
+                this.out.println("ERROR " + String.valueOf(ex.getMessage()).replace('\n', ' '));
+            }
+        }
+    }
+
+    public static void main(String[] args) throws Exception {
+        BufferedReader in = new BufferedReader(new InputStreamReader(System.in, "UTF-8"));
+        PrintStream out = new PrintStream(System.out, true, "UTF-8");
+        new AndrODetWorker(in, out).serve();
+    }
+}
@@ -0,0 +1,7 @@
+#!/bin/bash
+
+# Compiles the long-running MOA worker against moa.jar into MOA/worker/classes
+
+WORKER_DIR="$(cd "$(dirname "$0")" && pwd)"
+mkdir -p "$WORKER_DIR/classes"
+javac -cp "$WORKER_DIR/../moa.jar" -d "$WORKER_DIR/classes" "$WORKER_DIR/AndrODetWorker.java"
@@ -2268,6 +2268,26 @@ class MethodAnalysis:
         """
         return self.get_code().get_length()
 
+    def get_cfg_stats(self) :
+        """
+            Return the size of the control flow graph of the method, as androxgmml exports it :
+            each basic block is a node, each distinct (block, child block) pair is an edge,
+            and a leaf is a block without any child block
+
+            :rtype: a tuple (number of basic blocks, number of leaf blocks, number of edges)
+        """
+        nb_blocks = 0
+        nb_leafs = 0
+        nb_edges = 0
+        for i in self.basic_blocks.get() :
+            childs = set( id(j[-1]) for j in i.childs if j[-1] != None )
+            nb_blocks += 1
+            if len(childs) == 0 :
+                nb_leafs += 1
+            nb_edges += len(childs)
+
+        return nb_blocks, nb_leafs, nb_edges
+
     def get_vm(self) :
         return self.__vm
 
@@ -2400,6 +2420,23 @@ class VMAnalysis:
         for i in self.hmethods :
             yield self.hmethods[i]
 
+    def get_cfg_stats(self) :
+        """
+           Return the size of the control flow graphs of all methods (see :meth:`MethodAnalysis.get_cfg_stats`)
+
+           :rtype: a tuple (number of basic blocks, number of leaf blocks, number of edges)
+        """
+        nb_blocks = 0
+        nb_leafs = 0
+        nb_edges = 0
+        for i in self.methods :
+            blocks, leafs, edges = i.get_cfg_stats()
+            nb_blocks += blocks
+            nb_leafs += leafs
+            nb_edges += edges
+
+        return nb_blocks, nb_leafs, nb_edges
+
     def get_method_signature(self, method, grammar_type="", options={}, predef_sign="") :
         """
             Return a specific signature for a specific method
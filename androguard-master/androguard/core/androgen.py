@@ -109,8 +109,14 @@ class Androguard:
         for i in self.__files :
             ret_type = androconf.is_android( i )
             if ret_type == "APK" :
-                x = apk.APK( i )
-                bc = dvm.DalvikVMFormat( x.get_dex() )
+                # every dex file of a multidex APK, the first one named as the APK and the others as APK:classesN.dex
+                # they are parsed one after the other: a parsed DalvikVMFormat cannot be handed back cheaply from another process, and
+                # threads do not parse faster under the GIL (AndrODet spreads the dex files of large apps over its own processes instead)
+                x = apk.APK( i, lazy=True )
+                for dex_name in x.get_dex_names() :
+                    name = i if dex_name == "classes.dex" else "%s:%s" % (i, dex_name)
+                    self.__bc.append( (name, BC( dvm.DalvikVMFormat( x.get_file( dex_name ) ) )) )
+                continue
             elif ret_type == "DEX" :
                 bc = dvm.DalvikVMFormat( open(i, "rb").read() )
             elif ret_type == "DEY" :
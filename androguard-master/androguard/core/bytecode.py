@@ -17,8 +17,9 @@
 
 import hashlib
 from xml.sax.saxutils import escape
-from struct import unpack, pack
+from struct import unpack, pack, Struct
 import textwrap
+import mmap
 
 import json
 from androconf import warning, error, CONF, enable_colors, remove_colors, save_colors, color_range
@@ -624,6 +625,45 @@ class MethodBC(object) :
         getattr(self, "show_" + value)()
 
 
+STRUCTS = {}
+
+def get_struct(fmt):
+    """
+        Return the (cached) compiled struct of a format
+    """
+    try:
+        return STRUCTS[fmt]
+    except KeyError:
+        STRUCTS[fmt] = Struct(fmt)
+        return STRUCTS[fmt]
+
+def View(buff, offset=0, size=None):
+    """
+        Return a read-only window on buff from offset (of size bytes, or up to the end), without copying it
+
+        :param buff: a string, a mmap or another window
+        :rtype: a buffer (a memoryview in python 3), slicing it only copies the slice
+    """
+    try:
+        if size is None:
+            return buffer(buff, offset)
+        return buffer(buff, offset, size)
+    except NameError:
+        if size is None:
+            return memoryview(buff)[offset:]
+        return memoryview(buff)[offset:offset + size]
+
+def MapFile(filename, offset=0, size=None):
+    """
+        Return a read-only window on a memory-mapped file (or on a part of it, such as a stored zip member)
+
+        :param filename: the path of the file
+        :rtype: a buffer (see :func:`View`)
+    """
+    with open(filename, "rb") as fd:
+        mapped = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+    return View(mapped, offset, size)
+
 class BuffHandle:
     def __init__(self, buff):
         self.__buff = buff
@@ -657,6 +697,22 @@ class BuffHandle:
 
         return buff
 
+    def read_view(self, size) :
+        buff = View( self.__buff, self.__idx, size )
+        self.__idx += size
+
+        return buff
+
+    def unpack(self, fmt) :
+        s = get_struct( fmt )
+        values = s.unpack_from( self.__buff, self.__idx )
+        self.__idx += s.size
+
+        return values
+
+    def unpack_at(self, fmt, offset) :
+        return get_struct( fmt ).unpack_from( self.__buff, offset )
+
     def end(self) :
         return self.__idx == len(self.__buff)
 
@@ -692,11 +748,27 @@ class _Bytecode(object):
         if isinstance(off, SV) :
             off = off.value
 
-        return self.__buff[ off : ]
+        return View( self.__buff, off )
 
     def read_b(self, size) :
         return self.__buff[ self.__idx : self.__idx + size ]
 
+    def read_view(self, size) :
+        buff = View( self.__buff, self.__idx, size )
+        self.__idx += size
+
+        return buff
+
+    def unpack(self, fmt) :
+        s = get_struct( fmt )
+        values = s.unpack_from( self.__buff, self.__idx )
+        self.__idx += s.size
+
+        return values
+
+    def unpack_at(self, fmt, offset) :
+        return get_struct( fmt ).unpack_from( self.__buff, offset )
+
     def set_idx(self, idx) :
         self.__idx = idx
 
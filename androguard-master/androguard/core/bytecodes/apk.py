@@ -24,6 +24,7 @@ import StringIO
 from struct import pack, unpack
 from xml.sax.saxutils import escape
 from zlib import crc32
+import mmap
 import re
 
 from xml.dom import minidom
@@ -49,6 +50,12 @@ if sys.hexversion < 0x2070000 :
 else :
     ZIPMODULE = 1 
 
+# Names of the dex files loaded by Android (classes.dex, classes2.dex, ...)
+DEX_NAME = re.compile(r"^classes([0-9]*)\.dex$")
+
+# Attributes of APK read from the AndroidManifest.xml file (only set once it is parsed in lazy mode)
+MANIFEST_ATTRIBUTES = ("xml", "axml", "package", "androidversion", "permissions", "valid_apk")
+
 ################################################### CHILKAT ZIP FORMAT #####################################################
 class ChilkatZip :
     def __init__(self, raw) :
@@ -106,6 +113,51 @@ class ChilkatZip :
         return s.getBytes()
 
 
+def magic_typer(magic_file=None):
+    """
+        Return a function giving the type of a buffer (with python-magic, or its builtin variant), or None without lib magic
+    """
+    try:
+        import magic
+    except ImportError:
+        return None
+
+    try:
+        getattr(magic, "MagicException")
+    except AttributeError:
+        ms = magic.open(magic.MAGIC_NONE)
+        ms.load()
+        return ms.buffer
+
+    m = magic.Magic(magic_file=magic_file)
+    return m.from_buffer
+
+def signed_crc32(crc):
+    """
+        Return the crc32 of the zip central directory as zlib.crc32 computes it (a signed integer)
+    """
+    if crc >= 0x80000000:
+        return crc - 0x100000000
+    return crc
+
+class MappedFile:
+    """
+        File object reading a memory-mapped file, as the zipfile module reads it (mmap.read needs a size in python 2)
+    """
+    def __init__(self, mapped):
+        self.mapped = mapped
+
+    def read(self, size=-1):
+        if size < 0:
+            size = len(self.mapped) - self.mapped.tell()
+        return self.mapped.read(size)
+
+    def seek(self, offset, whence=0):
+        self.mapped.seek(offset, whence)
+
+    def tell(self):
+        return self.mapped.tell()
+
 def sign_apk(filename, keystore, storepass):
     from subprocess import Popen, PIPE, STDOUT
     compile = Popen([androconf.CONF["PATH_JARSIGNER"],
@@ -136,51 +188,75 @@ class APK:
         :param mode: specify the mode to open the file (optional)
         :param magic_file: specify the magic file (optional)
         :param zipmodule: specify the type of zip module to use (0:chilkat, 1:zipfile, 2:patch zipfile)
+        :param lazy: map the file instead of reading it, and parse the AndroidManifest.xml file, type the files and compute their crc32 only when they are asked for (optional)
 
         :type filename: string
         :type raw: boolean
         :type mode: string
         :type magic_file: string
         :type zipmodule: int
+        :type lazy: boolean
 
         :Example:
           APK("myfile.apk")
           APK(open("myfile.apk", "rb").read(), raw=True)
+          APK("myfile.apk", lazy=True).get_dex()
     """
-    def __init__(self, filename, raw=False, mode="r", magic_file=None, zipmodule=ZIPMODULE):
+    def __init__(self, filename, raw=False, mode="r", magic_file=None, zipmodule=ZIPMODULE, lazy=False):
         self.filename = filename
 
-        self.xml = {}
-        self.axml = {}
         self.arsc = {}
 
-        self.package = ""
-        self.androidversion = {}
-        self.permissions = []
-        self.valid_apk = False
-
         self.files = {}
         self.files_crc32 = {}
 
         self.magic_file = magic_file
 
+        self.lazy = lazy
+        self.mapped = lazy and raw == False and mode == "r" and zipmodule != 0
+
         if raw == True:
             self.__raw = filename
         else:
             fd = open(filename, "rb")
-            self.__raw = fd.read()
+            if self.mapped:
+                self.__raw = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.__raw = fd.read()
             fd.close()
 
         self.zipmodule = zipmodule
+        self.zip = self._open_zip(mode)
+
+        if lazy:
+            self.lazy_manifest = True
+        else:
+            self._parse_manifest()
+            self.get_files_types()
 
-        if zipmodule == 0:
-            self.zip = ChilkatZip(self.__raw)
-        elif zipmodule == 2:
+    def _open_zip(self, mode="r"):
+        if self.zipmodule == 0:
+            return ChilkatZip(self.__raw)
+
+        if self.zipmodule == 2:
             from androguard.patch import zipfile
-            self.zip = zipfile.ZipFile(StringIO.StringIO(self.__raw), mode=mode)
         else:
             import zipfile
-            self.zip = zipfile.ZipFile(StringIO.StringIO(self.__raw), mode=mode)
+
+        if self.mapped:
+            return zipfile.ZipFile(MappedFile(self.__raw), mode=mode)
+        return zipfile.ZipFile(StringIO.StringIO(self.__raw), mode=mode)
+
+    def _parse_manifest(self):
+        self.lazy_manifest = False
+
+        self.xml = {}
+        self.axml = {}
+
+        self.package = ""
+        self.androidversion = {}
+        self.permissions = []
+        self.valid_apk = False
 
         for i in self.zip.namelist():
             if i == "AndroidManifest.xml":
@@ -200,7 +276,26 @@ class APK:
 
                     self.valid_apk = True
 
-        self.get_files_types()
+    def __getattr__(self, name):
+        # In lazy mode, the attributes read from the AndroidManifest.xml file are set the first time one of them is asked for
+        if name in MANIFEST_ATTRIBUTES and self.__dict__.get("lazy_manifest"):
+            self._parse_manifest()
+            return self.__dict__[name]
+        raise AttributeError(name)
+
+    def __getstate__(self):
+        # A mapped file is saved as its bytes, and its zip file is opened again when it is loaded
+        state = self.__dict__.copy()
+        if self.__dict__.get("mapped"):
+            state["_APK__raw"] = self.__raw[:]
+            state["mapped"] = False
+            del state["zip"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if "zip" not in state:
+            self.zip = self._open_zip()
 
     def get_AndroidManifest(self):
         """
@@ -264,43 +359,32 @@ class APK:
 
             :rtype: a dictionnary
         """
-        try:
-            import magic
-        except ImportError:
-            # no lib magic !
-            for i in self.get_files():
-                buffer = self.zip.read(i)
-                self.files_crc32[i] = crc32(buffer)
-                self.files[i] = "Unknown"
-            return self.files
+        typer = magic_typer(self.magic_file)
+        for i in self.get_files():
+            if i not in self.files:
+                self._type_file(i, typer)
 
-        if self.files != {}:
-            return self.files
+        return self.files
 
-        builtin_magic = 0
-        try:
-            getattr(magic, "MagicException")
-        except AttributeError:
-            builtin_magic = 1
-
-        if builtin_magic:
-            ms = magic.open(magic.MAGIC_NONE)
-            ms.load()
-
-            for i in self.get_files():
-                buffer = self.zip.read(i)
-                self.files[i] = ms.buffer(buffer)
-                self.files[i] = self._patch_magic(buffer, self.files[i])
-                self.files_crc32[i] = crc32(buffer)
-        else:
-            m = magic.Magic(magic_file=self.magic_file)
-            for i in self.get_files():
-                buffer = self.zip.read(i)
-                self.files[i] = m.from_buffer(buffer)
-                self.files[i] = self._patch_magic(buffer, self.files[i])
-                self.files_crc32[i] = crc32(buffer)
+    def get_file_type(self, filename):
+        """
+            Return the type of the specified filename (only this file is decompressed)
 
-        return self.files
+            :rtype: string
+        """
+        if filename not in self.files:
+            self._type_file(filename, magic_typer(self.magic_file))
+
+        return self.files[filename]
+
+    def _type_file(self, filename, typer):
+        buffer = self.zip.read(filename)
+        if typer is None:
+            # no lib magic !
+            self.files[filename] = "Unknown"
+        else:
+            self.files[filename] = self._patch_magic(buffer, typer(buffer))
+        self.files_crc32[filename] = crc32(buffer)
 
     def _patch_magic(self, buffer, orig):
         if ("Zip" in orig) or ("DBase" in orig):
@@ -314,6 +398,11 @@ class APK:
         return orig
 
     def get_files_crc32(self):
+        if self.lazy and self.zipmodule != 0:
+            # The crc32 of every file is in the central directory of the zip file, nothing needs to be decompressed
+            for item in self.zip.infolist():
+                self.files_crc32.setdefault(item.filename, signed_crc32(item.CRC))
+
         if self.files_crc32 == {}:
             self.get_files_types()
 
@@ -340,6 +429,8 @@ class APK:
 
             :rtype: string
         """
+        if self.mapped:
+            return self.__raw[:]
         return self.__raw
 
     def get_file(self, filename):
@@ -361,6 +452,24 @@ class APK:
         """
         return self.get_file("classes.dex")
 
+    def get_dex_names(self):
+        """
+            Return the names of the dex files of a multidex APK (classes.dex, classes2.dex, ...), in the order Android loads them
+
+            :rtype: a list of strings
+        """
+        names = [ i for i in self.get_files() if DEX_NAME.match(i) ]
+        return sorted(names, key=lambda i: int(DEX_NAME.match(i).group(1) or 1))
+
+    def get_all_dex(self):
+        """
+            Return the raw data of every dex file (see :meth:`get_dex_names`), one at a time
+
+            :rtype: a generator of strings
+        """
+        for i in self.get_dex_names():
+            yield self.get_file(i)
+
     def get_elements(self, tag_name, attribute):
         """
             Return elements in xml files which match with the tag name and the specific attribute
@@ -21,6 +21,7 @@ from androguard.core.androconf import CONF, debug, warning, is_android_raw
 import sys
 import re
 import struct
+import bisect
 from struct import pack, unpack, calcsize
 
 DEX_FILE_MAGIC_35 = 'dex\n035\x00'
@@ -212,7 +213,7 @@ def readuleb128p1(buff) :
   return readuleb128( buff ) - 1
 
 def readsleb128(buff) :
-    result = unpack( '=b', buff.read(1) )[0]
+    result = buff.unpack('=b')[0]
 
     if result <= 0x7f :
         result = (result << 25)
@@ -220,28 +221,28 @@ def readsleb128(buff) :
             result = (0x7fffffff & result) - 0x80000000
         result = result >> 25
     else :
-        cur = unpack( '=b', buff.read(1) )[0]
+        cur = buff.unpack('=b')[0]
         result = (result & 0x7f) | ((cur & 0x7f) << 7)
         if cur <= 0x7f :
             result = (result << 18) >> 18
         else :
-            cur = unpack( '=b', buff.read(1) )[0]
+            cur = buff.unpack('=b')[0]
             result |= (cur & 0x7f) << 14
             if cur <= 0x7f :
                 result = (result << 11) >> 11
             else :
-                cur = unpack( '=b', buff.read(1) )[0]
+                cur = buff.unpack('=b')[0]
                 result |= (cur & 0x7f) << 21
                 if cur <= 0x7f :
                     result = (result << 4) >> 4
                 else :
-                    cur = unpack( '=b', buff.read(1) )[0]
+                    cur = buff.unpack('=b')[0]
                     result |= cur << 28
 
     return result
 
 def get_sbyte(buff) :
-  return unpack( '=b', buff.read(1) )[0]
+  return buff.unpack('=b')[0]
 
 def readsleb128_2(buff) :
   result = get_sbyte(buff)
@@ -396,29 +397,29 @@ class HeaderItem :
 
         self.offset = buff.get_idx()
 
-        self.magic = unpack("=Q", buff.read(8))[0]
-        self.checksum = unpack("=i", buff.read(4))[0]
-        self.signature = unpack("=20s", buff.read(20))[0]
-        self.file_size = unpack("=I", buff.read(4))[0]
-        self.header_size = unpack("=I", buff.read(4))[0]
-        self.endian_tag = unpack("=I", buff.read(4))[0]
-        self.link_size = unpack("=I", buff.read(4))[0]
-        self.link_off = unpack("=I", buff.read(4))[0]
-        self.map_off = unpack("=I", buff.read(4))[0]
-        self.string_ids_size = unpack("=I", buff.read(4))[0]
-        self.string_ids_off = unpack("=I", buff.read(4))[0]
-        self.type_ids_size = unpack("=I", buff.read(4))[0]
-        self.type_ids_off = unpack("=I", buff.read(4))[0]
-        self.proto_ids_size = unpack("=I", buff.read(4))[0]
-        self.proto_ids_off = unpack("=I", buff.read(4))[0]
-        self.field_ids_size = unpack("=I", buff.read(4))[0]
-        self.field_ids_off = unpack("=I", buff.read(4))[0]
-        self.method_ids_size = unpack("=I", buff.read(4))[0]
-        self.method_ids_off = unpack("=I", buff.read(4))[0]
-        self.class_defs_size = unpack("=I", buff.read(4))[0]
-        self.class_defs_off = unpack("=I", buff.read(4))[0]
-        self.data_size = unpack("=I", buff.read(4))[0]
-        self.data_off = unpack("=I", buff.read(4))[0]
+        self.magic = buff.unpack("=Q")[0]
+        self.checksum = buff.unpack("=i")[0]
+        self.signature = buff.unpack("=20s")[0]
+        self.file_size = buff.unpack("=I")[0]
+        self.header_size = buff.unpack("=I")[0]
+        self.endian_tag = buff.unpack("=I")[0]
+        self.link_size = buff.unpack("=I")[0]
+        self.link_off = buff.unpack("=I")[0]
+        self.map_off = buff.unpack("=I")[0]
+        self.string_ids_size = buff.unpack("=I")[0]
+        self.string_ids_off = buff.unpack("=I")[0]
+        self.type_ids_size = buff.unpack("=I")[0]
+        self.type_ids_off = buff.unpack("=I")[0]
+        self.proto_ids_size = buff.unpack("=I")[0]
+        self.proto_ids_off = buff.unpack("=I")[0]
+        self.field_ids_size = buff.unpack("=I")[0]
+        self.field_ids_off = buff.unpack("=I")[0]
+        self.method_ids_size = buff.unpack("=I")[0]
+        self.method_ids_off = buff.unpack("=I")[0]
+        self.class_defs_size = buff.unpack("=I")[0]
+        self.class_defs_off = buff.unpack("=I")[0]
+        self.data_size = buff.unpack("=I")[0]
+        self.data_off = buff.unpack("=I")[0]
 
         self.map_off_obj = None
         self.string_off_obj = None
@@ -541,7 +542,7 @@ class AnnotationOffItem :
     """
     def __init__(self,  buff, cm) :
         self.__CM = cm
-        self.annotation_off = unpack("=I", buff.read( 4 ) )[0]
+        self.annotation_off = buff.unpack("=I")[0]
 
     def show(self) :
         bytecode._PrintSubBanner("Annotation Off Item")
@@ -573,7 +574,7 @@ class AnnotationSetItem :
         self.offset = buff.get_idx()
         self.annotation_off_item = []
 
-        self.size = unpack("=I", buff.read( 4 ) )[0]
+        self.size = buff.unpack("=I")[0]
         for i in xrange(0, self.size) :
             self.annotation_off_item.append( AnnotationOffItem(buff, cm) )
 
@@ -624,7 +625,7 @@ class AnnotationSetRefItem :
     """
     def __init__(self,  buff, cm) :
         self.__CM = cm
-        self.annotations_off = unpack("=I", buff.read( 4 ) )[0]
+        self.annotations_off = buff.unpack("=I")[0]
 
     def get_annotations_off(self) :
       """
@@ -663,7 +664,7 @@ class AnnotationSetRefList:
         self.__CM = cm
         self.list = []
 
-        self.size = unpack("=I", buff.read( 4 ) )[0]
+        self.size = buff.unpack("=I")[0]
         for i in xrange(0, self.size) :
             self.list.append( AnnotationSetRefItem(buff, cm) )
 
@@ -711,8 +712,8 @@ class FieldAnnotation :
         self.offset = buff.get_idx()
 
         self.__CM = cm
-        self.field_idx = unpack("=I", buff.read( 4 ) )[0]
-        self.annotations_off = unpack("=I", buff.read( 4 ) )[0]
+        self.field_idx = buff.unpack("=I")[0]
+        self.annotations_off = buff.unpack("=I")[0]
 
     def get_field_idx(self) :
       """
@@ -765,8 +766,8 @@ class MethodAnnotation :
         self.offset = buff.get_idx()
 
         self.__CM = cm
-        self.method_idx = unpack("=I", buff.read( 4 ) )[0]
-        self.annotations_off = unpack("=I", buff.read( 4 ) )[0]
+        self.method_idx = buff.unpack("=I")[0]
+        self.annotations_off = buff.unpack("=I")[0]
 
     def get_method_idx(self) :
       """
@@ -819,8 +820,8 @@ class ParameterAnnotation :
         self.offset = buff.get_idx()
 
         self.__CM = cm
-        self.method_idx = unpack("=I", buff.read( 4 ) )[0]
-        self.annotations_off = unpack("=I", buff.read( 4 ) )[0]
+        self.method_idx = buff.unpack("=I")[0]
+        self.annotations_off = buff.unpack("=I")[0]
 
     def get_method_idx(self) :
       """
@@ -874,10 +875,10 @@ class AnnotationsDirectoryItem :
 
         self.offset = buff.get_idx()
 
-        self.class_annotations_off = unpack("=I", buff.read(4))[0]
-        self.annotated_fields_size = unpack("=I", buff.read(4))[0]
-        self.annotated_methods_size = unpack("=I", buff.read(4))[0]
-        self.annotated_parameters_size = unpack("=I", buff.read(4))[0]
+        self.class_annotations_off = buff.unpack("=I")[0]
+        self.annotated_fields_size = buff.unpack("=I")[0]
+        self.annotated_methods_size = buff.unpack("=I")[0]
+        self.annotated_parameters_size = buff.unpack("=I")[0]
 
         self.field_annotations = []
         for i in xrange(0, self.annotated_fields_size) :
@@ -1015,7 +1016,7 @@ class TypeItem :
     """
     def __init__(self, buff, cm) :
         self.__CM = cm
-        self.type_idx = unpack("=H", buff.read(2))[0]
+        self.type_idx = buff.unpack("=H")[0]
 
     def get_type_idx(self) :
       """
@@ -1066,7 +1067,7 @@ class TypeList :
 
         self.len_pad = len(self.pad)
 
-        self.size = unpack("=I", buff.read( 4 ) )[0]
+        self.size = buff.unpack("=I")[0]
 
         self.list = []
         for i in xrange(0, self.size) :
@@ -1229,7 +1230,7 @@ class DebugInfoItem :
             self.parameter_names.append( readuleb128p1( buff ) )
 
         self.bytecodes = []
-        bcode = DBGBytecode( self.CM, unpack("=B", buff.read(1))[0] )
+        bcode = DBGBytecode( self.CM, buff.unpack("=B")[0] )
         self.bytecodes.append( bcode )
 
         while bcode.get_op_value() != DBG_END_SEQUENCE :
@@ -1261,7 +1262,7 @@ class DebugInfoItem :
             else : #bcode_value >= DBG_Special_Opcodes_BEGIN and bcode_value <= DBG_Special_Opcodes_END :
                 pass
 
-            bcode = DBGBytecode( self.CM, unpack("=B", buff.read(1))[0] )
+            bcode = DBGBytecode( self.CM, buff.unpack("=B")[0] )
             self.bytecodes.append( bcode )
 
     def reload(self) :
@@ -1430,7 +1431,7 @@ class EncodedValue :
     def __init__(self, buff, cm) :
         self.__CM = cm
 
-        self.val = unpack("=B", buff.read(1))[0]
+        self.val = buff.unpack("=B")[0]
         self.value_arg = self.val >> 5
         self.value_type = self.val & 0x1f
 
@@ -1641,7 +1642,7 @@ class AnnotationItem :
 
         self.offset = buff.get_idx()
 
-        self.visibility = unpack("=B", buff.read(1))[0]
+        self.visibility = buff.unpack("=B")[0]
         self.annotation = EncodedAnnotation(buff, cm)
 
     def get_visibility(self) :
@@ -1815,7 +1816,7 @@ class StringIdItem :
         self.__CM = cm
         self.offset = buff.get_idx()
 
-        self.string_data_off = unpack("=I", buff.read(4))[0]
+        self.string_data_off = buff.unpack("=I")[0]
 
     def get_string_data_off(self):
         """
@@ -1863,7 +1864,7 @@ class TypeIdItem :
         self.__CM = cm
         self.offset = buff.get_idx()
 
-        self.descriptor_idx = unpack("=I", buff.read( 4 ) )[0]
+        self.descriptor_idx = buff.unpack("=I")[0]
         self.descriptor_idx_value = None
 
     def get_descriptor_idx(self) :
@@ -1970,9 +1971,9 @@ class ProtoIdItem :
         self.__CM = cm
         self.offset = buff.get_idx()
 
-        self.shorty_idx = unpack("=I", buff.read(4))[0]
-        self.return_type_idx = unpack("=I", buff.read(4))[0]
-        self.parameters_off = unpack("=I", buff.read(4))[0]
+        self.shorty_idx = buff.unpack("=I")[0]
+        self.return_type_idx = buff.unpack("=I")[0]
+        self.parameters_off = buff.unpack("=I")[0]
 
 
         self.shorty_idx_value = None
@@ -2116,9 +2117,9 @@ class FieldIdItem :
         self.__CM = cm
         self.offset = buff.get_idx()
 
-        self.class_idx = unpack("=H", buff.read(2))[0]
-        self.type_idx = unpack("=H", buff.read(2))[0]
-        self.name_idx = unpack("=I", buff.read(4))[0]
+        self.class_idx = buff.unpack("=H")[0]
+        self.type_idx = buff.unpack("=H")[0]
+        self.name_idx = buff.unpack("=I")[0]
 
         self.class_idx_value = None
         self.type_idx_value = None
@@ -2272,9 +2273,9 @@ class MethodIdItem :
         self.__CM = cm
         self.offset = buff.get_idx()
 
-        self.class_idx = unpack("=H", buff.read(2))[0]
-        self.proto_idx = unpack("=H", buff.read(2))[0]
-        self.name_idx = unpack("=I", buff.read(4))[0]
+        self.class_idx = buff.unpack("=H")[0]
+        self.proto_idx = buff.unpack("=H")[0]
+        self.name_idx = buff.unpack("=I")[0]
 
         self.class_idx_value = None
         self.proto_idx_value = None
@@ -2648,7 +2649,9 @@ class EncodedMethod:
         self.proto = None
         self.class_name = None
 
-        self.code = None
+        # a lazy analysis decodes the code when it is first used (see __getattr__)
+        if not self.CM.get_lazy_analysis() :
+          self.code = None
 
         self.access_flags_string = None
 
@@ -2711,7 +2714,14 @@ class EncodedMethod:
         self.name = v[1]
         self.proto = ''.join(i for i in v[2])
 
-        self.code = self.CM.get_code( self.code_off )
+        if not self.CM.get_lazy_analysis() :
+          self.code = self.CM.get_code( self.code_off )
+
+    def __getattr__(self, name) :
+        if name == "code" :
+          self.code = self.CM.get_code( self.code_off )
+          return self.code
+        raise AttributeError( name )
 
     def get_locals(self):
         ret = self.proto.split(')')
@@ -3181,14 +3191,14 @@ class ClassDefItem:
         self.__CM = cm
         self.offset = buff.get_idx()
 
-        self.class_idx = unpack("=I", buff.read(4))[0]
-        self.access_flags = unpack("=I", buff.read(4))[0]
-        self.superclass_idx = unpack("=I", buff.read(4))[0]
-        self.interfaces_off = unpack("=I", buff.read(4))[0]
-        self.source_file_idx = unpack("=I", buff.read(4))[0]
-        self.annotations_off = unpack("=I", buff.read(4))[0]
-        self.class_data_off = unpack("=I", buff.read(4))[0]
-        self.static_values_off = unpack("=I", buff.read(4))[0]
+        self.class_idx = buff.unpack("=I")[0]
+        self.access_flags = buff.unpack("=I")[0]
+        self.superclass_idx = buff.unpack("=I")[0]
+        self.interfaces_off = buff.unpack("=I")[0]
+        self.source_file_idx = buff.unpack("=I")[0]
+        self.annotations_off = buff.unpack("=I")[0]
+        self.class_data_off = buff.unpack("=I")[0]
+        self.static_values_off = buff.unpack("=I")[0]
 
         self.interfaces = None
         self.class_data_item = None
@@ -5998,7 +6008,7 @@ DALVIK_OPCODES_OPTIMIZED = {
 class Unresolved(Instruction):
   def __init__(self, cm, data):
     self.cm = cm
-    self.data = data
+    self.data = data[:]
 
   def get_name(self):
     return "unresolved"
@@ -6083,27 +6093,27 @@ class LinearSweepAlgorithm :
             # payload instructions ?
             if op_value in DALVIK_OPCODES_PAYLOAD:
               try:
-                obj = get_instruction_payload(op_value, insn[idx:])
+                obj = get_instruction_payload(op_value, bytecode.View(insn, idx))
                 classic_instruction = False
               except struct.error:
                 warning("error while decoding instruction ...")
 
             elif op_value in DALVIK_OPCODES_EXTENDED_WIDTH:
               try:
-                obj = get_extented_instruction(cm, op_value, insn[idx:])
+                obj = get_extented_instruction(cm, op_value, bytecode.View(insn, idx))
                 classic_instruction = False
               except struct.error, why:
                 warning("error while decoding instruction ..." + why.__str__())
 
             # optimized instructions ?
             elif self.odex and (op_value in DALVIK_OPCODES_OPTIMIZED):
-              obj = get_optimized_instruction(cm, op_value, insn[idx:])
+              obj = get_optimized_instruction(cm, op_value, bytecode.View(insn, idx))
               classic_instruction = False
 
           # classical instructions
           if classic_instruction:
             op_value = unpack('=B', insn[idx])[0]
-            obj = get_instruction(cm, op_value, insn[idx:], self.odex)
+            obj = get_instruction(cm, op_value, bytecode.View(insn, idx), self.odex)
 
           # emit instruction
           yield obj
@@ -6324,9 +6334,9 @@ class TryItem:
 
         self.__CM = cm
 
-        self.start_addr = unpack("=I", buff.read(4))[0]
-        self.insn_count = unpack("=H", buff.read(2))[0]
-        self.handler_off = unpack("=H", buff.read(2))[0]
+        self.start_addr = buff.unpack("=I")[0]
+        self.insn_count = buff.unpack("=H")[0]
+        self.handler_off = buff.unpack("=H")[0]
 
     def set_off(self, off) :
       self.offset = off
@@ -6386,19 +6396,19 @@ class DalvikCode:
 
         self.__off = buff.get_idx()
 
-        self.registers_size = unpack("=H", buff.read(2))[0]
-        self.ins_size = unpack("=H", buff.read(2))[0]
-        self.outs_size = unpack("=H", buff.read(2))[0]
-        self.tries_size = unpack("=H", buff.read(2))[0]
-        self.debug_info_off = unpack("=I", buff.read(4))[0]
-        self.insns_size = unpack("=I", buff.read(4))[0]
+        self.registers_size = buff.unpack("=H")[0]
+        self.ins_size = buff.unpack("=H")[0]
+        self.outs_size = buff.unpack("=H")[0]
+        self.tries_size = buff.unpack("=H")[0]
+        self.debug_info_off = buff.unpack("=I")[0]
+        self.insns_size = buff.unpack("=I")[0]
 
         ushort = calcsize('=H')
 
-        self.code = DCode(self.__CM, buff.get_idx(), self.insns_size, buff.read(self.insns_size * ushort))
+        self.code = DCode(self.__CM, buff.get_idx(), self.insns_size, buff.read_view(self.insns_size * ushort))
 
         if (self.insns_size % 2 == 1):
-            self.padding = unpack("=H", buff.read(2))[0]
+            self.padding = buff.unpack("=H")[0]
 
         self.tries = []
         self.handlers = None
@@ -6635,26 +6645,181 @@ class CodeItem :
         length += i.get_size()
       return length
 
+# Items of the data sections, looked up by the offsets which refer to them (and decoded one at a time by a lazy analysis),
+# with the method returning the offset of an item, and the attributes of its alignment padding
+DATA_MAP_ITEMS = {
+                    "TYPE_TYPE_LIST" :                  (TypeList, TypeList.get_type_list_off, ("offset", "pad", "len_pad")),
+                    "TYPE_ANNOTATION_SET_REF_LIST" :    (AnnotationSetRefList, AnnotationSetRefList.get_off, ()),
+                    "TYPE_ANNOTATION_SET_ITEM" :        (AnnotationSetItem, AnnotationSetItem.get_off, ()),
+                    "TYPE_CLASS_DATA_ITEM" :            (ClassDataItem, ClassDataItem.get_off, ()),
+                    "TYPE_CODE_ITEM" :                  (DalvikCode, DalvikCode.get_off, ("offset", "int_padding")),
+                    "TYPE_STRING_DATA_ITEM" :           (StringDataItem, StringDataItem.get_off, ()),
+                    "TYPE_ANNOTATION_ITEM" :            (AnnotationItem, AnnotationItem.get_off, ()),
+                    "TYPE_ENCODED_ARRAY_ITEM" :         (EncodedArrayItem, EncodedArrayItem.get_off, ()),
+                    "TYPE_ANNOTATIONS_DIRECTORY_ITEM" : (AnnotationsDirectoryItem, AnnotationsDirectoryItem.get_off, ()),
+                 }
+
+class LazyItems :
+    """
+        This class indexes by offset the items of a data section (lazy analysis): an item is decoded when it is first looked up,
+        and the whole section only when it is iterated (show, save ...)
+
+        :param map_item: the map item of the section
+        :type map_item: :class:`MapItem` object
+        :param buff: a Buff object of the dex file
+        :type buff: Buff object
+        :param cm: a ClassManager object
+        :type cm: :class:`ClassManager`
+    """
+    def __init__(self, map_item, buff, cm) :
+        self.__CM = cm
+        self.__buff = buff
+
+        self.type = TYPE_MAP_ITEM[ map_item.get_type() ]
+        self.item_class, self.item_off, self.item_padding = DATA_MAP_ITEMS[ self.type ]
+
+        self.offset = map_item.get_offset()
+        self.size = map_item.get_size()
+        self.end = cm.get_next_offset_item( self.offset )
+        if self.end <= self.offset :
+            self.end = buff.length_buff()
+
+        self.__items = {}
+        self.__all = None
+
+    def get(self, off) :
+        """
+            Return the item at an offset, decoding it if needed
+
+            :param off: the offset of the item
+            :type off: int
+
+            :rtype: the item object, or None if there is no item at this offset
+        """
+        try :
+            return self.__items[ off ]
+        except KeyError :
+            pass
+
+        if self.__all != None or off < self.offset or off >= self.end :
+            return None
+
+        idx = self.__buff.get_idx()
+        self.__buff.set_idx( off )
+        item = self.item_class( self.__buff, self.__CM )
+        self.__buff.set_idx( idx )
+
+        self.__items[ off ] = item
+        item.reload()
+
+        return item
+
+    def __getitem__(self, off) :
+        item = self.get( off )
+        if item == None :
+            raise KeyError( off )
+        return item
+
+    def gets(self) :
+        """
+            Return all the items of the section, decoding those which were not looked up yet
+
+            :rtype: a list of item objects
+        """
+        if self.__all == None :
+            idx = self.__buff.get_idx()
+            self.__buff.set_idx( self.offset )
+
+            items = []
+            decoded = []
+            for i in xrange(0, self.size) :
+                item = self.item_class( self.__buff, self.__CM )
+                off = self.item_off( item )
+
+                # the items already looked up are kept, as other objects refer to them, with the padding which precedes them in the section
+                if off in self.__items :
+                    for name in self.item_padding :
+                        setattr( self.__items[ off ], name, getattr( item, name ) )
+                    item = self.__items[ off ]
+                else :
+                    self.__items[ off ] = item
+                    decoded.append( item )
+
+                items.append( item )
+
+            self.__buff.set_idx( idx )
+
+            self.__all = items
+            self.__CM.add_items( self.type, items )
+
+            for i in decoded :
+                i.reload()
+
+        return self.__all
+
+    def __iter__(self) :
+        return iter( self.gets() )
+
+    def __len__(self) :
+        return self.size
+
+    def set_off(self, off) :
+      self.offset = off
+
+    def get_off(self) :
+      return self.offset
+
+    def reload(self) :
+        pass
+
+    def show(self) :
+        for i in self.gets() :
+            i.show()
+
+    def get_obj(self) :
+        return self.gets()
+
+    def get_raw(self) :
+        return ''.join(i.get_raw() for i in self.gets())
+
+    def get_length(self) :
+      length = 0
+      for i in self.gets() :
+        length += i.get_length()
+      return length
+
+class LazyCodeItem(LazyItems) :
+    """
+        This class is the :class:`CodeItem` of a lazy analysis: the code of a method is decoded when it is first looked up
+    """
+    def get_code(self, off) :
+        return self.get( off )
+
+    def get_length(self) :
+      length = 0
+      for i in self.gets() :
+        length += i.get_size()
+      return length
+
 class MapItem :
     def __init__(self, buff, cm) :
         self.__CM = cm
+        self.__buff = buff
 
         self.off = buff.get_idx()
 
-        self.type = unpack("=H", buff.read(2))[0]
-        self.unused = unpack("=H", buff.read(2))[0]
-        self.size = unpack("=I", buff.read(4))[0]
-        self.offset = unpack("=I", buff.read(4))[0]
+        self.type = buff.unpack("=H")[0]
+        self.unused = buff.unpack("=H")[0]
+        self.size = buff.unpack("=I")[0]
+        self.offset = buff.unpack("=I")[0]
 
         self.item = None
 
-        buff.set_idx( self.offset )
-
-        lazy_analysis = self.__CM.get_lazy_analysis()
+        # a lazy analysis only decodes the item when it is first used (see load)
+        self.lazy_analysis = self.__CM.get_lazy_analysis()
 
-        if lazy_analysis :
-          self.next_lazy(buff, cm)
-        else :
+        if not self.lazy_analysis :
+          buff.set_idx( self.offset )
           self.next(buff, cm)
 
     def get_off(self) :
@@ -6729,49 +6894,28 @@ class MapItem :
         else :
             bytecode.Exit( "Map item %d @ 0x%x(%d) is unknown" % (self.type, buff.get_idx(), buff.get_idx()) )
 
-    def next_lazy(self, buff, cm) :
-        if TYPE_MAP_ITEM[ self.type ] == "TYPE_STRING_ID_ITEM" :
-            self.item = [ StringIdItem( buff, cm ) for i in xrange(0, self.size) ]
-
-        elif TYPE_MAP_ITEM[ self.type ] == "TYPE_CODE_ITEM" :
-            self.item = CodeItem( self.size, buff, cm )
-
-        elif TYPE_MAP_ITEM[ self.type ] == "TYPE_TYPE_ID_ITEM" :
-            self.item = TypeIdItem( self.size, buff, cm )
-
-        elif TYPE_MAP_ITEM[ self.type ] == "TYPE_PROTO_ID_ITEM" :
-            self.item = ProtoIdItem( self.size, buff, cm )
-
-        elif TYPE_MAP_ITEM[ self.type ] == "TYPE_FIELD_ID_ITEM" :
-            self.item = FieldIdItem( self.size, buff, cm )
-
-        elif TYPE_MAP_ITEM[ self.type ] == "TYPE_METHOD_ID_ITEM" :
-            self.item = MethodIdItem( self.size, buff, cm )
-
-        elif TYPE_MAP_ITEM[ self.type ] == "TYPE_CLASS_DEF_ITEM" :
-            self.item = ClassDefItem( self.size, buff, cm )
-
-        elif TYPE_MAP_ITEM[ self.type ] == "TYPE_HEADER_ITEM" :
-            self.item = HeaderItem( self.size, buff, cm )
-
-        elif TYPE_MAP_ITEM[ self.type ] == "TYPE_TYPE_LIST" :
-            self.item = [ TypeList( buff, cm ) for i in xrange(0, self.size) ]
-
-        elif TYPE_MAP_ITEM[ self.type ] == "TYPE_STRING_DATA_ITEM" :
-            self.item = [ StringDataItem( buff, cm ) for i in xrange(0, self.size) ]
-
-        elif TYPE_MAP_ITEM[ self.type ] == "TYPE_DEBUG_INFO_ITEM" :
-            self.item = DebugInfoItemEmpty( buff, cm )
+    def load(self) :
+        """
+            Decode the item of a lazy analysis, and register it in the ClassManager
 
-        elif TYPE_MAP_ITEM[ self.type ] == "TYPE_ENCODED_ARRAY_ITEM" :
-            self.item = [ EncodedArrayItem( buff, cm ) for i in xrange(0, self.size) ]
+            :rtype: the item object
+        """
+        self.lazy_analysis = False
 
-        elif TYPE_MAP_ITEM[ self.type ] == "TYPE_CLASS_DATA_ITEM" :
-            self.item = [ ClassDataItem(buff, cm) for i in xrange(0, self.size) ]
+        if TYPE_MAP_ITEM[ self.type ] == "TYPE_CODE_ITEM" :
+          self.item = LazyCodeItem( self, self.__buff, self.__CM )
+        elif TYPE_MAP_ITEM[ self.type ] in DATA_MAP_ITEMS :
+          self.item = LazyItems( self, self.__buff, self.__CM )
+        else :
+          idx = self.__buff.get_idx()
+          self.__buff.set_idx( self.offset )
+          self.next( self.__buff, self.__CM )
+          self.__buff.set_idx( idx )
 
-        elif TYPE_MAP_ITEM[ self.type ] == "TYPE_MAP_LIST" :
-            pass # It's me I think !!!
+        self.__CM.add_type_item( TYPE_MAP_ITEM[ self.type ], self, self.item )
+        self.reload()
 
+        return self.item
 
     def reload(self) :
         if self.item != None :
@@ -6784,7 +6928,7 @@ class MapItem :
     def show(self) :
         bytecode._Print( "\tMAP_TYPE_ITEM", TYPE_MAP_ITEM[ self.type ])
 
-        if self.item != None :
+        if self.get_item() != None :
             if isinstance( self.item, list ):
                 for i in self.item :
                     i.show()
@@ -6794,7 +6938,7 @@ class MapItem :
     def pretty_show(self) :
         bytecode._Print( "\tMAP_TYPE_ITEM", TYPE_MAP_ITEM[ self.type ])
 
-        if self.item != None :
+        if self.get_item() != None :
             if isinstance( self.item, list ):
                 for i in self.item :
                     if isinstance(i, ClassDataItem) :
@@ -6805,13 +6949,16 @@ class MapItem :
                 self.item.show()
 
     def get_obj(self) :
+        if isinstance(self.get_item(), LazyItems) and not isinstance(self.item, LazyCodeItem) :
+          return self.item.gets()
         return self.item
 
     def get_raw(self) :
-      if isinstance(self.item, list) :
-        self.offset = self.item[0].get_off()
+      item = self.get_obj()
+      if isinstance(item, list) :
+        self.offset = item[0].get_off()
       else :
-        self.offset = self.item.get_off()
+        self.offset = item.get_off()
 
       return pack("=H", self.type) + pack("=H", self.unused) + pack("=I", self.size) + pack("=I", self.offset)
 
@@ -6819,6 +6966,8 @@ class MapItem :
         return calcsize( "=HHII" )
 
     def get_item(self) :
+        if self.lazy_analysis :
+          return self.load()
         return self.item
 
     def set_item(self, item) :
@@ -6830,6 +6979,19 @@ class OffObj:
         self.off = o
 
 
+class ManagedItems(dict) :
+    """
+       This class maps the types of the map list to their items, decoding the item of a type when it is first looked up (lazy analysis)
+    """
+    def __init__(self) :
+        dict.__init__(self)
+        self.map_items = {}
+
+    def __missing__(self, type_item) :
+        if type_item not in self.map_items :
+            raise KeyError( type_item )
+        return self.map_items.pop( type_item ).get_item()
+
 class ClassManager:
     """
        This class is used to access to all elements (strings, type, proto ...) of the dex format
@@ -6842,8 +7004,10 @@ class ClassManager:
         self.vmanalysis_ob = None
         self.gvmanalysis_ob = None
 
-        self.__manage_item = {}
+        self.__manage_item = ManagedItems()
         self.__manage_item_off = []
+        self.__sorted_item_off = None
+        self.__data_items_off = {}
 
         self.__strings_off = {}
 
@@ -6887,9 +7051,14 @@ class ClassManager:
       return self.__obj_offset[ offset ]
 
     def get_item_by_offset(self, offset) :
-      return self.__item_offset[ offset ]
+      item = self.__item_offset[ offset ]
+      if isinstance(item, LazyItems) :
+        return item.gets()
+      return item
 
     def get_string_by_offset(self, offset) :
+      if self.lazy_analysis :
+        return self.__manage_item[ "TYPE_STRING_DATA_ITEM" ][ offset ]
       return self.__strings_off[ offset ]
 
     def get_lazy_analysis(self) :
@@ -6922,22 +7091,57 @@ class ClassManager:
         self.__obj_offset[ c_item.get_off() ] = c_item
         self.__item_offset[ c_item.get_offset() ] = item
 
+        if item != None :
+            if isinstance(item, list) :
+                self.add_items( type_item, item )
+            else :
+                self.__manage_item_off.append( c_item.get_offset() )
+                self.__sorted_item_off = None
+
+    def add_lazy_type_item(self, type_item, c_item) :
+        """
+            Register a map item whose item is decoded when it is first looked up (lazy analysis)
+        """
+        self.__manage_item.map_items[ type_item ] = c_item
+        self.__manage_item_off.append( c_item.get_offset() )
+        self.__sorted_item_off = None
+
+    def add_items(self, type_item, items) :
         sdi = False
         if type_item == "TYPE_STRING_DATA_ITEM" :
             sdi = True
 
-        if item != None :
-            if isinstance(item, list) :
-                for i in item :
-                    goff = i.offset
-                    self.__manage_item_off.append( goff )
+        # the other items of the data sections are indexed by the offset which refers to them (the first one wins, as a scan would)
+        items_off = None
+        if not sdi and type_item in DATA_MAP_ITEMS :
+            items_off = self.__data_items_off.setdefault( type_item, {} )
+            item_off = DATA_MAP_ITEMS[ type_item ][1]
 
-                    self.__obj_offset[ i.get_off() ] = i
+        for i in items :
+            goff = i.offset
+            self.__manage_item_off.append( goff )
 
-                    if sdi == True :
-                      self.__strings_off[ goff ] = i
-            else :
-                self.__manage_item_off.append( c_item.get_offset() )
+            self.__obj_offset[ i.get_off() ] = i
+
+            if sdi == True :
+              self.__strings_off[ goff ] = i
+            elif items_off != None :
+              items_off.setdefault( item_off( i ), i )
+
+        self.__sorted_item_off = None
+
+    def get_data_item(self, type_item, off) :
+        """
+            Return the item of a data section which an offset refers to
+
+            :param type_item: the type of the data section (TYPE_CLASS_DATA_ITEM, TYPE_TYPE_LIST ...)
+            :param off: the offset of the item
+
+            :rtype: the item object, or None if there is no item at this offset
+        """
+        if self.lazy_analysis :
+            return self.__manage_item[ type_item ].get( off )
+        return self.__data_items_off[ type_item ].get( off )
 
     def get_code(self, idx) :
         try :
@@ -6946,16 +7150,14 @@ class ClassManager:
             return None
 
     def get_class_data_item(self, off) :
-        for i in self.__manage_item[ "TYPE_CLASS_DATA_ITEM" ] :
-            if i.get_off() == off :
-                return i
+        i = self.get_data_item( "TYPE_CLASS_DATA_ITEM", off )
+        if i != None :
+            return i
 
         bytecode.Exit( "unknown class data item @ 0x%x" % off )
 
     def get_encoded_array_item(self, off) :
-        for i in self.__manage_item["TYPE_ENCODED_ARRAY_ITEM" ] :
-            if i.get_off() == off :
-                return i
+        return self.get_data_item( "TYPE_ENCODED_ARRAY_ITEM", off )
 
     def get_string(self, idx) :
         if idx in self.hook_strings :
@@ -6970,9 +7172,9 @@ class ClassManager:
         try:
             if self.recode_ascii_string:
                 if self.recode_ascii_string_meth:
-                  return self.recode_ascii_string_meth(self.__strings_off[off].get())
-                return self.get_ascii_string(self.__strings_off[off].get())
-            return self.__strings_off[off].get()
+                  return self.recode_ascii_string_meth(self.get_string_by_offset(off).get())
+                return self.get_ascii_string(self.get_string_by_offset(off).get())
+            return self.get_string_by_offset(off).get()
         except KeyError:
             bytecode.Warning( "unknown string item @ 0x%x(%d)" % (off,idx) )
             return "AG:IS: invalid string"
@@ -6985,7 +7187,7 @@ class ClassManager:
             return "AG:IS: invalid string"
 
         try :
-            return self.__strings_off[off].get()
+            return self.get_string_by_offset(off).get()
         except KeyError :
             bytecode.Warning( "unknown string item @ 0x%x(%d)" % (off,idx) )
             return "AG:IS: invalid string"
@@ -6997,11 +7199,11 @@ class ClassManager:
         if off in self.__cached_type_list :
             return self.__cached_type_list[ off ]
 
-        for i in self.__manage_item[ "TYPE_TYPE_LIST" ] :
-            if i.get_type_list_off() == off :
-                ret =  "(" + i.get_string() + ")"
-                self.__cached_type_list[ off ] = ret
-                return ret
+        i = self.get_data_item( "TYPE_TYPE_LIST", off )
+        if i != None :
+            ret =  "(" + i.get_string() + ")"
+            self.__cached_type_list[ off ] = ret
+            return ret
 
         return None
 
@@ -7055,6 +7257,7 @@ class ClassManager:
           i.reload()
 
         self.vm._create_python_export_class( class_def )
+        self.vm._flush_names()
 
     def set_hook_method_name(self, encoded_method, value):
         python_export = True
@@ -7080,6 +7283,9 @@ class ClassManager:
 
         method.reload()
 
+        if self.vm != None :
+          self.vm._flush_names()
+
     def set_hook_field_name(self, encoded_field, value):
         python_export = True
 
@@ -7105,14 +7311,19 @@ class ClassManager:
 
         field.reload()
 
+        if self.vm != None :
+          self.vm._flush_names()
 
     def set_hook_string(self, idx, value) :
         self.hook_strings[ idx ] = value
 
     def get_next_offset_item(self, idx) :
-        for i in self.__manage_item_off :
-            if i > idx :
-                return i
+        if self.__sorted_item_off == None :
+            self.__sorted_item_off = sorted( self.__manage_item_off )
+
+        i = bisect.bisect_right( self.__sorted_item_off, idx )
+        if i < len( self.__sorted_item_off ) :
+            return self.__sorted_item_off[ i ]
         return idx
 
     def get_debug_off(self, off) :
@@ -7131,7 +7342,7 @@ class MapList :
 
         self.offset = off
 
-        self.size = unpack("=I", buff.read( 4 ) )[0]
+        self.size = buff.unpack("=I")[0]
 
         self.map_item = []
         for i in xrange(0, self.size) :
@@ -7142,6 +7353,12 @@ class MapList :
 
             buff.set_idx( idx + mi.get_length() )
 
+            # a lazy analysis decodes the other items when they are first looked up
+            if mi.lazy_analysis and TYPE_MAP_ITEM[ mi.get_type() ] != "TYPE_MAP_LIST" :
+              self.CM.add_lazy_type_item( TYPE_MAP_ITEM[ mi.get_type() ], mi )
+              continue
+            mi.lazy_analysis = False
+
             c_item = mi.get_item()
             if c_item == None :
               mi.set_item( self )
@@ -7150,7 +7367,8 @@ class MapList :
             self.CM.add_type_item( TYPE_MAP_ITEM[ mi.get_type() ], mi, c_item )
 
         for i in self.map_item :
-            i.reload()
+            if not i.lazy_analysis :
+              i.reload()
 
     def reload(self) :
       pass
@@ -7219,6 +7437,16 @@ class DREF :
         self.items.append((x, y))
 
 
+# Attributes of DalvikVMFormat set to the items of the map list
+VM_ITEMS = [ ("classes", "TYPE_CLASS_DEF_ITEM"),
+             ("methods", "TYPE_METHOD_ID_ITEM"),
+             ("fields", "TYPE_FIELD_ID_ITEM"),
+             ("codes", "TYPE_CODE_ITEM"),
+             ("strings", "TYPE_STRING_DATA_ITEM"),
+             ("debug", "TYPE_DEBUG_INFO_ITEM"),
+             ("header", "TYPE_HEADER_ITEM") ]
+VM_ITEM_TYPES = dict(VM_ITEMS)
+
 class DalvikVMFormat(bytecode._Bytecode):
     """
         This class can parse a classes.dex file of an Android application (APK).
@@ -7257,17 +7485,25 @@ class DalvikVMFormat(bytecode._Bytecode):
         else:
             self.map_list = MapList( self.CM, self.__header.map_off, self )
 
-            self.classes = self.map_list.get_item_type( "TYPE_CLASS_DEF_ITEM" )
-            self.methods = self.map_list.get_item_type( "TYPE_METHOD_ID_ITEM" )
-            self.fields = self.map_list.get_item_type( "TYPE_FIELD_ID_ITEM" )
-            self.codes = self.map_list.get_item_type( "TYPE_CODE_ITEM" )
-            self.strings = self.map_list.get_item_type( "TYPE_STRING_DATA_ITEM" )
-            self.debug = self.map_list.get_item_type( "TYPE_DEBUG_INFO_ITEM" )
-            self.header = self.map_list.get_item_type( "TYPE_HEADER_ITEM" )
+            # a lazy analysis looks up these items when they are first used (see __getattr__)
+            if not self.config["LAZY_ANALYSIS"]:
+                for name, ttype in VM_ITEMS:
+                    setattr(self, name, self.map_list.get_item_type( ttype ))
 
         self.classes_names = None
         self.__cache_methods = None
         self.__cached_methods_idx = None
+        self.__cached_classes = None
+        self.__cached_fields = None
+        self.__cached_class_methods = None
+        self.__cached_class_fields = None
+
+    def __getattr__(self, name):
+        if name in VM_ITEM_TYPES and "map_list" in self.__dict__:
+            value = self.map_list.get_item_type( VM_ITEM_TYPES[name] )
+            setattr(self, name, value)
+            return value
+        raise AttributeError(name)
 
     def get_classes_def_item(self) :
         """
@@ -7506,10 +7742,36 @@ class DalvikVMFormat(bytecode._Bytecode):
 
           :rtype: a :class:`ClassDefItem` object
         """
-        for i in self.classes.class_def:
-          if i.get_name() == name:
-            return i
-        return None
+        try:
+          return self._get_classes_by_name()[ name ][0]
+        except KeyError:
+          return None
+
+    def _get_classes_by_name(self) :
+        # classes, methods and fields by name, built on the first lookup (and again after a hook renamed them)
+        if self.__cached_classes == None :
+          self.__cached_classes = {}
+          self.__cached_fields = {}
+          self.__cached_class_methods = {}
+          self.__cached_class_fields = {}
+
+          for i in self.classes.class_def :
+            self.__cached_classes.setdefault( i.get_name(), [] ).append( i )
+
+            for j in i.get_methods() :
+              self.__cached_class_methods.setdefault( j.get_class_name(), [] ).append( j )
+
+            for j in i.get_fields() :
+              self.__cached_fields.setdefault( i.get_name() + j.get_name() + j.get_descriptor(), j )
+              self.__cached_class_fields.setdefault( j.get_class_name(), [] ).append( j )
+
+        return self.__cached_classes
+
+    def _flush_names(self) :
+        # a hook renamed a class, a method or a field
+        self.classes_names = None
+        self.__cache_methods = None
+        self.__cached_classes = None
 
     def get_method(self, name) :
         """
@@ -7644,8 +7906,7 @@ class DalvikVMFormat(bytecode._Bytecode):
             :rtype: None or a :class:`EncodedMethod` object
         """
         l = []
-        for i in self.classes.class_def:
-          if i.get_name() == class_name:
+        for i in self._get_classes_by_name().get(class_name, []):
             for j in i.get_methods():
                 if j.get_name() == method_name:
                     l.append(j)
@@ -7661,13 +7922,8 @@ class DalvikVMFormat(bytecode._Bytecode):
 
             :rtype: a list with :class:`EncodedMethod` objects
         """
-        l = []
-        for i in self.classes.class_def :
-            for j in i.get_methods() :
-                if class_name == j.get_class_name() :
-                    l.append( j )
-
-        return l
+        self._get_classes_by_name()
+        return list( self.__cached_class_methods.get( class_name, [] ) )
 
     def get_fields_class(self, class_name) :
         """
@@ -7678,13 +7934,8 @@ class DalvikVMFormat(bytecode._Bytecode):
 
             :rtype: a list with :class:`EncodedField` objects
         """
-        l = []
-        for i in self.classes.class_def :
-            for j in i.get_fields() :
-                if class_name == j.get_class_name() :
-                    l.append( j )
-
-        return l
+        self._get_classes_by_name()
+        return list( self.__cached_class_fields.get( class_name, [] ) )
 
     def get_field_descriptor(self, class_name, field_name, descriptor) :
         """
@@ -7699,12 +7950,11 @@ class DalvikVMFormat(bytecode._Bytecode):
 
             :rtype: None or a :class:`EncodedField` object
         """
-        for i in self.classes.class_def :
-            if class_name == i.get_name() :
-                for j in i.get_fields() :
-                    if field_name == j.get_name() and descriptor == j.get_descriptor() :
-                        return j
-        return None
+        self._get_classes_by_name()
+        try :
+            return self.__cached_fields[ class_name + field_name + descriptor ]
+        except KeyError :
+            return None
 
     def get_strings(self) :
         """
@@ -7937,7 +8187,7 @@ class DalvikVMFormat(bytecode._Bytecode):
         :param size:
         :type size:
       """
-      for i in DCode(self.CM, offset, size, self.get_buff()[offset:offset + size]).get_instructions():
+      for i in DCode(self.CM, offset, size, bytecode.View(self.get_buff(), offset, size)).get_instructions():
         yield i
 
     def _get_class_hierarchy(self):
@@ -8123,14 +8373,14 @@ class OdexHeaderItem:
     def __init__(self, buff):
         buff.set_idx(8)
 
-        self.dex_offset = unpack("=I", buff.read(4))[0]
-        self.dex_length = unpack("=I", buff.read(4))[0]
-        self.deps_offset = unpack("=I", buff.read(4))[0]
-        self.deps_length = unpack("=I", buff.read(4))[0]
-        self.aux_offset = unpack("=I", buff.read(4))[0]
-        self.aux_length = unpack("=I", buff.read(4))[0]
-        self.flags = unpack("=I", buff.read(4))[0]
-        self.padding = unpack("=I", buff.read(4))[0]
+        self.dex_offset = buff.unpack("=I")[0]
+        self.dex_length = buff.unpack("=I")[0]
+        self.deps_offset = buff.unpack("=I")[0]
+        self.deps_length = buff.unpack("=I")[0]
+        self.aux_offset = buff.unpack("=I")[0]
+        self.aux_length = buff.unpack("=I")[0]
+        self.flags = buff.unpack("=I")[0]
+        self.padding = buff.unpack("=I")[0]
 
     def show(self):
         print "dex_offset:%x dex_length:%x deps_offset:%x deps_length:%x aux_offset:%x aux_length:%x flags:%x" % (self.dex_offset,
@@ -8159,15 +8409,15 @@ class OdexDependencies:
         :param buff: a Buff object string which represents the odex dependencies
     """
     def __init__(self, buff):
-        self.modification_time = unpack("=I", buff.read(4))[0]
-        self.crc = unpack("=I", buff.read(4))[0]
-        self.dalvik_build = unpack("=I", buff.read(4))[0]
-        self.dependency_count = unpack("=I", buff.read(4))[0]
+        self.modification_time = buff.unpack("=I")[0]
+        self.crc = buff.unpack("=I")[0]
+        self.dalvik_build = buff.unpack("=I")[0]
+        self.dependency_count = buff.unpack("=I")[0]
         self.dependencies = []
         self.dependency_checksums = []
 
         for i in range(0, self.dependency_count):
-            string_length = unpack("=I", buff.read(4))[0]
+            string_length = buff.unpack("=I")[0]
             name_dependency = buff.read(string_length)
             self.dependencies.append(name_dependency)
             self.dependency_checksums.append(buff.read(20))
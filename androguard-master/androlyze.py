@@ -114,7 +114,7 @@ def AnalyzeAPK(filename, raw=False, decompiler=None):
         :rtype: return the :class:`APK`, :class:`DalvikVMFormat`, and :class:`VMAnalysis` objects
     """
     androconf.debug("APK ...")
-    a = APK(filename, raw)
+    a = APK(filename, raw, lazy=True)
     d, dx = AnalyzeDex(a.get_dex(), raw=True, decompiler=decompiler)
     return a, d, dx
 
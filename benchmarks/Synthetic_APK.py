@@ -0,0 +1,315 @@
+# ************************ General Information ************************
+'''
+VERSION:
+-------
+
+Version (by release date): 2019-11-25
+
+DEVELOPER INFORMATION:
+---------------------
+
+Name: Omid Mirzaei
+Laboratory: Computer Security Lab (COSEC)
+University: Universidad Carlos III de Madrid
+Website: https://cosec.inf.uc3m.es/~omid-mirzaei/
+
+PUBLICATION:
+-----------
+
+AndrODet: An Adaptive Android Obfuscation Detector
+O. Mirzaei, J. M. de Fuentes, J. E. Tapiador, L. Gonzalez-Manzano
+Future Generation Computer Systems, Elsevier (January 2019)
+
+COPYRIGHT NOTICE:
+----------------
+
+All rights reserved for the above developer and research center.
+Please, take a look at the "License.txt" file for more detailed information regarding the usage and distribution of these source codes.
+
+ACKNOWLEDGEMENT:
+---------------
+
+This work has been partially supported by the:
+MINECO grant TIN2016-79095-C2-2-R (SMOG-DEV);
+CAM grant S2013/ICE-3095 (CIBERDINE);
+co-funded with European FEDER funds;
+partially supported by the UC3M's grant Programa de Ayudas para la Movilidad.
+The authors would like to thank the Allatori technical team for its valuable assistance, and, also, the authors of the AMD and PraGuard datasets which made their repositories available to us.
+'''
+# ************************ End of General Information ************************
+
+# ************************ Module Information ************************
+'''
+MAIN FUNCTIONALITY:
+------------------
+
+This module generates deterministic synthetic Android applications for benchmarking.
+Every app holds one or more valid .dex files (format 035) written from scratch, with a configurable number of classes, methods, fields and strings.
+Identifiers can be renamed (short names such as a, b, ..., aa), strings can be encrypted (base64-like), and methods can be padded with goto/nop instructions,
+so that the apps look like the ones AndrODet is meant to tell apart. The same seed always gives byte-identical apps.
+'''
+# ************************ End of Module Information  ************************
+
+# ************************ Importing Modules ************************
+
+import os
+import base64
+import struct
+import random
+import hashlib
+import zipfile
+import zlib
+
+# ************************ End of Importing Modules ************************
+
+# ************************ Initialization ************************
+
+Size_Classes = {                                                                        # Shape of the apps of each size class
+    'small'    : {'num_classes' : 20,   'methods_per_class' : 4,  'fields_per_class' : 3, 'strings_per_method' : 2, 'num_dex' : 1},
+    'medium'   : {'num_classes' : 200,  'methods_per_class' : 8,  'fields_per_class' : 5, 'strings_per_method' : 2, 'num_dex' : 1},
+    'large'    : {'num_classes' : 1000, 'methods_per_class' : 12, 'fields_per_class' : 6, 'strings_per_method' : 1, 'num_dex' : 1},
+    'multidex' : {'num_classes' : 1200, 'methods_per_class' : 8,  'fields_per_class' : 4, 'strings_per_method' : 1, 'num_dex' : 3},
+}
+Obfuscations = {                                                                        # Folder of the apps of each kind, as AndrODet_MOA.py expects them
+    'IR/YES' : {'renamed' : True,  'encrypted' : False, 'padding' : 0},
+    'IR/NO'  : {'renamed' : False, 'encrypted' : False, 'padding' : 0},
+    'SE/YES' : {'renamed' : False, 'encrypted' : True,  'padding' : 0},
+    'SE/NO'  : {'renamed' : False, 'encrypted' : False, 'padding' : 0},
+    'CF/YES' : {'renamed' : False, 'encrypted' : False, 'padding' : 6},
+    'CF/NO'  : {'renamed' : False, 'encrypted' : False, 'padding' : 0},
+}
+Words = ['get', 'set', 'user', 'name', 'account', 'view', 'list', 'item', 'update', 'load', 'cache', 'network', 'request', \
+         'response', 'message', 'handler', 'value', 'count', 'index', 'manager', 'service', 'activity', 'result', 'data']
+Zip_Date_Time = (1980, 1, 1, 0, 0, 0)                                                   # Fixed timestamp of every zip entry
+No_Index = 0xffffffff                                                                   # NO_INDEX of the DEX format
+Access_Flags = 0x0009                                                                   # ACC_PUBLIC | ACC_STATIC
+
+# ********************* End of Initialization *********************
+
+# ********************* Functions *********************
+
+# --------------- Drawing deterministic values ---------------
+
+def Random_Below(rng, n):
+    # random() is the same in python 2 and 3 for the same seed, unlike randint and choice
+    return int(rng.random() * n)
+
+
+def Short_Name(idx):
+    # a, b, ..., z, aa, ab, ... as identifier renaming tools name things
+    name = ''
+    idx += 1
+    while idx > 0:
+        idx, rest = divmod(idx - 1, 26)
+        name = chr(ord('a') + rest) + name
+    return name
+
+
+def Long_Name(rng, idx, capitalized=False):
+    words = [Words[Random_Below(rng, len(Words))] for _ in range(2 + Random_Below(rng, 3))]
+    name = words[0] + ''.join(word.capitalize() for word in words[1:]) + str(idx)
+    if capitalized:
+        return name[0].upper() + name[1:]
+    return name
+
+
+def Plain_String(rng):
+    return ' '.join(Words[Random_Below(rng, len(Words))] for _ in range(1 + Random_Below(rng, 8)))
+
+
+def Encrypted_String(rng):
+    raw = bytearray(Random_Below(rng, 256) for _ in range(12 + Random_Below(rng, 140)))
+    return base64.b64encode(bytes(raw)).decode('ascii')
+
+# --------------- End of Drawing deterministic values ---------------
+
+# --------------- Writing .dex files ---------------
+
+def Uleb128(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7f
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def Align(buff, alignment=4):
+    return buff + b'\0' * (-len(buff) % alignment)
+
+
+def Method_Code(string_indexes, padding):
+    # const/4 v0, #0; if-eqz v0, +N; const-string v0, ... (one per string); nop * padding; goto +1 * padding; return-void
+    units = [0x0012, 0x0038, 0]
+    for string_idx in string_indexes:
+        units += [0x001a, string_idx]
+    units += [0x0000] * padding
+    units += [0x0128] * padding
+    units[2] = len(units) - 1                                                           # The branch jumps to return-void
+    units.append(0x000e)
+    return struct.pack('<HHHHII', 1, 0, 0, 0, 0, len(units)) + struct.pack('<%dH' % len(units), *units)
+
+
+def Build_Dex(classes):
+    # classes: list of (descriptor, field names, [(method name, strings, padding), ...])
+    # ********************** Collecting and sorting the ids **********************
+    strings = set(['V', 'I', 'Ljava/lang/Object;'])
+    for descriptor, fields, methods in classes:
+        strings.add(descriptor)
+        strings.update(fields)
+        for name, method_strings, padding in methods:
+            strings.add(name)
+            strings.update(method_strings)
+    strings = sorted(strings)
+    if len(strings) > 0xffff:
+        raise ValueError('Too many strings for const-string (%d)' %len(strings))
+    string_idx = dict((strg, idx) for idx, strg in enumerate(strings))
+    types = sorted(['V', 'I', 'Ljava/lang/Object;'] + [descriptor for descriptor, fields, methods in classes], key=lambda t: string_idx[t])
+    type_idx = dict((t, idx) for idx, t in enumerate(types))
+    field_ids = sorted((type_idx[descriptor], string_idx[name], type_idx['I']) for descriptor, fields, methods in classes for name in fields)
+    method_ids = sorted((type_idx[descriptor], string_idx[name]) for descriptor, fields, methods in classes for name, method_strings, padding in methods)
+    field_idx = dict(((class_t, name_s), idx) for idx, (class_t, name_s, field_t) in enumerate(field_ids))
+    method_idx = dict((key, idx) for idx, key in enumerate(method_ids))
+    # ********************** End of Collecting and sorting the ids **********************
+    # ********************** Laying out the sections **********************
+    string_ids_off = 0x70
+    type_ids_off = string_ids_off + 4 * len(strings)
+    proto_ids_off = type_ids_off + 4 * len(types)
+    field_ids_off = proto_ids_off + 12
+    method_ids_off = field_ids_off + 8 * len(field_ids)
+    class_defs_off = method_ids_off + 8 * len(method_ids)
+    data_off = class_defs_off + 32 * len(classes)
+
+    data = b''
+    code_offs = {}
+    for descriptor, fields, methods in classes:
+        for name, method_strings, padding in methods:
+            code_offs[(type_idx[descriptor], string_idx[name])] = data_off + len(data)
+            data = Align(data + Method_Code([string_idx[strg] for strg in method_strings], padding))
+    code_items_off = data_off
+    num_code_items = len(code_offs)
+
+    string_data_off = data_off + len(data)
+    string_data_offs = []
+    for strg in strings:
+        string_data_offs.append(data_off + len(data))
+        data += Uleb128(len(strg)) + strg.encode('ascii') + b'\0'
+
+    class_data_off = data_off + len(data)
+    class_data_offs = []
+    for descriptor, fields, methods in sorted(classes, key=lambda c: type_idx[c[0]]):
+        class_t = type_idx[descriptor]
+        class_data_offs.append((class_t, data_off + len(data)))
+        item = Uleb128(len(fields)) + Uleb128(0) + Uleb128(len(methods)) + Uleb128(0)
+        previous = 0
+        for idx in sorted(field_idx[(class_t, string_idx[name])] for name in fields):
+            item += Uleb128(idx - previous) + Uleb128(Access_Flags)
+            previous = idx
+        previous = 0
+        for idx, key in sorted((method_idx[(class_t, string_idx[name])], (class_t, string_idx[name])) for name, method_strings, padding in methods):
+            item += Uleb128(idx - previous) + Uleb128(Access_Flags) + Uleb128(code_offs[key])
+            previous = idx
+        data += item
+
+    data = Align(data)
+    map_off = data_off + len(data)
+    map_items = [(0x0000, 1, 0), (0x0001, len(strings), string_ids_off), (0x0002, len(types), type_ids_off), (0x0003, 1, proto_ids_off)]
+    if field_ids:
+        map_items.append((0x0004, len(field_ids), field_ids_off))
+    if method_ids:
+        map_items.append((0x0005, len(method_ids), method_ids_off))
+    map_items.append((0x0006, len(classes), class_defs_off))
+    if num_code_items:
+        map_items.append((0x2001, num_code_items, code_items_off))
+    map_items += [(0x2002, len(strings), string_data_off), (0x2000, len(classes), class_data_off), (0x1000, 1, map_off)]
+    data += struct.pack('<I', len(map_items)) + b''.join(struct.pack('<HHII', item_type, 0, size, offset) for item_type, size, offset in map_items)
+    data = Align(data)
+    # ********************** End of Laying out the sections **********************
+    # ********************** Writing the ids and the header **********************
+    ids = b''.join(struct.pack('<I', offset) for offset in string_data_offs)
+    ids += b''.join(struct.pack('<I', string_idx[t]) for t in types)
+    ids += struct.pack('<III', string_idx['V'], type_idx['V'], 0)
+    ids += b''.join(struct.pack('<HHI', class_t, field_t, name_s) for class_t, name_s, field_t in field_ids)
+    ids += b''.join(struct.pack('<HHI', class_t, 0, name_s) for class_t, name_s in method_ids)
+    ids += b''.join(struct.pack('<IIIIIIII', class_t, 0x0001, type_idx['Ljava/lang/Object;'], 0, No_Index, 0, offset, 0) for class_t, offset in class_data_offs)
+
+    file_size = data_off + len(data)
+    header = struct.pack('<IIIIIIIIIIIIIIIIIIIII', 0x70, 0x12345678, 0, 0, map_off, \
+                         len(strings), string_ids_off, len(types), type_ids_off, 1, proto_ids_off, \
+                         len(field_ids), field_ids_off if field_ids else 0, len(method_ids), method_ids_off if method_ids else 0, \
+                         len(classes), class_defs_off, len(data), data_off, 0, 0)[:-8]
+    body = struct.pack('<I', file_size) + header + ids + data
+    signature = hashlib.sha1(body).digest()
+    checksum = zlib.adler32(signature + body) & 0xffffffff
+    return b'dex\n035\0' + struct.pack('<I', checksum) + signature + body
+    # ********************** End of Writing the ids and the header **********************
+
+# --------------- End of Writing .dex files ---------------
+
+# --------------- Writing .apk files ---------------
+
+def Generate_Classes(rng, num_classes, methods_per_class, fields_per_class, strings_per_method, renamed, encrypted, padding, first_class=0):
+    classes = []
+    for class_num in range(first_class, first_class + num_classes):
+        if renamed:
+            descriptor = 'Lcom/bench/%s;' %Short_Name(class_num)
+            fields = [Short_Name(idx) for idx in range(fields_per_class)]
+            method_names = [Short_Name(fields_per_class + idx) for idx in range(methods_per_class)]
+        else:
+            descriptor = 'Lcom/bench/app/%s;' %Long_Name(rng, class_num, True)
+            fields = ['m' + Long_Name(rng, idx, True) for idx in range(fields_per_class)]
+            method_names = [Long_Name(rng, idx) for idx in range(methods_per_class)]
+        methods = []
+        for name in method_names:
+            if encrypted:
+                method_strings = [Encrypted_String(rng) for _ in range(strings_per_method)]
+            else:
+                method_strings = [Plain_String(rng) for _ in range(strings_per_method)]
+            methods.append((name, method_strings, padding + Random_Below(rng, 2) * padding))
+        classes.append((descriptor, fields, methods))
+    return classes
+
+
+def Generate_APK(apk_file, seed, num_classes, methods_per_class, fields_per_class, strings_per_method, num_dex=1, renamed=False, encrypted=False, padding=0):
+    rng = random.Random(seed)
+    zip_ref = zipfile.ZipFile(apk_file, 'w', zipfile.ZIP_DEFLATED)
+    try:
+        manifest = zipfile.ZipInfo('AndroidManifest.xml', Zip_Date_Time)
+        manifest.compress_type = zipfile.ZIP_DEFLATED
+        zip_ref.writestr(manifest, '<manifest package="com.bench.app%d"/>' %seed)
+        classes_per_dex = -(-num_classes // num_dex)
+        for dex_num in range(num_dex):
+            first_class = dex_num * classes_per_dex
+            classes = Generate_Classes(rng, min(classes_per_dex, num_classes - first_class), methods_per_class, fields_per_class, \
+                                       strings_per_method, renamed, encrypted, padding, first_class)
+            member = zipfile.ZipInfo('classes.dex' if dex_num == 0 else 'classes%d.dex' %(dex_num + 1), Zip_Date_Time)
+            member.compress_type = zipfile.ZIP_DEFLATED
+            zip_ref.writestr(member, Build_Dex(classes))
+    finally:
+        zip_ref.close()
+
+
+def Generate_Corpus(corpus_dir, size_classes, apps_per_kind, seed=0):
+    # One folder per kind of obfuscation (IR/YES, IR/NO, ...), with apps_per_kind apps of each size class in each of them
+    apps = []
+    app_num = 0
+    for kind in sorted(Obfuscations):
+        kind_dir = os.path.join(corpus_dir, kind)
+        if not os.path.isdir(kind_dir):
+            os.makedirs(kind_dir)
+        for size_class in size_classes:
+            for _ in range(apps_per_kind):
+                apk_file = os.path.join(kind_dir, 'bench_%s_%s_%04d.apk' %(kind.replace('/', '_'), size_class, app_num))
+                shape = dict(Size_Classes[size_class])
+                shape.update(Obfuscations[kind])
+                Generate_APK(apk_file, seed * 100003 + app_num, **shape)
+                apps.append((size_class, kind, apk_file))
+                app_num += 1
+    return apps
+
+# --------------- End of Writing .apk files ---------------
+
+# ********************* End of Functions *********************
@@ -0,0 +1,262 @@
+# ************************ General Information ************************
+'''
+VERSION:
+-------
+
+Version (by release date): 2019-11-25
+
+DEVELOPER INFORMATION:
+---------------------
+
+Name: Omid Mirzaei
+Laboratory: Computer Security Lab (COSEC)
+University: Universidad Carlos III de Madrid
+Website: https://cosec.inf.uc3m.es/~omid-mirzaei/
+
+PUBLICATION:
+-----------
+
+AndrODet: An Adaptive Android Obfuscation Detector
+O. Mirzaei, J. M. de Fuentes, J. E. Tapiador, L. Gonzalez-Manzano
+Future Generation Computer Systems, Elsevier (January 2019)
+
+COPYRIGHT NOTICE:
+----------------
+
+All rights reserved for the above developer and research center.
+Please, take a look at the "License.txt" file for more detailed information regarding the usage and distribution of these source codes.
+
+ACKNOWLEDGEMENT:
+---------------
+
+This work has been partially supported by the:
+MINECO grant TIN2016-79095-C2-2-R (SMOG-DEV);
+CAM grant S2013/ICE-3095 (CIBERDINE);
+co-funded with European FEDER funds;
+partially supported by the UC3M's grant Programa de Ayudas para la Movilidad.
+The authors would like to thank the Allatori technical team for its valuable assistance, and, also, the authors of the AMD and PraGuard datasets which made their repositories available to us.
+'''
+# ************************ End of General Information ************************
+
+# ************************ Module Information ************************
+'''
+MAIN FUNCTIONALITY:
+------------------
+
+This module shares the feature extraction tasks of one coordinator among worker nodes, possibly on other hosts.
+The coordinator serves a table of leases through multiprocessing.managers: every node takes a task whenever one of its processes is idle (so faster nodes take more),
+and returns its result. A node which stops sending heartbeats loses its leases, and their tasks are handed to other nodes.
+Apps are handed out by path, and their bytes are sent to the nodes which cannot read that path.
+
+The connection is authenticated with a shared key, but results travel as pickles, so only run coordinators on networks where every host is trusted.
+'''
+# ************************ End of Module Information  ************************
+
+# ************************ Importing Modules ************************
+
+import os
+import time
+import socket
+import threading
+from collections import deque
+from multiprocessing.managers import BaseManager
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue                               # python 2
+
+# ************************ End of Importing Modules ************************
+
+# ************************ Initialization ************************
+
+lease_timeout = 60                                      # Seconds without heartbeat after which the leases of a node are handed to other nodes
+heartbeat_interval = 10                                 # Seconds between two heartbeats of a node
+poll_interval = 1.0                                     # Seconds between two checks of the results by the coordinator
+
+# ********************* End of Initialization *********************
+
+# ********************* Functions *********************
+
+def Parse_Address(address):
+    # 'host:port' (host may be empty, to listen on every interface)
+    host, port = address.rsplit(':', 1)
+    return host, int(port)
+
+
+def Encode_Key(authkey):
+    if isinstance(authkey, bytes):
+        return authkey
+    return authkey.encode('utf-8')
+
+# ********************* End of Functions *********************
+
+# ********************* Classes *********************
+
+# --------------- Leasing tasks to the worker nodes ---------------
+
+class Lease_Table():
+    # Lives in the coordinator; its methods are called by the threads of the manager server, one per node connection
+
+    def __init__(self, settings, retries=1):
+        self.settings = settings                        # Settings every node must share with the coordinator (e.g. the feature backend)
+        self.retries = retries                          # Times a task is handed out again after it failed or its node vanished
+        self.lock = threading.Lock()
+        self.payloads = {}                              # Payload of every task which is not finished yet
+        self.attempts = {}                              # Failed attempts of every task
+        self.pending = deque()                          # Tasks waiting for a node
+        self.leases = {}                                # Node of every leased task
+        self.last_seen = {}                             # Last heartbeat of every node
+        self.results = queue.Queue()                    # (task id, result, reason) of finished tasks, for the coordinator
+        self.finished = False                           # Set when no task will be added anymore
+
+    def add(self, task_id, payload):
+        with self.lock:
+            self.payloads[task_id] = payload
+            self.attempts[task_id] = 0
+            self.pending.append(task_id)
+
+    def finish(self):
+        with self.lock:
+            self.finished = True
+
+    def get_settings(self):
+        return self.settings
+
+    def heartbeat(self, node):
+        with self.lock:
+            self.last_seen[node] = time.time()
+
+    def lease(self, node):
+        # (task id, payload), None when no task is waiting now, or 'done' when every task is finished
+        with self.lock:
+            self.last_seen[node] = time.time()
+            self.expire_leases()
+            if self.pending:
+                task_id = self.pending.popleft()
+                self.leases[task_id] = node
+                return task_id, self.payloads[task_id]
+            if self.finished and not self.leases:
+                return 'done'
+            return None
+
+    def read_app(self, task_id):
+        # Bytes of the app of a leased task, for nodes which cannot read its path
+        with open(self.payloads[task_id]['appfile'], 'rb') as apk_file:
+            return apk_file.read()
+
+    def complete(self, node, task_id, result):
+        with self.lock:
+            if self.leases.get(task_id) != node:
+                return False                            # The lease was handed to another node in the meantime
+            del self.leases[task_id]
+            del self.payloads[task_id]
+            self.results.put((task_id, result, None))
+            return True
+
+    def fail(self, node, task_id, reason):
+        with self.lock:
+            if self.leases.get(task_id) != node:
+                return False
+            del self.leases[task_id]
+            self.retry(task_id, reason)
+            return True
+
+    def retry(self, task_id, reason):
+        # Called with the lock held
+        if self.attempts[task_id] < self.retries:
+            self.attempts[task_id] += 1
+            self.pending.append(task_id)
+        else:
+            del self.payloads[task_id]
+            self.results.put((task_id, None, reason))
+
+    def expire_leases(self):
+        # Called with the lock held
+        now = time.time()
+        for task_id, node in list(self.leases.items()):
+            if now - self.last_seen.get(node, 0) > lease_timeout:
+                del self.leases[task_id]
+                self.retry(task_id, 'node %s stopped answering' %node)
+
+
+class Coordinator_Manager(BaseManager):
+    pass
+
+
+class Coordinator_Pool():
+    # Same interface as Supervised_Pool, for the coordinator: tasks are run by the worker nodes instead of local processes
+
+    def __init__(self, address, authkey, settings, payload, retries=1):
+        self.payload = payload                          # Turns a task into what is sent to the nodes (a dictionary with at least 'appfile')
+        self.table = Lease_Table(settings, retries)
+        Coordinator_Manager.register('get_table', callable=lambda: self.table)
+        manager = Coordinator_Manager(address=Parse_Address(address), authkey=Encode_Key(authkey))
+        self.server = manager.get_server()
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True                            # The server stops with the coordinator
+        thread.start()
+
+    def imap_unordered(self, tasks, failed=None):
+        # Yields the result of every task as the nodes return it, and failed(task, reason) for every task which failed every attempt
+        tasks = list(tasks)
+        for task_id, task in enumerate(tasks):
+            self.table.add(task_id, self.payload(task))
+        self.table.finish()
+        for _ in range(len(tasks)):
+            while True:
+                try:
+                    task_id, result, reason = self.table.results.get(timeout=poll_interval)
+                    break
+                except queue.Empty:
+                    with self.table.lock:
+                        self.table.expire_leases()      # Also when no node asks for tasks anymore
+            if reason is None:
+                yield result
+            elif failed is not None:
+                yield failed(tasks[task_id], reason)
+
+    def close(self):
+        self.table.finish()
+
+    def join(self):
+        # Nodes learn that every task is finished on their next lease
+        time.sleep(poll_interval)
+
+    def terminate(self):
+        pass
+
+# --------------- End of Leasing tasks to the worker nodes ---------------
+
+# --------------- Taking tasks from the coordinator ---------------
+
+class Coordinator_Client():
+
+    def __init__(self, address, authkey):
+        Coordinator_Manager.register('get_table')
+        self.manager = Coordinator_Manager(address=Parse_Address(address), authkey=Encode_Key(authkey))
+        self.manager.connect()
+        self.table = self.manager.get_table()
+        self.node = '%s:%d' %(socket.gethostname(), os.getpid())
+        self.stopped = threading.Event()
+
+    def start_heartbeat(self):
+        # From another thread, so that the leases stay alive while every process of the node is busy
+        thread = threading.Thread(target=self.heartbeat_loop)
+        thread.daemon = True
+        thread.start()
+
+    def heartbeat_loop(self):
+        table = self.manager.get_table()                # Proxies are not shared among threads
+        while not self.stopped.wait(heartbeat_interval):
+            try:
+                table.heartbeat(self.node)
+            except (EOFError, IOError, OSError):
+                return                                  # The coordinator is gone
+
+    def stop(self):
+        self.stopped.set()
+
+# --------------- End of Taking tasks from the coordinator ---------------
+
+# ********************* End of Classes *********************
@@ -0,0 +1,216 @@
+# ************************ General Information ************************
+'''
+VERSION:
+-------
+
+Version (by release date): 2019-11-25
+
+DEVELOPER INFORMATION:
+---------------------
+
+Name: Omid Mirzaei
+Laboratory: Computer Security Lab (COSEC)
+University: Universidad Carlos III de Madrid
+Website: https://cosec.inf.uc3m.es/~omid-mirzaei/
+
+PUBLICATION:
+-----------
+
+AndrODet: An Adaptive Android Obfuscation Detector
+O. Mirzaei, J. M. de Fuentes, J. E. Tapiador, L. Gonzalez-Manzano
+Future Generation Computer Systems, Elsevier (January 2019)
+
+COPYRIGHT NOTICE:
+----------------
+
+All rights reserved for the above developer and research center.
+Please, take a look at the "License.txt" file for more detailed information regarding the usage and distribution of these source codes.
+
+ACKNOWLEDGEMENT:
+---------------
+
+This work has been partially supported by the:
+MINECO grant TIN2016-79095-C2-2-R (SMOG-DEV);
+CAM grant S2013/ICE-3095 (CIBERDINE);
+co-funded with European FEDER funds;
+partially supported by the UC3M's grant Programa de Ayudas para la Movilidad.
+The authors would like to thank the Allatori technical team for its valuable assistance, and, also, the authors of the AMD and PraGuard datasets which made their repositories available to us.
+'''
+# ************************ End of General Information ************************
+
+# ************************ Module Information ************************
+'''
+MAIN FUNCTIONALITY:
+------------------
+
+This module keeps a manifest of the Android applications of a corpus: the path, size, modification time, SHA-256 digest, labels (IR, SE and CF) and processing status of every .apk file.
+The manifest is refreshed incrementally: the modification time of every directory is recorded, and only the directories which changed since the last refresh are listed again,
+so that new apps are found with one stat per directory instead of one per app. Apps rewritten in place (which does not change their directory) are only found by a full rescan.
+'''
+# ************************ End of Module Information  ************************
+
+# ************************ Importing Modules ************************
+
+import os
+import time
+import sqlite3
+from feature_extraction.Feature_Cache import APK_Digest
+
+# ************************ End of Importing Modules ************************
+
+# ************************ Initialization ************************
+
+db_timeout = 600                                        # Seconds to wait for another writer to finish
+settle_seconds = 10                                     # Apps modified more recently than this may still be copied, and are left for the next refresh
+
+# Processing status of an app
+New = 'new'                                             # New or changed, not processed yet
+Queued = 'queued'                                       # Handed to the extraction
+Done = 'done'                                           # Features extracted (and, when streaming, tested and learned)
+Quarantined = 'quarantined'                             # Extraction failed (see the quarantine file)
+
+# ********************* End of Initialization *********************
+
+# ********************* Functions *********************
+
+def Is_APK(filename):
+    return '.DS_Store' not in filename and '.apk' in filename
+
+
+def App_Labels(directory):
+    # Obfuscation classes (IR, SE, CF) of the apps of a directory, given by its path
+    return [int('/IR/YES' in directory), int('/SE/YES' in directory), int('/CF/YES' in directory)]
+
+# ********************* End of Functions *********************
+
+# ********************* Classes *********************
+
+# --------------- Keeping the manifest of a corpus ---------------
+
+class Corpus_Manifest():
+
+    def __init__(self, manifest_file):
+        self.manifest_file = manifest_file              # SQLite file of the manifest
+        connection = self.connect()
+        connection.execute('CREATE TABLE IF NOT EXISTS apps (path TEXT PRIMARY KEY, directory TEXT, size INTEGER, mtime REAL, digest TEXT, ' \
+                           'label_IR INTEGER, label_SE INTEGER, label_CF INTEGER, status TEXT, updated REAL)')
+        connection.execute('CREATE INDEX IF NOT EXISTS apps_directory ON apps (directory)')
+        connection.execute('CREATE TABLE IF NOT EXISTS directories (path TEXT PRIMARY KEY, parent TEXT, mtime REAL)')
+        connection.execute('CREATE INDEX IF NOT EXISTS directories_parent ON directories (parent)')
+        connection.commit()
+        connection.close()
+
+    def connect(self):
+        return sqlite3.connect(self.manifest_file, timeout=db_timeout)
+
+    def refresh(self, apps_dir, rescan=False, settle=0):
+        # Records the apps added, changed or removed under apps_dir; returns the number of new or changed apps.
+        # rescan lists every directory again; apps modified less than settle seconds ago are left for the next refresh.
+        connection = self.connect()
+        scanned = dict(connection.execute('SELECT path, mtime FROM directories'))
+        now = time.time()
+        num_changed = 0
+        directories = [(apps_dir, None)]
+        while directories:
+            directory, parent = directories.pop()
+            try:
+                mtime = os.stat(directory).st_mtime                             # Taken before listing, so that later changes are seen next time
+                filenames = None if not rescan and scanned.get(directory) == mtime else os.listdir(directory)
+            except OSError:
+                self.forget(connection, directory)                              # Removed in the meantime
+                continue
+            if filenames is None:
+                # --------------- Unchanged directory: same entries, only its subdirectories are visited ---------------
+                directories.extend(connection.execute('SELECT path, parent FROM directories WHERE parent = ?', (directory,)).fetchall())
+                continue
+            subdirectories = set()
+            apps = {}
+            settling = False
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                if os.path.isdir(path):
+                    if not os.path.islink(path):                                # As os.walk, symbolic links to directories are not followed
+                        subdirectories.add(path)
+                    continue
+                if not Is_APK(filename):
+                    continue
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                apps[path] = stat
+                if now - stat.st_mtime < settle:
+                    settling = True
+            # --------------- Forgetting what is gone ---------------
+            for (path,) in connection.execute('SELECT path FROM directories WHERE parent = ?', (directory,)).fetchall():
+                if path not in subdirectories:
+                    self.forget(connection, path)
+            for (path,) in connection.execute('SELECT path FROM apps WHERE directory = ?', (directory,)).fetchall():
+                if path not in apps:
+                    connection.execute('DELETE FROM apps WHERE path = ?', (path,))
+            # --------------- Recording what is new or changed ---------------
+            labels = App_Labels(directory)
+            for path, stat in sorted(apps.items()):
+                if now - stat.st_mtime < settle:
+                    continue
+                row = connection.execute('SELECT size, mtime, digest, status FROM apps WHERE path = ?', (path,)).fetchone()
+                if row is not None and row[:2] == (stat.st_size, stat.st_mtime):
+                    continue
+                try:
+                    digest = APK_Digest(path)
+                except (IOError, OSError):
+                    continue                                                    # Removed in the meantime
+                status = row[3] if row is not None and row[2] == digest else New   # Only touched, its features are the same
+                if status == New:
+                    num_changed += 1
+                connection.execute('INSERT OR REPLACE INTO apps VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', \
+                                   (path, directory, stat.st_size, stat.st_mtime, digest, labels[0], labels[1], labels[2], status, now))
+            connection.execute('INSERT OR REPLACE INTO directories VALUES (?, ?, ?)', (directory, parent, None if settling else mtime))     # Listed again while apps settle
+            directories.extend((path, directory) for path in sorted(subdirectories, reverse=True))
+        connection.commit()
+        connection.close()
+        return num_changed
+
+    def forget(self, connection, directory):
+        # Removes a directory, its subdirectories and their apps
+        prefix = os.path.join(directory, '')
+        for table, column in [('directories', 'path'), ('apps', 'directory')]:
+            connection.execute('DELETE FROM %s WHERE %s = ? OR substr(%s, 1, ?) = ?' %(table, column, column), (directory, len(prefix), prefix))
+
+    def apps(self, apps_dir, status=None):
+        # (path, digest, labels, status) of the apps under apps_dir, with the given status (any by default)
+        prefix = os.path.join(apps_dir, '')
+        query = 'SELECT path, digest, label_IR, label_SE, label_CF, status FROM apps WHERE substr(path, 1, ?) = ?'
+        parameters = (len(prefix), prefix)
+        if status is not None:
+            query += ' AND status = ?'
+            parameters += (status,)
+        connection = self.connect()
+        rows = connection.execute(query + ' ORDER BY path', parameters).fetchall()
+        connection.close()
+        return [(path, digest, [label_IR, label_SE, label_CF], app_status) for path, digest, label_IR, label_SE, label_CF, app_status in rows]
+
+    def set_status(self, paths, status):
+        connection = self.connect()
+        now = time.time()
+        connection.executemany('UPDATE apps SET status = ?, updated = ? WHERE path = ?', [(status, now, path) for path in paths])
+        connection.commit()
+        connection.close()
+
+    def reset_status(self, old_status, status):
+        # e.g. apps queued by a run which was interrupted are new again
+        connection = self.connect()
+        connection.execute('UPDATE apps SET status = ?, updated = ? WHERE status = ?', (status, time.time(), old_status))
+        connection.commit()
+        connection.close()
+
+    def digests(self, status, since=0):
+        # Digests of the apps which were given the status after the time since
+        connection = self.connect()
+        rows = connection.execute('SELECT DISTINCT digest FROM apps WHERE status = ? AND updated >= ?', (status, since)).fetchall()
+        connection.close()
+        return set(digest for (digest,) in rows)
+
+# --------------- End of Keeping the manifest of a corpus ---------------
+
+# ********************* End of Classes *********************
@@ -0,0 +1,403 @@
+# ************************ General Information ************************
+'''
+VERSION:
+-------
+
+Version (by release date): 2019-11-25
+
+DEVELOPER INFORMATION:
+---------------------
+
+Name: Omid Mirzaei
+Laboratory: Computer Security Lab (COSEC)
+University: Universidad Carlos III de Madrid
+Website: https://cosec.inf.uc3m.es/~omid-mirzaei/
+
+PUBLICATION:
+-----------
+
+AndrODet: An Adaptive Android Obfuscation Detector
+O. Mirzaei, J. M. de Fuentes, J. E. Tapiador, L. Gonzalez-Manzano
+Future Generation Computer Systems, Elsevier (January 2019)
+
+COPYRIGHT NOTICE:
+----------------
+
+All rights reserved for the above developer and research center.
+Please, take a look at the "License.txt" file for more detailed information regarding the usage and distribution of these source codes.
+
+ACKNOWLEDGEMENT:
+---------------
+
+This work has been partially supported by the:
+MINECO grant TIN2016-79095-C2-2-R (SMOG-DEV);
+CAM grant S2013/ICE-3095 (CIBERDINE);
+co-funded with European FEDER funds;
+partially supported by the UC3M's grant Programa de Ayudas para la Movilidad.
+The authors would like to thank the Allatori technical team for its valuable assistance, and, also, the authors of the AMD and PraGuard datasets which made their repositories available to us.
+'''
+# ************************ End of General Information ************************
+
+# ************************ Module Information ************************
+'''
+MAIN FUNCTIONALITY:
+------------------
+
+This module disassembles each Android application once and shares the disassembled code among the feature extractors (EFI, EFS and EFC).
+The .dex files of a multidex app may be disassembled by concurrent dexdump processes, each one parsed by parsers of its own which are merged in the order of the .dex files.
+androguard parses a stored (uncompressed) .dex member in place, through a read-only memory map of the .apk file, instead of a copy of it.
+androguard's lazy analysis only decodes the items of a .dex file the extractors look up (the identifiers do not need the code of the methods, for instance).
+'''
+# ************************ End of Module Information  ************************
+
+# ************************ Importing Modules ************************
+
+import os
+import re
+import sys
+import shutil
+import struct
+import zipfile
+import tempfile
+import itertools
+import threading
+import subprocess
+from feature_extraction import Instrumentation
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue                               # python 2
+
+# ************************ End of Importing Modules ************************
+
+# ************************ Initialization ************************
+
+dex_member_pattern = re.compile(r'^classes[0-9]*\.dex$')                    # Pattern of the .dex files loaded by Android (classes.dex, classes2.dex, ...)
+tmpfs_dir = '/dev/shm'                                                      # Memory-backed directory for the .dex files handed to dexdump
+zip_local_header = struct.Struct('<4s22xHH')                                # Signature, and file name and extra field lengths, of a zip local file header
+dexdump_chunk_lines = 4096                                                  # Lines of dexdump output read before they are parsed (the two are timed apart)
+
+# ********************* End of Initialization *********************
+
+# ********************* Functions *********************
+
+# --------------- Unzipping the .dex files of the Android application ---------------
+
+def Dex_Files_On_Disk(app, output_dir):
+    # ********************** Extracting App's Name **********************
+    app_name = app.split('/')[-1][:-4]
+    # ********************** End of Extracting App's Name **********************
+    # ********************** Removing Smali_Files and Unzipped_App folders if they already exist **********************
+    if app_name in os.listdir(output_dir):
+        shutil.rmtree(os.path.join(output_dir, app_name))
+    # ********************** End of Removing Smali_Files and Unzipped_App folders if they already exist **********************
+    # ********************** Unzipping the application (.apk file) **********************
+    os.mkdir(os.path.join(output_dir, app_name))
+    with Instrumentation.stage('unzip', app_name, apk_bytes=os.path.getsize(app)):
+        with zipfile.ZipFile(app,"r") as zip_ref:
+            zip_ref.extractall(os.path.join(output_dir, app_name))
+            dex_members = [member for member in zip_ref.namelist() if dex_member_pattern.match(member)]
+    # ********************** End of Unzipping the application (.apk file) **********************
+    # ********************** Finding the .dex files within the unzipped folder **********************
+    # Only the classes*.dex files at the root of the app (e.g. not assets/foo.dex or x.dex.bak), in the order of the .apk file, as in memory mode
+    for member in dex_members:
+        yield os.path.join(output_dir, app_name, member)
+    # ********************** End of Finding the .dex files within the unzipped folder **********************
+
+# --------------- End of Unzipping the .dex files of the Android application ---------------
+
+# --------------- Reading the .dex files of the Android application without unzipping it ---------------
+
+def Dex_Files_In_Memory(app, members=None):
+    # dexdump can only read a file, so each .dex member (or only the given ones) is copied to a memory-backed file (tmpfs) instead of unzipping the whole app
+    if os.path.isdir(tmpfs_dir):
+        tmp_dir = tmpfs_dir
+    else:
+        tmp_dir = None
+    app_name = app.split('/')[-1][:-4]
+    with zipfile.ZipFile(app,"r") as zip_ref:
+        for member in zip_ref.namelist():
+            if not dex_member_pattern.match(member) or (members is not None and member not in members):
+                continue
+            tmp_dex = tempfile.NamedTemporaryFile(suffix='.dex', prefix=app_name + '_', dir=tmp_dir)
+            try:
+                with Instrumentation.stage('unzip', app_name, member=member, dex_bytes=zip_ref.getinfo(member).file_size):
+                    dex_member = zip_ref.open(member)
+                    shutil.copyfileobj(dex_member, tmp_dex)
+                    dex_member.close()
+                    tmp_dex.flush()
+                yield tmp_dex.name
+            finally:
+                tmp_dex.close()                                             # The temporary .dex file is deleted on close
+
+# --------------- End of Reading the .dex files of the Android application without unzipping it ---------------
+
+# --------------- Disassembling a .dex file ---------------
+
+def DisAssemble_Dex_Lines(dexdump_dir, dex_path):
+    # The output of dexdump is read line by line from a pipe and never kept as a whole.
+    # Lines are yielded without their line break, exactly as str.split('\n') would cut the whole output (a trailing '' included).
+    # close_fds: a dexdump started by another thread must not keep this pipe open (python 2 does not close it otherwise)
+    process = subprocess.Popen([os.path.join(dexdump_dir,'dexdump'), '-d', dex_path], stdout=subprocess.PIPE, close_fds=True)
+    try:
+        ends_with_newline = True
+        for line in process.stdout:
+            if line[-1:] == '\n':
+                yield line[:-1]
+            else:
+                ends_with_newline = False
+                yield line
+        if ends_with_newline:
+            yield ''
+    finally:
+        process.stdout.close()
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+
+# --------------- End of Disassembling a .dex file ---------------
+
+# --------------- Running jobs on a bounded number of threads ---------------
+
+def Run_In_Threads(function, jobs, num_threads):
+    # function(job) for every job, on at most num_threads threads; the results come in the order of the jobs, and the first error is raised once every thread stopped
+    results = [None] * len(jobs)
+    errors = []
+    remaining = queue.Queue()
+    for idx, job in enumerate(jobs):
+        remaining.put((idx, job))
+    def run_jobs():
+        while not errors:
+            try:
+                idx, job = remaining.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                results[idx] = function(job)
+            except Exception as error:
+                errors.append(error)                                        # The other threads finish their job, and take no other
+    threads = [threading.Thread(target=run_jobs) for _ in range(min(num_threads, len(jobs)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return results
+
+# --------------- End of Running jobs on a bounded number of threads ---------------
+
+# --------------- Loading the .dex files of the Android application with androguard ---------------
+
+def Add_Androguard_Path(androguard_dir):
+    # androguard is imported from its directory, as it is not installed
+    if androguard_dir and os.path.abspath(androguard_dir) not in sys.path:
+        sys.path.insert(0, os.path.abspath(androguard_dir))
+
+
+def Stored_Member_Offset(app, zip_ref, member):
+    # Offset in the .apk file of the data of a stored (neither compressed nor encrypted) member, None for any other member
+    info = zip_ref.getinfo(member)
+    if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x1:
+        return None
+    with open(app, 'rb') as app_file:
+        app_file.seek(info.header_offset)
+        signature, name_length, extra_length = zip_local_header.unpack(app_file.read(zip_local_header.size))
+    if signature != b'PK\x03\x04':
+        return None
+    return info.header_offset + zip_local_header.size + name_length + extra_length
+
+
+def Load_Dalvik_VMs(app, androguard_dir, members=None):
+    # ********************** Importing androguard from its directory **********************
+    Add_Androguard_Path(androguard_dir)
+    from androguard.core import bytecode, androconf
+    from androguard.core.bytecodes import dvm
+    config = {"RECODE_ASCII_STRING": androconf.CONF["RECODE_ASCII_STRING"],
+              "RECODE_ASCII_STRING_METH": androconf.CONF["RECODE_ASCII_STRING_METH"],
+              "LAZY_ANALYSIS": True}                                                                      # Items are decoded when first looked up
+    # ********************** End of Importing androguard from its directory **********************
+    # ********************** Parsing each classes*.dex member (or only the given ones) straight from the .apk file **********************
+    dalvik_vms = []
+    with zipfile.ZipFile(app,"r") as zip_ref:
+        for member in zip_ref.namelist():
+            if dex_member_pattern.match(member) and (members is None or member in members):
+                with Instrumentation.stage('androguard_load', os.path.basename(app)[:-4], member=member, dex_bytes=zip_ref.getinfo(member).file_size):
+                    offset = Stored_Member_Offset(app, zip_ref, member)
+                    if offset is None:
+                        dex = zip_ref.read(member)                                                              # A compressed member is inflated
+                    else:
+                        dex = bytecode.MapFile(app, offset, zip_ref.getinfo(member).file_size)                 # A stored member is mapped, not copied
+                    dalvik_vms.append((member, dvm.DalvikVMFormat(dex, config=config)))
+
+    return dalvik_vms
+    # ********************** End of Parsing each classes*.dex member (or only the given ones) straight from the .apk file **********************
+
+# --------------- End of Loading the .dex files of the Android application with androguard ---------------
+
+# ********************* End of Functions *********************
+
+# ********************* Classes *********************
+
+# --------------- Sharing the disassembled application among extractors ---------------
+
+class Disassembly_Context():
+
+    def __init__(self, appfile, dexdump_dir, output_dir, extract_mode='disk', backend='dexdump', androguard_dir=None, members=None, dex_threads=1):
+        self.appfile = appfile                                              # Path of the .apk file
+        self.dexdump_dir = dexdump_dir                                      # Directory of dexdump
+        self.output_dir = output_dir                                        # Directory where the app is unzipped and disassembled
+        self.extract_mode = extract_mode                                    # 'disk': unzip the whole app, 'memory': read only the classes*.dex members
+        self.backend = backend                                              # 'dexdump': parse the disassembled code, 'native': read the DEX tables with androguard (IR and SE only)
+        self.androguard_dir = androguard_dir                                # Directory of androguard (needed by the native backend)
+        self.app_name = os.path.basename(appfile)[:-4]                      # Name of the app
+        self.parsers = {}                                                   # Line parsers fed with the disassembled code
+        self.streamed_parsers = set()                                       # Parsers which have already seen the whole disassembled code
+        self.stream_failed = False                                          # Whether disassembling the app failed
+        self.dalvik_vms = None                                              # Parsed .dex files, as (member, DalvikVMFormat) pairs (filled on first use)
+        self.members = members                                              # classes*.dex members to analyze (None: all of them)
+        self.cfg_stats = None                                               # Nodes, leafs and edges of the CFGs of the .dex files (filled on first use)
+        self.dex_threads = dex_threads                                      # .dex files disassembled and parsed at the same time
+
+    def register_parser(self, name, parser):
+        # Every parser registered before the first get_parser call is fed by the same dexdump run
+        self.parsers[name] = parser
+
+    def is_native(self, name):
+        # With the native backend, parsers which can read the DEX tables do so instead of parsing the disassembled code
+        return self.backend == 'native' and hasattr(self.parsers[name], 'parse_dalvik_vm')
+
+    def get_parser(self, name, parser_class):
+        if name not in self.parsers:
+            self.register_parser(name, parser_class())
+        if name not in self.streamed_parsers and self.is_native(name):
+            self.streamed_parsers.add(name)
+            self.get_dalvik_vms()
+            for member, vm in self.dalvik_vms:
+                with Instrumentation.stage('parse', self.app_name, member=member, parsers=[name]):
+                    self.parsers[name].parse_dalvik_vm(vm)
+        if name not in self.streamed_parsers:
+            self.stream_dex_outputs()
+        if self.stream_failed:
+            raise Exception('Disassembling app %s failed' %self.app_name)
+        return self.parsers[name]
+
+    def in_memory(self):
+        return self.extract_mode == 'memory' or self.members is not None     # Part of an app is never unzipped, as other processes may unzip the rest at the same time
+
+    def get_dex_files(self):
+        if self.in_memory():
+            return Dex_Files_In_Memory(self.appfile, self.members)
+        if not os.path.exists(self.output_dir):
+            os.mkdir(self.output_dir)
+        return Dex_Files_On_Disk(self.appfile, self.output_dir)
+
+    def get_dex_members(self):
+        with zipfile.ZipFile(self.appfile, "r") as zip_ref:
+            return [member for member in zip_ref.namelist() if dex_member_pattern.match(member) and (self.members is None or member in self.members)]
+
+    def stream_dex_outputs(self):
+        names = sorted(name for name in self.parsers if name not in self.streamed_parsers and not self.is_native(name))
+        parsers = [self.parsers[name] for name in names]
+        self.streamed_parsers.update(names)
+        try:
+            if self.dex_threads > 1:
+                self.stream_dex_outputs_in_threads(names, parsers)
+            else:
+                for dex_path in self.get_dex_files():
+                    self.parse_dex_output(dex_path, names, parsers)
+        except:
+            self.stream_failed = True
+            raise
+
+    def stream_dex_outputs_in_threads(self, names, parsers):
+        # Every .dex file is disassembled by a dexdump of its own and parsed by parsers of its own (in memory mode, copied out of the app by its thread).
+        # dexdump runs outside the interpreter, but the parsing threads share it, so parsing one .dex file overlaps with disassembling the others.
+        dex_sources = self.get_dex_members() if self.in_memory() else list(self.get_dex_files())
+        if len(dex_sources) < 2:
+            for dex_source in dex_sources:
+                self.parse_dex_source(dex_source, names, parsers)
+            return
+        dex_parsers = Run_In_Threads(lambda dex_source: self.parse_dex_part(dex_source, names, parsers), dex_sources, self.dex_threads)
+        for part_parsers in dex_parsers:
+            for parser, part_parser in zip(parsers, part_parsers):
+                parser.merge(part_parser)                                   # In the order of the .dex files, as if the parser had seen them one by one
+
+    def parse_dex_part(self, dex_source, names, parsers):
+        part_parsers = [parser.dex_parser() for parser in parsers]
+        self.parse_dex_source(dex_source, names, part_parsers)
+        return part_parsers
+
+    def parse_dex_source(self, dex_source, names, parsers):
+        # dex_source is the path of an unzipped .dex file, or a classes*.dex member of the app
+        if self.in_memory():
+            for dex_path in Dex_Files_In_Memory(self.appfile, [dex_source]):
+                self.parse_dex_output(dex_path, names, parsers)
+        else:
+            self.parse_dex_output(dex_source, names, parsers)
+
+    def parse_dex_output(self, dex_path, names, parsers):
+        # Reading the output of dexdump and parsing it take turns, chunk by chunk, and are recorded as the 'dexdump' and 'parse' stages
+        # (children_cpu of 'dexdump' is the time spent by dexdump itself; cpu is shared by the threads of the process)
+        with Instrumentation.Interleaved_Stages(self.app_name, dex_bytes=os.path.getsize(dex_path), parsers=names) as stages:
+            dex_lines = DisAssemble_Dex_Lines(self.dexdump_dir, dex_path)
+            num_lines = 0
+            try:
+                while True:
+                    with stages.turn('dexdump'):
+                        lines = list(itertools.islice(dex_lines, dexdump_chunk_lines))
+                    if not lines:
+                        break
+                    num_lines += len(lines)
+                    with stages.turn('parse'):
+                        for line in lines:
+                            for parser in parsers:
+                                parser.parse_line(line)
+            finally:
+                dex_lines.close()                                           # dexdump is killed if parsing failed
+            with stages.turn('parse'):
+                for parser in parsers:
+                    parser.finish_dex()
+            stages.sizes['lines'] = num_lines
+
+    def get_dalvik_vms(self):
+        # The .dex files are parsed by androguard only the first time an extractor asks for them
+        if self.dalvik_vms is None:
+            self.dalvik_vms = Load_Dalvik_VMs(self.appfile, self.androguard_dir, self.members)
+        return [vm for member, vm in self.dalvik_vms]
+
+    def iter_dalvik_vms(self):
+        # (member, DalvikVMFormat) of every .dex file; unless all of them were already parsed, they are parsed one at a time and not kept
+        if self.dalvik_vms is not None:
+            for member, vm in self.dalvik_vms:
+                yield member, vm
+            return
+        for member in self.get_dex_members():
+            for member_vm in Load_Dalvik_VMs(self.appfile, self.androguard_dir, [member]):
+                yield member_vm
+
+    def dex_part(self):
+        # What the analyzed .dex files contribute to the features of the app, to be merged in another process
+        return {'parsers' : self.parsers, 'cfg_stats' : self.cfg_stats}
+
+    def merge_dex_parts(self, dex_parts):
+        # The parts come in the order of the .dex files in the app, so the parsers end up as if they had seen the whole app
+        for name in dex_parts[0]['parsers']:
+            parser = dex_parts[0]['parsers'][name].__class__()
+            for dex_part in dex_parts:
+                parser.merge(dex_part['parsers'][name])
+            self.register_parser(name, parser)
+            self.streamed_parsers.add(name)
+        cfg_stats = [dex_part['cfg_stats'] for dex_part in dex_parts if dex_part['cfg_stats'] is not None]
+        if cfg_stats:
+            self.cfg_stats = tuple(sum(values) for values in zip(*cfg_stats))       # Each part measured the CFGs of its own .dex files
+
+    def cleanup(self):
+        if os.path.isdir(os.path.join(self.output_dir, self.app_name)):
+            shutil.rmtree(os.path.join(self.output_dir, self.app_name))
+        self.dalvik_vms = None
+
+# --------------- End of Sharing the disassembled application among extractors ---------------
+
+# ********************* End of Classes *********************
@@ -50,13 +50,10 @@ This module extracts features for control flow obfuscation detection.
 # ************************ Importing Modules ************************
 
 import os
-import shutil
-import zipfile
-import subprocess
 import re
-from tqdm import *
 import arff
-from networkxgmml import XGMMLReader                                                                                                                                                
+from feature_extraction.Disassembly import Disassembly_Context, Add_Androguard_Path
+from feature_extraction import Instrumentation
 
 # ************************ End of Importing Modules ************************
 
@@ -65,96 +62,70 @@ from networkxgmml import XGMMLReader
 Home_Dir = os.path.curdir                                               # Home directory
 goto_pattern_smali = re.compile(r'\bgoto\b')                            # Pattern of goto statements in smali format
 nop_pattern_smali = re.compile(r'\bnop\b')                              # Pattern of nop statements
+Extractor_Version = '2026-10-17'                                        # Version of the CF features (it keys the feature cache, so change it whenever the features change)
 
 # ********************* End of Initialization *********************
 
 # ********************* Functions *********************
 
-# --------------- Disassembling the Android application ---------------
-
-def DisAssemble_Dex(app, dexdump_dir, output_dir):
-    # ********************** Extracting App's Name **********************
-    app_name = app.split('/')[-1][:-4]
-    # ********************** End of Extracting App's Name **********************
-    # ********************** Removing Smali_Files and Unzipped_App folders if they already exist **********************
-    if app_name in os.listdir(output_dir):
-        shutil.rmtree(os.path.join(output_dir, app_name))
-    # ********************** End of Removing Smali_Files and Unzipped_App folders if they already exist **********************
-    # ********************** Unzipping the application (.apk file) **********************
-    os.mkdir(os.path.join(output_dir, app_name))
-    with zipfile.ZipFile(app,"r") as zip_ref:
-        zip_ref.extractall(os.path.join(output_dir, app_name))
-    # ********************** End of Unzipping the application (.apk file) **********************
-    # ********************** Disassembling the classes.dex file within the unzipped folder using dexdump **********************
-    dex_file_paths = []
-    for root, dirs, files in os.walk(os.path.join(output_dir, app_name)):
-        for file in files:
-            if '.dex' in file:
-                dex_file_paths.append(os.path.join(root, file))
-    dex_output_paths = []
-    for file_path in dex_file_paths:
-        dex_file_path, dex_file_name = os.path.split(file_path)
-        dex_file_name = dex_file_name.split('.')[0]
-        dex_file_path = os.path.join(dex_file_path, app_name + '_' + dex_file_name + '.txt')
-        dex_output_paths.append(dex_file_path)
-        output_file = open(dex_file_path, 'wb')
-        subprocess.call([os.path.join(dexdump_dir,'dexdump'), '-d', file_path], stdout=output_file)
-
-    return dex_output_paths
-    # ********************** End of Disassembling the classes.dex file within the unzipped folder **********************
-
-# --------------- End of Disassembling the Android application ---------------
-
 # --------------- Extracting control flow graph features ---------------
 
-def Extract_Features_CFGs(appfile, androguard_dir, output_dir):
+def Extract_Features_CFGs(appfile, androguard_dir, context):
+    # The control flow graphs of every classes*.dex file are measured in process by androguard, and summed over the .dex files
+    # (as the dexdump features are). A .dex file androguard fails on adds nothing.
     app_dir_name = os.path.basename(appfile)[:-4]
+    if context.cfg_stats is not None:
+        return context.cfg_stats                                        # Already measured, maybe by the processes which analyzed the .dex files
     num_nodes = 0
     num_leafs = 0
     num_edges = 0
     try:
-        subprocess.call(['python', os.path.join(androguard_dir, 'androxgmml.py'), '-i', appfile, '-o', os.path.join(output_dir, app_dir_name + '.xgmml')])
-        gxmml_file = open(os.path.join(output_dir, app_dir_name + '.xgmml'))
-        cf_graph = XGMMLReader(gxmml_file)
-        num_nodes = len(cf_graph.nodes())
-        for node in tqdm(cf_graph.nodes()):
-            if cf_graph.out_degree(node) == 0:
-                num_leafs += 1
-        num_edges = len(cf_graph.edges())
-    except:
+        Add_Androguard_Path(androguard_dir)
+        from androguard.core.analysis import analysis
+        for member, vm in context.iter_dalvik_vms():
+            try:
+                with Instrumentation.stage('CF_cfg', app_dir_name, member=member) as sizes:
+                    dex_nodes, dex_leafs, dex_edges = analysis.VMAnalysis(vm).get_cfg_stats()
+                    sizes['basic_blocks'] = dex_nodes
+            except Exception:
+                print('Androguard failed in analyzing %s of app %s' %(member, app_dir_name + '.apk'))
+                continue
+            num_nodes += dex_nodes
+            num_leafs += dex_leafs
+            num_edges += dex_edges
+    except Exception:
         print('Androguard failed in analyzing app %s' %(app_dir_name + '.apk'))
 
-    return num_nodes, num_leafs, num_edges
+    context.cfg_stats = (num_nodes, num_leafs, num_edges)
+    return context.cfg_stats
 
 # --------------- End of Extracting control flow graph features ---------------
 
 # --------------- Extracting features from code and control flow graph ---------------
 
-def extract_features(appfile, apps_dir, androguard_dir, dexdump_dir, output_dir):
+def extract_features(appfile, apps_dir, androguard_dir, dexdump_dir, output_dir, context=None):
     
     dirname,filename = os.path.split(appfile)
     all_features = []
-    num_goto = 0
-    num_nop = 0
-    lines_of_code = 0
+
+    own_context = context is None                                                           # The app is disassembled here unless the caller shares its disassembly
+    if own_context:
+        context = Disassembly_Context(appfile, dexdump_dir, output_dir, androguard_dir=androguard_dir)
 
     try:
         print('Extracting CFG features from %s:' %filename)
         # --------------- Extracting control flow graph features ---------------
-        num_nodes, num_leafs, num_edges = Extract_Features_CFGs(appfile, androguard_dir, output_dir)
+        num_nodes, num_leafs, num_edges = Extract_Features_CFGs(appfile, androguard_dir, context)
         # --------------- End of Extracting control flow graph features ---------------
         
         # --------------- Extracting code features ---------------
 
         print('Extracting code features from %s:' %filename)
         # ---------------------- Extracting features from Smali ----------------------
-        dex_file_paths = DisAssemble_Dex(appfile, dexdump_dir, output_dir)
-        for dex_path in dex_file_paths:
-            dex_file = open(dex_path, 'rb')                                                 # Opens the diassembled .dex file
-            lines = dex_file.read()                                                         # Reading all lines of the .dex file
-            num_goto += len(goto_pattern_smali.findall(lines))                              # Calculating the number of goto statements within the .dex file
-            num_nop += len(nop_pattern_smali.findall(lines))                                # Calculating the number of nop statements within the .dex file
-            lines_of_code += len(lines.split('\n'))                                         # Calculating the lines of code in .dex format
+        code = context.get_parser('CF', Code_Parser)                                        # Counting statements and lines while each .dex file is disassembled
+        num_goto = code.num_goto
+        num_nop = code.num_nop
+        lines_of_code = code.lines_of_code
         file_size = os.stat(appfile).st_size                                                # Calculating the filesize in bytes
         # ---------------------- End of Extracting features from Smali ----------------------
 
@@ -171,20 +142,18 @@ def extract_features(appfile, apps_dir, androguard_dir, dexdump_dir, output_dir)
         all_features.append(lines_of_code)
         all_features.append(file_size)
 
-    except:
+    except Exception:
         print('APK file \'%s\' was corrupted!' %filename)
     
-    if filename[:-4] + '.xgmml' in os.listdir(output_dir):
-        os.remove(os.path.join(output_dir, filename[:-4] + '.xgmml'))
-    if os.path.isdir(os.path.join(output_dir, filename[:-4])):
-        shutil.rmtree(os.path.join(output_dir, filename[:-4]))
+    if own_context:
+        context.cleanup()
     return all_features
 
 # --------------- End of Extracting features from code and control flow graph ---------------
 
 # --------------- Saving features to an arff file ---------------
 
-def save_features_to_arff(all_features, output_file):
+def arff_dataset(all_features):
 
     dataset = {}
     dataset['description'] = 'Android Apps Dataset'
@@ -204,9 +173,53 @@ def save_features_to_arff(all_features, output_file):
         for item in all_features:
             dataset['data'].append(item)
 
+    return dataset
+
+
+def arff_header():
+    # Header of the .arff file (everything up to @DATA), for streaming instances one by one
+    dataset = arff_dataset([[0] * len(arff_dataset([])['attributes'])])
+    header = arff.dumps(dataset)
+    return header[:header.index('@DATA')] + '@DATA\n'
+
+
+def save_features_to_arff(all_features, output_file):
+
+    dataset = arff_dataset(all_features)
     if dataset['data'] != []:
         arff.dump(dataset, output_file)
 
 # --------------- End of Saving features to an arff file ---------------
 
 # ********************* End of Functions *********************
+
+# ********************* Classes *********************
+
+# --------------- Extracting code features line by line ---------------
+
+class Code_Parser():
+
+    def __init__(self):
+        self.num_goto = 0                                                   # Number of goto statements
+        self.num_nop = 0                                                    # Number of nop statements
+        self.lines_of_code = 0                                              # Lines of code in .dex format
+
+    def parse_line(self, line):
+        self.num_goto += len(goto_pattern_smali.findall(line))              # Calculating the number of goto statements within the .dex file
+        self.num_nop += len(nop_pattern_smali.findall(line))                # Calculating the number of nop statements within the .dex file
+        self.lines_of_code += 1                                             # Lines are cut as str.split('\n') cuts the whole .dex file
+
+    def finish_dex(self):
+        pass
+
+    def dex_parser(self):
+        return Code_Parser()
+
+    def merge(self, other):
+        self.num_goto += other.num_goto
+        self.num_nop += other.num_nop
+        self.lines_of_code += other.lines_of_code
+
+# --------------- End of Extracting code features line by line ---------------
+
+# ********************* End of Classes *********************
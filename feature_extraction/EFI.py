@@ -50,13 +50,12 @@ This module extracts features for identifier renaming detection.
 # ************************ Importing Modules ************************
 
 import os
-import shutil
-import zipfile
-import subprocess
 import re
 import sys
-from tqdm import *
 import arff
+import numpy as np
+from feature_extraction.Disassembly import Disassembly_Context
+from feature_extraction import Instrumentation
 
 # ************************ End of Importing Modules ************************
 
@@ -66,87 +65,66 @@ Home_Dir = os.path.curdir
 classname_pattern = re.compile(r'\bClass descriptor  : .*\b')                                                                               # Pattern of classes
 methodname_pattern = re.compile(r"    #[0-9].*\n      name.*\n      type.*\n      access.*\n      code.*",re.MULTILINE)                     # Pattern of methods
 fieldname_pattern = re.compile(r"    #[0-9].*\n      name.*\n      type.*\n      access.*\n(?!      code.*)",re.MULTILINE)                  # Pattern of fields
+dexdump_field_lines = "    #%-14d : (in %s)\n      name          : '%s'\n      type          : '%s'\n"                                      # Lines dexdump prints for the idx-th static (or instance) field of a class
 Dict_Features = {}                                                                                                                          # Dictionary of extracted features
+max_matrix_cells = 1 << 22                                                                                                                  # Largest padded character matrix built at once when measuring ASCII distances
+Extractor_Version = '2026-10-17'                                                                                                            # Version of the IR features (it keys the feature cache, so change it whenever the features change)
 
 # ********************* End of Initialization *********************
 
 # ********************* Functions *********************
 
-# --------------- Disassembling the Android application ---------------
-
-def DisAssemble_Dex(app, dexdump_dir, output_dir):
-    # ********************** Extracting App's Name **********************
-    app_name = app.split('/')[-1][:-4]
-    # ********************** End of Extracting App's Name **********************
-    # ********************** Removing Smali_Files and Unzipped_App folders if they already exist **********************
-    if app_name in os.listdir(output_dir):
-        shutil.rmtree(os.path.join(output_dir, app_name))
-    # ********************** End of Removing Smali_Files and Unzipped_App folders if they already exist **********************
-    # ********************** Unzipping the application (.apk file) **********************
-    os.mkdir(os.path.join(output_dir, app_name))
-    with zipfile.ZipFile(app,"r") as zip_ref:
-        zip_ref.extractall(os.path.join(output_dir, app_name))
-    # ********************** End of Unzipping the application (.apk file) **********************
-    # ********************** Disassembling the classes.dex file within the unzipped folder using dexdump **********************
-    dex_file_paths = []
-    for root, dirs, files in os.walk(os.path.join(output_dir, app_name)):
-        for file in files:
-            if '.dex' in file:
-                dex_file_paths.append(os.path.join(root, file))
-    dex_output_paths = []
-    for file_path in dex_file_paths:
-        dex_file_path, dex_file_name = os.path.split(file_path)
-        dex_file_name = dex_file_name.split('.')[0]
-        dex_file_path = os.path.join(dex_file_path, app_name + '_' + dex_file_name + '.txt')
-        dex_output_paths.append(dex_file_path)
-        output_file = open(dex_file_path, 'wb')
-        subprocess.call([os.path.join(dexdump_dir,'dexdump'), '-d', file_path], stdout=output_file)
-
-    return dex_output_paths
-    # ********************** End of Disassembling the classes.dex file within the unzipped folder **********************
-
-# --------------- End of Disassembling the Android application ---------------
-
-# --------------- Extracting key identifiers ---------------
-
-def Extract_Identifiers(lines_dex_file):
+# --------------- Cutting the names out of the matched identifiers ---------------
+
+def Field_Name(f):
+    f = f.split(' ')
+    fld_name = f[37].rstrip()[1:-1]
+    return fld_name
+
+def Method_Name(m):
+    m = m.split(' ')
+    name_idx = m.index('name')
+    type_idx = m.index('type')
+    mtd_name = ''.join(m[name_idx + 1 : type_idx - 1])
+    mtd_name = mtd_name[2:-2]
+    return mtd_name
+
+def Class_Name(c):
+    class_name = c.split(':')[1][2:]
+    class_name = class_name.split('/')[-1]
+    return class_name
+
+# --------------- End of Cutting the names out of the matched identifiers ---------------
+
+# --------------- Extracting key identifiers from the DEX tables ---------------
+
+def Extract_Identifiers_Native(dalvik_vm):
     List_Fields = []
     List_Methods = []
     List_Classes = []
-    global fieldname_pattern, methodname_pattern, classname_pattern
-
-    all_fields = fieldname_pattern.findall(lines_dex_file)
-    num_fields = len(all_fields)
-    for fld in range(0,num_fields):
-        f = all_fields[fld]
-        f = f.split(' ')
-        fld_name = f[37].rstrip()[1:-1]
-        List_Fields.append(fld_name)
-
-    all_methods = methodname_pattern.findall(lines_dex_file)
-    num_methods = len(all_methods)
-    for mt in range(0,num_methods):
-        m = all_methods[mt]
-        m = m.split(' ')
-        name_idx = m.index('name')
-        type_idx = m.index('type')
-        access_idx = m.index('access')
-        mtd_name = ''.join(m[name_idx + 1 : type_idx - 1])
-        mtd_name = mtd_name[2:-2]
-        proto = ''.join(m[type_idx + 1 : access_idx - 1])
-        proto = proto[2:-2]
-        List_Methods.append(mtd_name)
-
-    all_classes = classname_pattern.findall(lines_dex_file)
-    num_classes = len(all_classes)
-    for cls in range(0,num_classes):
-        class_name = all_classes[cls].split(':')[1][2:]
-        class_name = class_name.split('/')[-1]
-        List_Classes.append(class_name)
+    global classname_pattern
+
+    # Fields and methods come in the same order as dexdump prints them (class by class, static/direct before instance/virtual).
+    # Field names are cut out of the lines dexdump prints for them, as Field_Name cuts them (from the 10th field of a list on, the name moves and comes out empty)
+    for cls in dalvik_vm.get_classes():
+        class_data = cls.get_class_data()
+        if class_data is None:
+            continue
+        for fields in [class_data.get_static_fields(), class_data.get_instance_fields()]:
+            for idx, fld in enumerate(fields):
+                List_Fields.append(Field_Name(dexdump_field_lines %(idx, cls.get_name(), fld.get_name(), fld.get_descriptor())))
+
+    for mtd in dalvik_vm.get_methods():
+        List_Methods.append(mtd.get_name())
+
+    # Class names go through the same pattern as the dexdump line, so odd descriptors are cut exactly as in Identifiers_Parser
+    for cls in dalvik_vm.get_classes():
+        for c in classname_pattern.findall("  Class descriptor  : '%s'\n" % cls.get_name()):
+            List_Classes.append(Class_Name(c))
 
     return List_Fields, List_Methods, List_Classes
 
-# --------------- End of Extracting key identifiers ---------------
+# --------------- End of Extracting key identifiers from the DEX tables ---------------
 
 # --------------- Calculating the ASCII distance ---------------
 
@@ -172,140 +150,109 @@ def ASCII_distance(string_1, string_2):
 
 # --------------- End of Calculating the ASCII distance ---------------
 
+# --------------- Calculating the features of all identifiers at once ---------------
+
+def Character_Codes(names):
+    # Codes of the characters of all names, one after the other (ord of each character, as in ASCII_distance)
+    try:
+        text = ''.join(names)
+    except UnicodeDecodeError:
+        text = u''.join(name.decode('latin-1') if isinstance(name, bytes) else name for name in names)
+    if isinstance(text, bytes):
+        return np.frombuffer(text, dtype=np.uint8).astype(np.int32)
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.int32)
+
+
+def ASCII_Distances(codes, lengths):
+    # ASCII_distance between every name and the next one. Names are packed into a matrix, one per row, padded with spaces,
+    # so the distance of a pair is the sum of absolute differences of two adjacent rows. Rows are packed in chunks to bound memory.
+    num_names = len(lengths)
+    distances = np.zeros(max(num_names - 1, 0), dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    first = 0
+    while first < num_names - 1:
+        last = min(num_names, first + max(2, max_matrix_cells // max(int(lengths[first]), 1)))
+        width = max(int(lengths[first:last].max()), 1)
+        if (last - first) * width > max_matrix_cells:
+            last = first + max(2, max_matrix_cells // width)          # A pair of rows is always packed, whatever its width
+            width = max(int(lengths[first:last].max()), 1)
+        rows = lengths[first:last]
+        matrix = np.full((last - first, width), ord(' '), dtype=np.int32)
+        row_idx = np.repeat(np.arange(last - first), rows)
+        col_idx = np.arange(int(rows.sum())) - np.repeat(offsets[first:last] - offsets[first], rows)
+        matrix[row_idx, col_idx] = codes[offsets[first]:offsets[last]]
+        distances[first:last - 1] = np.abs(np.diff(matrix, axis=0)).sum(axis=1)
+        first = last - 1
+    return distances
+
+
+def Identifier_Features(all_names):
+    # Sums of the features of each kind of identifier (fields, methods and classes), computed for all of them at once
+    num_kinds = len(all_names)
+    names = [name for kind_names in all_names for name in kind_names]
+    counts = np.array([len(kind_names) for kind_names in all_names], dtype=np.int64)
+    kinds = np.repeat(np.arange(num_kinds), counts)
+    lengths = np.fromiter(map(len, names), dtype=np.int64, count=len(names))
+    sizes = np.fromiter(map(sys.getsizeof, names), dtype=np.int64, count=len(names))
+    distances = ASCII_Distances(Character_Codes(names), lengths)
+    same_kind = kinds[:-1] == kinds[1:]                     # Pairs of names of different kinds are not compared
+    sum_wordsize = np.bincount(kinds, weights=sizes, minlength=num_kinds)
+    sum_distances = np.bincount(kinds[:-1][same_kind], weights=distances[same_kind], minlength=num_kinds)
+    sum_L1 = np.bincount(kinds[lengths == 1], minlength=num_kinds)
+    sum_L2 = np.bincount(kinds[lengths == 2], minlength=num_kinds)
+    sum_L3 = np.bincount(kinds[lengths == 3], minlength=num_kinds)
+    return [(int(counts[kind]), int(sum_wordsize[kind]), int(sum_distances[kind]), int(sum_L1[kind]), int(sum_L2[kind]), int(sum_L3[kind])) for kind in range(num_kinds)]
+
+# --------------- End of Calculating the features of all identifiers at once ---------------
+
 # --------------- Extracting features from key identifiers ---------------
 
-def extract_features(appfile, apps_dir, dexdump_dir, output_dir):
+def extract_features(appfile, apps_dir, dexdump_dir, output_dir, context=None):
 
     global Dict_Features
     dirname,filename = os.path.split(appfile)
     Dict_Features[filename] = []
     all_features = []
-    fields = set()
-    methods = set()
-    classes = set()
 
-    if not os.path.exists(output_dir):
-        os.mkdir(output_dir)
+    own_context = context is None                                                                                  # The app is disassembled here unless the caller shares its disassembly
+    if own_context:
+        context = Disassembly_Context(appfile, dexdump_dir, output_dir)
 
     try:
-        dex_file_paths = DisAssemble_Dex(appfile, dexdump_dir, output_dir)
-        for dex_path in dex_file_paths:
-            dex_file = open(dex_path, 'rb')                                                                        # Opens the diassembled .dex file
-            lines = dex_file.read()                                                                                # Reading all lines of the .dex file
-            current_fields, current_methods, current_classes = Extract_Identifiers(lines)                          # Extracting all the identifiers from the .dex file
-            fields = fields | set(current_fields)
-            methods = methods | set(current_methods)
-            classes = classes | set(current_classes)
-        fields = list(fields)
-        methods = list(methods)
-        classes = list(classes)
-        # ---------------------- Extracting fields' features ---------------------- 
-        sum_wordsize_flds = 0
-        sum_distances_flds = 0
-        sum_flds_L1 = 0
-        sum_flds_L2 = 0
-        sum_flds_L3 = 0
-        num_fields = len(fields)
-        print('Extracting fields\' features from %s:' %filename)
-        for idx in trange(0, num_fields):
-            sum_wordsize_flds += sys.getsizeof(fields[idx])
-            if idx < num_fields - 1:
-                sum_distances_flds += ASCII_distance(fields[idx], fields[idx + 1])
-            if len(fields[idx]) == 1:
-                sum_flds_L1 += 1
-            elif len(fields[idx]) == 2:
-                sum_flds_L2 += 1
-            elif len(fields[idx]) == 3:
-                sum_flds_L3 += 1
-        
-        avg_wordsize_flds = round(sum_wordsize_flds / float(num_fields), 4)
-        if num_fields > 1:
-            avg_distances_flds = round(sum_distances_flds / float(num_fields - 1), 4)
-        else:
-            avg_distances_flds = sum_distances_flds
-        # ---------------------- End of Extracting fields' features ---------------------- 
-
-        all_features.append(avg_wordsize_flds)
-        all_features.append(avg_distances_flds)
-        all_features.append(sum_flds_L1)
-        all_features.append(sum_flds_L2)
-        all_features.append(sum_flds_L3)
-
-        # ---------------------- Extracting methods' features ---------------------- 
-        sum_wordsize_mtds = 0
-        sum_distances_mtds = 0
-        sum_mtds_L1 = 0
-        sum_mtds_L2 = 0
-        sum_mtds_L3 = 0
-        num_methods = len(methods)
-        print('Extracting methods\' features from %s:' %filename)
-        for idx in trange(0, num_methods):
-            sum_wordsize_mtds += sys.getsizeof(methods[idx])
-            if idx < num_methods - 1:
-                sum_distances_mtds += ASCII_distance(methods[idx], methods[idx + 1])
-            if len(methods[idx]) == 1:
-                sum_mtds_L1 += 1
-            elif len(methods[idx]) == 2:
-                sum_mtds_L2 += 1
-            elif len(methods[idx]) == 3:
-                sum_mtds_L3 += 1
-
-        avg_wordsize_mtds = round(sum_wordsize_mtds / float(num_methods), 4)
-        if num_methods > 1:
-            avg_distances_mtds = round(sum_distances_mtds / float(num_methods - 1), 4)
-        else:
-            avg_distances_mtds = sum_distances_mtds
-        # ---------------------- End of Extracting methods' features ---------------------- 
-
-        all_features.append(avg_wordsize_mtds)
-        all_features.append(avg_distances_mtds)
-        all_features.append(sum_mtds_L1)
-        all_features.append(sum_mtds_L2)
-        all_features.append(sum_mtds_L3)
-
-        # ---------------------- Extracting classes' features ----------------------
-        sum_distances_cls = 0
-        sum_wordsize_cls = 0
-        sum_cls_L1 = 0
-        sum_cls_L2 = 0
-        sum_cls_L3 = 0
-        num_classes = len(classes)
-        print('Extracting classes\' features from %s:' %filename)
-        for idx in trange(0, num_classes):
-            sum_wordsize_cls += sys.getsizeof(classes[idx])
-            if idx < num_classes - 1:
-                sum_distances_cls += ASCII_distance(classes[idx], classes[idx + 1])
-            if len(classes[idx]) == 1:
-                sum_cls_L1 += 1
-            elif len(classes[idx]) == 2:
-                sum_cls_L2 += 1
-            elif len(classes[idx]) == 3:
-                sum_cls_L3 += 1
-
-        avg_wordsize_cls = round(sum_wordsize_cls / float(num_classes), 4)
-        if num_classes > 1:
-            avg_distances_cls = round(sum_distances_cls / float(num_classes - 1), 4)
-        else:
-            avg_distances_cls = sum_distances_cls
-        # ---------------------- End of Extracting classes' features ----------------------
-
-        all_features.append(avg_wordsize_cls)
-        all_features.append(avg_distances_cls)
-        all_features.append(sum_cls_L1)
-        all_features.append(sum_cls_L2)
-        all_features.append(sum_cls_L3)
-        
-    except:
+        identifiers = context.get_parser('IR', Identifiers_Parser)                                                   # Extracting all the identifiers while each .dex file is disassembled (or from its tables with the native backend)
+        fields = list(identifiers.fields)
+        methods = list(identifiers.methods)
+        classes = list(identifiers.classes)
+        print('Extracting identifiers\' features from %s:' %filename)
+        with Instrumentation.stage('IR_features', filename[:-4], fields=len(fields), methods=len(methods), classes=len(classes)):
+            identifier_features = Identifier_Features([fields, methods, classes])
+        for num_names, sum_wordsize, sum_distances, sum_L1, sum_L2, sum_L3 in identifier_features:
+            # ---------------------- Extracting the features of fields, methods and classes ----------------------
+            avg_wordsize = round(sum_wordsize / float(num_names), 4)
+            if num_names > 1:
+                avg_distances = round(sum_distances / float(num_names - 1), 4)
+            else:
+                avg_distances = sum_distances
+            # ---------------------- End of Extracting the features of fields, methods and classes ----------------------
+
+            all_features.append(avg_wordsize)
+            all_features.append(avg_distances)
+            all_features.append(sum_L1)
+            all_features.append(sum_L2)
+            all_features.append(sum_L3)
+
+    except Exception:
         print('APK file \'%s\' was corrupted!' %filename)
 
-    shutil.rmtree(os.path.join(output_dir, filename[:-4]))
+    if own_context:
+        context.cleanup()
     return all_features
 
 # --------------- End of Extracting features from key identifiers ---------------
 
 # --------------- Saving features to an arff file ---------------
 
-def save_features_to_arff(all_features, output_file):
+def arff_dataset(all_features):
 
     dataset = {}
     dataset['description'] = 'Android Apps Dataset'
@@ -333,6 +280,19 @@ def save_features_to_arff(all_features, output_file):
         for item in all_features:
             dataset['data'].append(item)
     
+    return dataset
+
+
+def arff_header():
+    # Header of the .arff file (everything up to @DATA), for streaming instances one by one
+    dataset = arff_dataset([[0] * len(arff_dataset([])['attributes'])])
+    header = arff.dumps(dataset)
+    return header[:header.index('@DATA')] + '@DATA\n'
+
+
+def save_features_to_arff(all_features, output_file):
+
+    dataset = arff_dataset(all_features)
     if dataset['data'] != []:
         arff.dump(dataset, output_file)
 
@@ -340,3 +300,93 @@ def save_features_to_arff(all_features, output_file):
 
 # ********************* End of Functions *********************
 
+# ********************* Classes *********************
+
+# --------------- Matching a multi-line pattern on a stream of lines ---------------
+
+class Pattern_Scanner():
+
+    def __init__(self, pattern, name_function, window_size=5):
+        self.pattern = pattern                          # Multi-line pattern of the identifier
+        self.name_function = name_function              # Cuts the name out of a match
+        self.window_size = window_size                  # Number of lines the pattern may span
+        self.window = []                                # Last lines, the first of which may still start a match
+        self.names = []                                 # Names matched so far
+
+    def parse_line(self, line):
+        self.window.append(line)
+        while len(self.window) >= self.window_size:
+            self.match_first_line()
+
+    def finish(self):
+        # Called at the end of the code, where the pattern may match fewer lines than the window size
+        while self.window:
+            self.match_first_line()
+        names = self.names
+        self.names = []
+        return names
+
+    def match_first_line(self):
+        # A match starting on the first line of the window is the one findall would return on the whole code,
+        # and the scan goes on right after it, so matches never overlap
+        if '    #' not in self.window[0]:
+            del self.window[0]
+            return
+        block = '\n'.join(self.window)
+        match = self.pattern.search(block)
+        if match is None or match.start() >= len(self.window[0]):
+            del self.window[0]
+            return
+        self.names.append(self.name_function(match.group(0)))
+        self.window = block[match.end():].split('\n')
+        if self.window == ['']:
+            self.window = []
+
+# --------------- End of Matching a multi-line pattern on a stream of lines ---------------
+
+# --------------- Extracting key identifiers line by line ---------------
+
+class Identifiers_Parser():
+
+    def __init__(self, keep_dex_lists=False):
+        self.fields = set()                                                     # Fields of all the .dex files
+        self.methods = set()                                                    # Methods of all the .dex files
+        self.classes = set()                                                    # Classes of all the .dex files
+        self.field_scanner = Pattern_Scanner(fieldname_pattern, Field_Name)
+        self.method_scanner = Pattern_Scanner(methodname_pattern, Method_Name)
+        self.dex_classes = []                                                   # Classes of the current .dex file
+        self.dex_lists = [] if keep_dex_lists else None                         # Identifiers of each .dex file, kept when the parser is merged into another one
+
+    def add_identifiers(self, current_fields, current_methods, current_classes):
+        if self.dex_lists is not None:
+            self.dex_lists.append((list(current_fields), list(current_methods), list(current_classes)))
+        self.fields = self.fields | set(current_fields)
+        self.methods = self.methods | set(current_methods)
+        self.classes = self.classes | set(current_classes)
+
+    def parse_line(self, line):
+        self.field_scanner.parse_line(line)
+        self.method_scanner.parse_line(line)
+        for c in classname_pattern.findall(line):
+            self.dex_classes.append(Class_Name(c))
+
+    def finish_dex(self):
+        self.add_identifiers(self.field_scanner.finish(), self.method_scanner.finish(), self.dex_classes)
+        self.dex_classes = []
+
+    def parse_dalvik_vm(self, dalvik_vm):
+        self.add_identifiers(*Extract_Identifiers_Native(dalvik_vm))           # Reading all the identifiers from the tables of the .dex file
+
+    def dex_parser(self):
+        # An empty parser for one .dex file, to be merged into this one
+        return Identifiers_Parser(keep_dex_lists=True)
+
+    def merge(self, other):
+        # The identifiers are added .dex file by .dex file, in the same order as if this parser had seen them
+        for current_fields, current_methods, current_classes in other.dex_lists:
+            self.add_identifiers(current_fields, current_methods, current_classes)
+
+# --------------- End of Extracting key identifiers line by line ---------------
+
+# ********************* End of Classes *********************
+
@@ -50,17 +50,12 @@ This module extracts features for string encryption detection.
 # ************************ Importing Modules ************************
 
 import os
-import shutil
-import zipfile
-import subprocess
 import re
-import entropy
 import sys
-from collections import Counter
-import math
-from tqdm import tqdm
 import numpy as np
 import arff
+from feature_extraction.Disassembly import Disassembly_Context
+from feature_extraction import Instrumentation
 
 # ************************ End of Importing Modules ************************
 
@@ -68,61 +63,15 @@ import arff
 
 Home_Dir = os.path.curdir                                       # Home directory
 string_pattern = re.compile(r'\bconst-string v.+, .+\b')        # Pattern of strings
+const_string_opcode = 0x1a                                      # Opcode of const-string (const-string/jumbo is not matched by string_pattern either)
 Dict_Features = {}                                              # Dictionary of extracted features
+max_histogram_bins = 1 << 22                                    # Largest (string, character) histogram built at once
+Extractor_Version = '2026-10-17'                                # Version of the SE features (it keys the feature cache, so change it whenever the features change)
 
 # ********************* End of Initialization *********************
 
 # ********************* Functions *********************
 
-# --------------- Disassembling the Android application ---------------
-
-def DisAssemble_Dex(app, dexdump_dir, output_dir):
-    # ********************** Extracting App's Name **********************
-    app_name = app.split('/')[-1][:-4]
-    # ********************** End of Extracting App's Name **********************
-    # ********************** Removing Smali_Files and Unzipped_App folders if they already exist **********************
-    if app_name in os.listdir(output_dir):
-        shutil.rmtree(os.path.join(output_dir, app_name))
-    # ********************** End of Removing Smali_Files and Unzipped_App folders if they already exist **********************
-    # ********************** Unzipping the application (.apk file) **********************
-    os.mkdir(os.path.join(output_dir, app_name))
-    with zipfile.ZipFile(app,"r") as zip_ref:
-        zip_ref.extractall(os.path.join(output_dir, app_name))
-    # ********************** End of Unzipping the application (.apk file) **********************
-    # ********************** Disassembling the classes.dex file within the unzipped folder using dexdump **********************
-    dex_file_paths = []
-    for root, dirs, files in os.walk(os.path.join(output_dir, app_name)):
-        for file in files:
-            if '.dex' in file:
-                dex_file_paths.append(os.path.join(root, file))
-    dex_output_paths = []
-    for file_path in dex_file_paths:
-        dex_file_path, dex_file_name = os.path.split(file_path)
-        dex_file_name = dex_file_name.split('.')[0]
-        dex_file_path = os.path.join(dex_file_path, app_name + '_' + dex_file_name + '.txt')
-        dex_output_paths.append(dex_file_path)
-        output_file = open(dex_file_path, 'wb')
-        subprocess.call([os.path.join(dexdump_dir,'dexdump'), '-d', file_path], stdout=output_file)
-
-    return dex_output_paths
-    # ********************** End of Disassembling the classes.dex file within the unzipped folder **********************
-
-# --------------- End of Disassembling the Android application ---------------
-
-# --------------- Calculating the entropy of string ---------------
-
-def Entropy(string):
-    chars_freq = Counter(string)
-    len_str = len(string)
-    sum = 0
-    for key in chars_freq.iterkeys():
-        sum = sum + ((float(chars_freq[key])/len_str) * math.log10(float(chars_freq[key])/len_str))
-
-    mag_entropy = -sum
-    return mag_entropy
-
-# --------------- End of Calculating the entropy of string ---------------
-
 # --------------- Extracting strings ---------------
 
 def extract_strings(lines_dex_file):
@@ -141,70 +90,118 @@ def extract_strings(lines_dex_file):
 
 # --------------- End of Extracting strings ---------------
 
+# --------------- Extracting strings from the DEX code ---------------
+
+def extract_strings_native(dalvik_vm):
+    List_Strings = []
+    global string_pattern
+
+    for mtd in dalvik_vm.get_methods():
+        for ins in mtd.get_instructions():
+            if ins.get_op_value() != const_string_opcode:
+                continue
+            # The string is laid out as dexdump prints it, so strings with quotes or line breaks are cut exactly as in extract_strings
+            dexdump_line = '|0000: const-string v%d, "%s" // string@%04x\n' % (ins.AA, ins.get_raw_string(), ins.BBBB)
+            for s in string_pattern.findall(dexdump_line):
+                s = s.split('\"')
+                List_Strings.append(s[1])
+
+    return List_Strings
+
+# --------------- End of Extracting strings from the DEX code ---------------
+
+# --------------- Calculating the features of all strings at once ---------------
+
+def String_Codes(strings):
+    # All strings concatenated into one buffer, as the codes of their characters (bytes for byte strings, code points otherwise)
+    try:
+        text = ''.join(strings)
+    except UnicodeDecodeError:
+        text = u''.join(strg.decode('latin-1') if isinstance(strg, bytes) else strg for strg in strings)
+    if isinstance(text, bytes):
+        return np.frombuffer(text, dtype=np.uint8).astype(np.int64)
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.int64)
+
+
+def Symbol_Counts(codes, lengths):
+    # Occurrences of each distinct symbol of each string, as (index of the string, number of occurrences) pairs.
+    # Symbols are counted with one bincount over (string, symbol) bins for a chunk of strings at a time.
+    if codes.size and codes.max() > 255:
+        symbols, codes = np.unique(codes, return_inverse=True)                  # Code points are renumbered densely
+    alphabet_size = int(codes.max()) + 1 if codes.size else 1
+    strings_per_chunk = max(1, max_histogram_bins // alphabet_size)
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    all_string_ids = []
+    all_counts = []
+    for first in range(0, len(lengths), strings_per_chunk):
+        last = min(len(lengths), first + strings_per_chunk)
+        string_ids = np.repeat(np.arange(last - first), lengths[first:last])
+        histogram = np.bincount(string_ids * alphabet_size + codes[offsets[first]:offsets[last]], minlength=(last - first) * alphabet_size)
+        bins = np.flatnonzero(histogram)
+        all_string_ids.append(first + bins // alphabet_size)
+        all_counts.append(histogram[bins])
+    if not all_counts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(all_string_ids), np.concatenate(all_counts)
+
+
+def Entropies_From_Counts(string_ids, counts, lengths):
+    # Shannon entropy of each string in bits per byte, normalized by 8 (the same as entropy.shannon_entropy), from the symbol counts of Symbol_Counts
+    probabilities = counts / lengths[string_ids].astype(float)
+    return np.bincount(string_ids, weights=-probabilities * np.log2(probabilities), minlength=len(lengths)) / 8
+
+
+def String_Features(strings):
+    # Averages of the 8 string features (entropy, wordsize, length, '=', '-', '/' and '+' counts, sum of the frequencies of repeated characters)
+    strings = list(strings)
+    num_strings = len(strings)
+    lengths = np.fromiter(map(len, strings), dtype=np.int64, count=num_strings)
+    codes = String_Codes(strings)
+    symbol_ids, symbol_counts = Symbol_Counts(codes, lengths)
+    if codes.size and codes.max() > 255:
+        # entropy.shannon_entropy reads the UTF-8 bytes of a text string, so only these strings are counted again
+        utf8_strings = [strg.encode('utf-8') for strg in strings]
+        utf8_lengths = np.fromiter(map(len, utf8_strings), dtype=np.int64, count=num_strings)
+        utf8_ids, utf8_counts = Symbol_Counts(String_Codes(utf8_strings), utf8_lengths)
+        entropies = Entropies_From_Counts(utf8_ids, utf8_counts, utf8_lengths)
+    else:
+        entropies = Entropies_From_Counts(symbol_ids, symbol_counts, lengths)
+
+    sums = [entropies.sum(),
+            float(sum(map(sys.getsizeof, strings))),
+            lengths.sum(),
+            np.count_nonzero(codes == ord('=')),
+            np.count_nonzero(codes == ord('-')),
+            np.count_nonzero(codes == ord('/')),
+            np.count_nonzero(codes == ord('+')),
+            symbol_counts[symbol_counts > 1].sum()]
+
+    return [float(total) / num_strings for total in sums]
+
+# --------------- End of Calculating the features of all strings at once ---------------
+
 # --------------- Extracting features from strings ---------------
 
-def extract_features(appfile, apps_dir, dexdump_dir, output_dir):
+def extract_features(appfile, apps_dir, dexdump_dir, output_dir, context=None):
 
     global Dict_Features
-    Dict_Strings = {}
     dirname,filename = os.path.split(appfile)
     Dict_Features[filename] = []
     all_features = []
-    strings = set()
 
-    if not os.path.exists(output_dir):
-        os.mkdir(output_dir)
+    own_context = context is None                                                                               # The app is disassembled here unless the caller shares its disassembly
+    if own_context:
+        context = Disassembly_Context(appfile, dexdump_dir, output_dir)
 
     try:
-        dex_file_paths = DisAssemble_Dex(appfile, dexdump_dir, output_dir)
-        for dex_path in dex_file_paths:
-            dex_file = open(dex_path, 'rb')                                                                     # Opens the diassembled .dex file
-            lines = dex_file.read()                                                                             # Reading all lines of the .dex file
-            current_strings = set(extract_strings(lines))                                                       # Extracting all the strings from the .dex file
-            strings = strings | current_strings
+        parser = context.get_parser('SE', Strings_Parser)                                                       # Extracting all the strings while each .dex file is disassembled (or from its code with the native backend)
+        strings = parser.strings
         # ---------------------- Extracting strings' features ---------------------- 
         print('Extracting strings\' features from %s:' %filename)
-        for strg in tqdm(strings):
-            Dict_Strings[strg] = []
-            strg_entropy = entropy.shannon_entropy(strg)                                                        # Calculates the shannon entropy of string
-            Dict_Strings[strg].append(strg_entropy)
-            Dict_Strings[strg].append(sys.getsizeof(strg))                                                      # Calculates the wordsize of string
-            Dict_Strings[strg].append(len(strg))                                                                # Calculates the length of string
-            freq_chars = Counter(strg)
-            Dict_Strings[strg].append(freq_chars['='])                                                          # Calculating the average number of equals in the string
-            Dict_Strings[strg].append(freq_chars['-'])                                                          # Calculating the average number of dashes in the string
-            Dict_Strings[strg].append(freq_chars['/'])                                                          # Calculating the average number of slashes in the string
-            Dict_Strings[strg].append(freq_chars['+'])                                                          # Calculating the average number of pluses in the string
-            Dict_Strings[strg].append(np.sum([freq_chars[i] for i in freq_chars.keys() if freq_chars[i] > 1]))  # Calculating the average sum of frequencies of characters (freq > 1) in the string
+        with Instrumentation.stage('SE_features', filename[:-4], strings=len(strings)):
+            avg_entropy_strings, avg_wordsize_strings, avg_length_strings, avg_equals, avg_dashes, avg_slashes, avg_pluses, avg_sum_freq_chars_h1 = String_Features(strings)
         # ---------------------- End of Extracting strings' features ---------------------- 
 
-        sum_entropy = 0
-        sum_wordsize = 0
-        sum_length = 0
-        sum_equals = 0
-        sum_dashes = 0
-        sum_slashes = 0
-        sum_pluses = 0
-        sum_freq_chars_h1 = 0
-        for key in Dict_Strings.keys():
-            sum_entropy += float(Dict_Strings[key][0])
-            sum_wordsize += float(Dict_Strings[key][1])
-            sum_length += float(Dict_Strings[key][2])
-            sum_equals += float(Dict_Strings[key][3])
-            sum_dashes += float(Dict_Strings[key][4])
-            sum_slashes += float(Dict_Strings[key][5])
-            sum_pluses += float(Dict_Strings[key][6])
-            sum_freq_chars_h1 += float(Dict_Strings[key][7])
-            
-        avg_entropy_strings = float(sum_entropy) / len(Dict_Strings)
-        avg_wordsize_strings = float(sum_wordsize) / len(Dict_Strings)
-        avg_length_strings = float(sum_length) / len(Dict_Strings)
-        avg_equals = float(sum_equals) / len(Dict_Strings)
-        avg_dashes = float(sum_dashes) / len(Dict_Strings)
-        avg_slashes = float(sum_slashes) / len(Dict_Strings)
-        avg_pluses = float(sum_pluses) / len(Dict_Strings)
-        avg_sum_freq_chars_h1 = float(sum_freq_chars_h1) / len(Dict_Strings)
-
         all_features.append(round(avg_entropy_strings, 4))
         all_features.append(round(avg_wordsize_strings, 4))
         all_features.append(round(avg_length_strings, 4))
@@ -214,17 +211,18 @@ def extract_features(appfile, apps_dir, dexdump_dir, output_dir):
         all_features.append(round(avg_pluses, 4))
         all_features.append(round(avg_sum_freq_chars_h1, 4))
 
-    except:
+    except Exception:
         print('APK file \'%s\' was corrupted!' %filename)
 
-    shutil.rmtree(os.path.join(output_dir,filename[:-4]))
+    if own_context:
+        context.cleanup()
     return all_features
 
 # --------------- End of Extracting features from strings ---------------
 
 # --------------- Saving features to an arff file ---------------
 
-def save_features_to_arff(all_features, output_file):
+def arff_dataset(all_features):
 
     dataset = {}
     dataset['description'] = 'Android Apps Dataset'
@@ -245,6 +243,19 @@ def save_features_to_arff(all_features, output_file):
         for item in all_features:
             dataset['data'].append(item)
 
+    return dataset
+
+
+def arff_header():
+    # Header of the .arff file (everything up to @DATA), for streaming instances one by one
+    dataset = arff_dataset([[0] * len(arff_dataset([])['attributes'])])
+    header = arff.dumps(dataset)
+    return header[:header.index('@DATA')] + '@DATA\n'
+
+
+def save_features_to_arff(all_features, output_file):
+
+    dataset = arff_dataset(all_features)
     if dataset['data'] != []:
         arff.dump(dataset, output_file)
 
@@ -252,3 +263,42 @@ def save_features_to_arff(all_features, output_file):
 
 # ********************* End of Functions *********************
 
+# ********************* Classes *********************
+
+# --------------- Extracting strings line by line ---------------
+
+class Strings_Parser():
+
+    def __init__(self, keep_dex_lists=False):
+        self.strings = set()                                    # Strings of all the .dex files
+        self.dex_strings = []                                   # Strings of the current .dex file
+        self.dex_lists = [] if keep_dex_lists else None         # Strings of each .dex file, kept when the parser is merged into another one
+
+    def add_strings(self, current_strings):
+        if self.dex_lists is not None:
+            self.dex_lists.append(list(current_strings))
+        self.strings = self.strings | set(current_strings)
+
+    def parse_line(self, line):
+        self.dex_strings.extend(extract_strings(line))          # string_pattern never spans two lines
+
+    def finish_dex(self):
+        self.add_strings(self.dex_strings)
+        self.dex_strings = []
+
+    def parse_dalvik_vm(self, dalvik_vm):
+        self.add_strings(extract_strings_native(dalvik_vm))    # Reading all the strings from the code of the .dex file
+
+    def dex_parser(self):
+        # An empty parser for one .dex file, to be merged into this one
+        return Strings_Parser(keep_dex_lists=True)
+
+    def merge(self, other):
+        # The strings are added .dex file by .dex file, in the same order as if this parser had seen them
+        for current_strings in other.dex_lists:
+            self.add_strings(current_strings)
+
+# --------------- End of Extracting strings line by line ---------------
+
+# ********************* End of Classes *********************
+
@@ -0,0 +1,114 @@
+# ************************ General Information ************************
+'''
+VERSION:
+-------
+
+Version (by release date): 2019-11-25
+
+DEVELOPER INFORMATION:
+---------------------
+
+Name: Omid Mirzaei
+Laboratory: Computer Security Lab (COSEC)
+University: Universidad Carlos III de Madrid
+Website: https://cosec.inf.uc3m.es/~omid-mirzaei/
+
+PUBLICATION:
+-----------
+
+AndrODet: An Adaptive Android Obfuscation Detector
+O. Mirzaei, J. M. de Fuentes, J. E. Tapiador, L. Gonzalez-Manzano
+Future Generation Computer Systems, Elsevier (January 2019)
+
+COPYRIGHT NOTICE:
+----------------
+
+All rights reserved for the above developer and research center.
+Please, take a look at the "License.txt" file for more detailed information regarding the usage and distribution of these source codes.
+
+ACKNOWLEDGEMENT:
+---------------
+
+This work has been partially supported by the:
+MINECO grant TIN2016-79095-C2-2-R (SMOG-DEV);
+CAM grant S2013/ICE-3095 (CIBERDINE);
+co-funded with European FEDER funds;
+partially supported by the UC3M's grant Programa de Ayudas para la Movilidad.
+The authors would like to thank the Allatori technical team for its valuable assistance, and, also, the authors of the AMD and PraGuard datasets which made their repositories available to us.
+'''
+# ************************ End of General Information ************************
+
+# ************************ Module Information ************************
+'''
+MAIN FUNCTIONALITY:
+------------------
+
+This module keeps the IR, SE and CF features of every analyzed Android application in a persistent cache, keyed by the SHA-256 digest of the .apk file and the version of the feature extractors.
+'''
+# ************************ End of Module Information  ************************
+
+# ************************ Importing Modules ************************
+
+import hashlib
+import json
+import sqlite3
+
+# ************************ End of Importing Modules ************************
+
+# ************************ Initialization ************************
+
+chunk_size = 1024 * 1024                                # Bytes read at a time when hashing an .apk file
+db_timeout = 600                                        # Seconds a worker waits for another worker's write to finish
+
+# ********************* End of Initialization *********************
+
+# ********************* Functions *********************
+
+# --------------- Hashing the Android application ---------------
+
+def APK_Digest(appfile):
+    sha256 = hashlib.sha256()
+    with open(appfile, 'rb') as apk_file:
+        for chunk in iter(lambda: apk_file.read(chunk_size), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+# --------------- End of Hashing the Android application ---------------
+
+# ********************* End of Functions *********************
+
+# ********************* Classes *********************
+
+# --------------- Caching features of Android applications ---------------
+
+class Feature_Cache():
+
+    def __init__(self, cache_file, version):
+        self.cache_file = cache_file                    # SQLite file of the cache
+        self.version = version                          # Version of the feature extractors (features of other versions are never returned)
+        connection = self.connect()
+        connection.execute('CREATE TABLE IF NOT EXISTS features (digest TEXT, version TEXT, features_IR TEXT, features_SE TEXT, features_CF TEXT, PRIMARY KEY (digest, version))')
+        connection.commit()
+        connection.close()
+
+    def connect(self):
+        # A new connection is opened on every call, so the cache can be handed to the worker processes
+        return sqlite3.connect(self.cache_file, timeout=db_timeout)
+
+    def get(self, digest):
+        connection = self.connect()
+        row = connection.execute('SELECT features_IR, features_SE, features_CF FROM features WHERE digest = ? AND version = ?', (digest, self.version)).fetchone()
+        connection.close()
+        if row is None:
+            return None
+        return [json.loads(features) for features in row]
+
+    def put(self, digest, features_IR, features_SE, features_CF):
+        connection = self.connect()
+        connection.execute('INSERT OR REPLACE INTO features VALUES (?, ?, ?, ?, ?)', (digest, self.version, json.dumps(features_IR), json.dumps(features_SE), json.dumps(features_CF)))
+        connection.commit()
+        connection.close()
+
+# --------------- End of Caching features of Android applications ---------------
+
+# ********************* End of Classes *********************
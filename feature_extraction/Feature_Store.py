@@ -0,0 +1,200 @@
+# ************************ General Information ************************
+'''
+VERSION:
+-------
+
+Version (by release date): 2019-11-25
+
+DEVELOPER INFORMATION:
+---------------------
+
+Name: Omid Mirzaei
+Laboratory: Computer Security Lab (COSEC)
+University: Universidad Carlos III de Madrid
+Website: https://cosec.inf.uc3m.es/~omid-mirzaei/
+
+PUBLICATION:
+-----------
+
+AndrODet: An Adaptive Android Obfuscation Detector
+O. Mirzaei, J. M. de Fuentes, J. E. Tapiador, L. Gonzalez-Manzano
+Future Generation Computer Systems, Elsevier (January 2019)
+
+COPYRIGHT NOTICE:
+----------------
+
+All rights reserved for the above developer and research center.
+Please, take a look at the "License.txt" file for more detailed information regarding the usage and distribution of these source codes.
+
+ACKNOWLEDGEMENT:
+---------------
+
+This work has been partially supported by the:
+MINECO grant TIN2016-79095-C2-2-R (SMOG-DEV);
+CAM grant S2013/ICE-3095 (CIBERDINE);
+co-funded with European FEDER funds;
+partially supported by the UC3M's grant Programa de Ayudas para la Movilidad.
+The authors would like to thank the Allatori technical team for its valuable assistance, and, also, the authors of the AMD and PraGuard datasets which made their repositories available to us.
+'''
+# ************************ End of General Information ************************
+
+# ************************ Module Information ************************
+'''
+MAIN FUNCTIONALITY:
+------------------
+
+This module keeps the IR, SE and CF feature matrices of the analyzed Android applications, with their labels and names, in an appendable binary columnar store.
+Every append writes a new chunk of .npy files (one matrix per module, the labels and the app names) and then the manifest, so earlier chunks are never rewritten.
+Chunks are read back as memory-mapped arrays, any app can be looked up by name, and the rows can be exported on demand to ARFF (for MOA) or CSV.
+'''
+# ************************ End of Module Information  ************************
+
+# ************************ Importing Modules ************************
+
+import os
+import json
+import numpy as np
+
+# ************************ End of Importing Modules ************************
+
+# ************************ Initialization ************************
+
+Modules = ['IR', 'SE', 'CF']                            # Feature matrices of the store, in the order of the label columns
+manifest_name = 'manifest.json'                         # Manifest of the store (its chunks and their number of rows)
+chunk_rows = 1000                                       # Rows streaming writers gather before they append a chunk
+store_version = 1                                       # Layout of the store
+
+# ********************* End of Initialization *********************
+
+# ********************* Functions *********************
+
+# --------------- Converting app names ---------------
+
+def Encode_Name(name):
+    # App names are stored as UTF-8 bytes (they already are in python 2)
+    if isinstance(name, bytes):
+        return name
+    return name.encode('utf-8')
+
+
+def Decode_Name(name):
+    # Back to the native str of the running python
+    if isinstance(name, str):
+        return name
+    return name.decode('utf-8')
+
+# --------------- End of Converting app names ---------------
+
+# --------------- Writing rows as text ---------------
+
+def Format_Row(features, label):
+    # Values are written with repr so that no precision is lost, and labels as the integers AndrODet uses
+    return ','.join(repr(float(value)) for value in features) + ',%d' %label
+
+# --------------- End of Writing rows as text ---------------
+
+# ********************* End of Functions *********************
+
+# ********************* Classes *********************
+
+# --------------- Storing feature matrices in chunks ---------------
+
+class Feature_Store():
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir                      # Directory of the chunks and the manifest
+        if not os.path.isdir(store_dir):
+            os.makedirs(store_dir)
+        self.manifest = {'version' : store_version, 'chunks' : [], 'num_rows' : 0}
+        if os.path.exists(os.path.join(store_dir, manifest_name)):
+            with open(os.path.join(store_dir, manifest_name), 'r') as manifest_file:
+                self.manifest = json.load(manifest_file)
+        self.app_index = None                           # Chunk and row of every app (built on first lookup)
+
+    def chunk_path(self, chunk, column):
+        return os.path.join(self.store_dir, '%s_%s.npy' %(chunk['name'], column))
+
+    def save_array(self, path, array):
+        with open(path + '.tmp', 'wb') as array_file:
+            np.save(array_file, array)
+        os.rename(path + '.tmp', path)
+
+    def append(self, app_names, features_IR, features_SE, features_CF, labels):
+        # Rows of features without their class; labels is one (IR, SE, CF) triple per app
+        if not app_names:
+            return None
+        chunk = {'name' : 'chunk_%06d' %len(self.manifest['chunks']), 'rows' : len(app_names)}
+        for module, features in zip(Modules, [features_IR, features_SE, features_CF]):
+            self.save_array(self.chunk_path(chunk, module), np.array(features, dtype=np.float64))
+        self.save_array(self.chunk_path(chunk, 'labels'), np.array(labels, dtype=np.int8))
+        self.save_array(self.chunk_path(chunk, 'apps'), np.array([Encode_Name(name) for name in app_names]))
+        # ********************** Publishing the chunk (readers only see chunks listed in the manifest) **********************
+        self.manifest['chunks'].append(chunk)
+        self.manifest['num_rows'] += chunk['rows']
+        manifest_path = os.path.join(self.store_dir, manifest_name)
+        with open(manifest_path + '.tmp', 'w') as manifest_file:
+            json.dump(self.manifest, manifest_file, indent=1, sort_keys=True)
+        os.rename(manifest_path + '.tmp', manifest_path)
+        # ********************** End of Publishing the chunk **********************
+        if self.app_index is not None:
+            for row, name in enumerate(app_names):
+                self.app_index[name] = (len(self.manifest['chunks']) - 1, row)
+        return len(self.manifest['chunks']) - 1
+
+    def num_chunks(self):
+        return len(self.manifest['chunks'])
+
+    def load(self, chunk_idx, column):
+        # Memory-mapped, so that only the rows which are read are loaded
+        return np.load(self.chunk_path(self.manifest['chunks'][chunk_idx], column), mmap_mode='r')
+
+    def app_names(self, chunk_idx):
+        return [Decode_Name(name) for name in self.load(chunk_idx, 'apps')]
+
+    def matrix(self, module, chunks=None):
+        # Features of a module (or the labels) of all the chunks (or of the given ones), as one array
+        if chunks is None:
+            chunks = range(self.num_chunks())
+        arrays = [self.load(chunk_idx, module) for chunk_idx in chunks]
+        if not arrays:
+            return np.zeros((0, 3) if module == 'labels' else (0, 0))
+        return np.concatenate(arrays)
+
+    def get(self, app_name):
+        # Features and labels of an app (its last appended row), or None
+        if self.app_index is None:
+            self.app_index = {}
+            for chunk_idx in range(self.num_chunks()):
+                for row, name in enumerate(self.app_names(chunk_idx)):
+                    self.app_index[name] = (chunk_idx, row)
+        if app_name not in self.app_index:
+            return None
+        chunk_idx, row = self.app_index[app_name]
+        return dict((column, np.array(self.load(chunk_idx, column)[row])) for column in Modules + ['labels'])
+
+    def export_arff(self, module, output_file, arff_header, chunks=None):
+        # arff_header is the header of the module (EFI, EFS or EFC.arff_header), rows are written chunk by chunk
+        output_file.write(arff_header)
+        self.export_rows(module, output_file, chunks)
+
+    def export_csv(self, module, output_file, columns, chunks=None):
+        output_file.write(','.join(['app'] + list(columns)) + '\n')
+        self.export_rows(module, output_file, chunks, with_names=True)
+
+    def export_rows(self, module, output_file, chunks=None, with_names=False):
+        if chunks is None:
+            chunks = range(self.num_chunks())
+        label_col = Modules.index(module)
+        for chunk_idx in chunks:
+            features = self.load(chunk_idx, module)
+            labels = self.load(chunk_idx, 'labels')[:, label_col]
+            names = self.app_names(chunk_idx) if with_names else None
+            for row in range(len(features)):
+                line = Format_Row(features[row], labels[row])
+                if with_names:
+                    line = '"%s",%s' %(names[row].replace('"', '""'), line)
+                output_file.write(line + '\n')
+
+# --------------- End of Storing feature matrices in chunks ---------------
+
+# ********************* End of Classes *********************
@@ -0,0 +1,232 @@
+# ************************ General Information ************************
+'''
+VERSION:
+-------
+
+Version (by release date): 2019-11-25
+
+DEVELOPER INFORMATION:
+---------------------
+
+Name: Omid Mirzaei
+Laboratory: Computer Security Lab (COSEC)
+University: Universidad Carlos III de Madrid
+Website: https://cosec.inf.uc3m.es/~omid-mirzaei/
+
+PUBLICATION:
+-----------
+
+AndrODet: An Adaptive Android Obfuscation Detector
+O. Mirzaei, J. M. de Fuentes, J. E. Tapiador, L. Gonzalez-Manzano
+Future Generation Computer Systems, Elsevier (January 2019)
+
+COPYRIGHT NOTICE:
+----------------
+
+All rights reserved for the above developer and research center.
+Please, take a look at the "License.txt" file for more detailed information regarding the usage and distribution of these source codes.
+
+ACKNOWLEDGEMENT:
+---------------
+
+This work has been partially supported by the:
+MINECO grant TIN2016-79095-C2-2-R (SMOG-DEV);
+CAM grant S2013/ICE-3095 (CIBERDINE);
+co-funded with European FEDER funds;
+partially supported by the UC3M's grant Programa de Ayudas para la Movilidad.
+The authors would like to thank the Allatori technical team for its valuable assistance, and, also, the authors of the AMD and PraGuard datasets which made their repositories available to us.
+'''
+# ************************ End of General Information ************************
+
+# ************************ Module Information ************************
+'''
+MAIN FUNCTIONALITY:
+------------------
+
+This module records how long each stage of the analysis of each app takes (unzipping, dexdump, parsing, feature calculation, CFG analysis, writing ARFF files and testing with MOA).
+For every stage, the wall time, the CPU time (of the process itself and of its finished child processes, e.g. dexdump), the peak RSS so far and the sizes of its input are appended to a JSON lines file.
+Records are appended with a single write, so every process of the pool can share the same file. A summary of the file is printed at the end of a run.
+Stages which take turns (reading the output of dexdump and parsing it, chunk by chunk) are timed turn by turn, and each of them is recorded once with its summed times.
+'''
+# ************************ End of Module Information  ************************
+
+# ************************ Importing Modules ************************
+
+import os
+import json
+import time
+import resource
+from contextlib import contextmanager
+
+# ************************ End of Importing Modules ************************
+
+# ************************ Initialization ************************
+
+log_file = None                                         # JSON lines file of the stage records (None: nothing is recorded)
+run_start = 0.0                                         # Start time of the current run (earlier records of the same file are not summarized)
+num_slowest = 10                                        # Number of slowest stages listed in the summary
+
+# ********************* End of Initialization *********************
+
+# ********************* Functions *********************
+
+# --------------- Recording stages ---------------
+
+def configure(timing_log):
+    # Called before the pool of processes is created, so that every process records into the same file
+    global log_file, run_start
+    log_file = timing_log
+    run_start = time.time()
+
+
+def CPU_Time(usage):
+    return usage.ru_utime + usage.ru_stime
+
+
+def Write_Record(record):
+    line = (json.dumps(record, sort_keys=True) + '\n').encode('utf-8')
+    fd = os.open(log_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def stage(name, app=None, **sizes):
+    # Records one stage; the caller may add input sizes to the yielded dictionary while the stage runs
+    if log_file is None:
+        yield sizes
+        return
+    record = {'stage' : name, 'app' : app, 'pid' : os.getpid(), 'status' : 'ok'}
+    start_wall = time.time()
+    start_self = resource.getrusage(resource.RUSAGE_SELF)
+    start_children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    try:
+        yield sizes
+    except BaseException as error:
+        record['status'] = 'error'
+        record['error'] = '%s: %s' %(type(error).__name__, error)
+        raise
+    finally:
+        end_self = resource.getrusage(resource.RUSAGE_SELF)
+        end_children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        record['wall'] = round(time.time() - start_wall, 6)                                  # Seconds
+        record['cpu'] = round(CPU_Time(end_self) - CPU_Time(start_self), 6)                  # Seconds spent by this process
+        record['children_cpu'] = round(CPU_Time(end_children) - CPU_Time(start_children), 6) # Seconds spent by child processes which finished during the stage
+        record['peak_rss_kb'] = end_self.ru_maxrss                                           # Peak RSS of this process so far
+        record['children_peak_rss_kb'] = end_children.ru_maxrss                              # Largest peak RSS of its finished child processes
+        record['sizes'] = sizes
+        record['time'] = round(start_wall, 3)
+        Write_Record(record)
+
+# --------------- End of Recording stages ---------------
+
+# --------------- Summarizing the records ---------------
+
+def Read_Records(timing_log, since=0.0):
+    records = []
+    with open(timing_log, 'r') as records_file:
+        for line in records_file:
+            if line.strip():
+                record = json.loads(line)
+                if record['time'] >= since:
+                    records.append(record)
+    return records
+
+
+def summarize(records):
+    # Totals per stage, in the order in which stages first appear
+    summary = {}
+    order = []
+    for record in records:
+        name = record['stage']
+        if name not in summary:
+            order.append(name)
+            summary[name] = {'stage' : name, 'count' : 0, 'errors' : 0, 'wall' : 0.0, 'max_wall' : 0.0, 'max_wall_app' : None, \
+                             'cpu' : 0.0, 'children_cpu' : 0.0, 'peak_rss_kb' : 0}
+        totals = summary[name]
+        totals['count'] += 1
+        totals['errors'] += record['status'] != 'ok'
+        totals['wall'] += record['wall']
+        totals['cpu'] += record['cpu']
+        totals['children_cpu'] += record['children_cpu']
+        totals['peak_rss_kb'] = max(totals['peak_rss_kb'], record['peak_rss_kb'], record['children_peak_rss_kb'])
+        if record['wall'] >= totals['max_wall']:
+            totals['max_wall'] = record['wall']
+            totals['max_wall_app'] = record['app']
+    return [summary[name] for name in order]
+
+
+def print_summary(timing_log):
+    records = Read_Records(timing_log, run_start - 0.001)                # Record times are rounded to milliseconds
+    print('Stage timings (%s):' %timing_log)
+    print('%-16s %7s %6s %11s %10s %11s %11s %13s  %s' %('stage', 'count', 'errors', 'wall (s)', 'mean (s)', 'cpu (s)', 'child cpu', 'peak RSS (MB)', 'slowest app'))
+    for totals in summarize(records):
+        print('%-16s %7d %6d %11.3f %10.4f %11.3f %11.3f %13.1f  %s (%.3f s)' %(totals['stage'], totals['count'], totals['errors'], totals['wall'], \
+              totals['wall'] / totals['count'], totals['cpu'], totals['children_cpu'], totals['peak_rss_kb'] / 1024.0, totals['max_wall_app'], totals['max_wall']))
+    print('Slowest stages:')
+    for record in sorted(records, key=lambda record: record['wall'], reverse=True)[:num_slowest]:
+        print('  %.3f s  %-16s %s %s' %(record['wall'], record['stage'], record['app'], json.dumps(record['sizes'], sort_keys=True)))
+
+# --------------- End of Summarizing the records ---------------
+
+# ********************* End of Functions *********************
+
+# ********************* Classes *********************
+
+# --------------- Recording stages which take turns ---------------
+
+class Interleaved_Stages():
+
+    def __init__(self, app=None, **sizes):
+        self.app = app                                  # Name of the app
+        self.sizes = sizes                              # Input sizes, shared by the records of the stages (the caller may add to them)
+        self.records = {}                               # Record of each stage, summed over its turns
+        self.order = []                                 # Stages, in the order of their first turn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if log_file is None:
+            return False
+        for name in self.order:
+            record = self.records[name]
+            for key in ['wall', 'cpu', 'children_cpu']:
+                record[key] = round(record[key], 6)
+            record['sizes'] = self.sizes
+            Write_Record(record)
+        return False
+
+    @contextmanager
+    def turn(self, name):
+        if log_file is None:
+            yield
+            return
+        start_wall = time.time()
+        start_self = resource.getrusage(resource.RUSAGE_SELF)
+        start_children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        if name not in self.records:
+            self.order.append(name)
+            self.records[name] = {'stage' : name, 'app' : self.app, 'pid' : os.getpid(), 'status' : 'ok', 'wall' : 0.0, 'cpu' : 0.0, 'children_cpu' : 0.0, \
+                                  'time' : round(start_wall, 3)}
+        record = self.records[name]
+        try:
+            yield
+        except BaseException as error:
+            record['status'] = 'error'
+            record['error'] = '%s: %s' %(type(error).__name__, error)
+            raise
+        finally:
+            end_self = resource.getrusage(resource.RUSAGE_SELF)
+            end_children = resource.getrusage(resource.RUSAGE_CHILDREN)
+            record['wall'] += time.time() - start_wall
+            record['cpu'] += CPU_Time(end_self) - CPU_Time(start_self)
+            record['children_cpu'] += CPU_Time(end_children) - CPU_Time(start_children)
+            record['peak_rss_kb'] = end_self.ru_maxrss
+            record['children_peak_rss_kb'] = end_children.ru_maxrss
+
+# --------------- End of Recording stages which take turns ---------------
+
+# ********************* End of Classes *********************
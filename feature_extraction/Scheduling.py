@@ -0,0 +1,160 @@
+# ************************ General Information ************************
+'''
+VERSION:
+-------
+
+Version (by release date): 2019-11-25
+
+DEVELOPER INFORMATION:
+---------------------
+
+Name: Omid Mirzaei
+Laboratory: Computer Security Lab (COSEC)
+University: Universidad Carlos III de Madrid
+Website: https://cosec.inf.uc3m.es/~omid-mirzaei/
+
+PUBLICATION:
+-----------
+
+AndrODet: An Adaptive Android Obfuscation Detector
+O. Mirzaei, J. M. de Fuentes, J. E. Tapiador, L. Gonzalez-Manzano
+Future Generation Computer Systems, Elsevier (January 2019)
+
+COPYRIGHT NOTICE:
+----------------
+
+All rights reserved for the above developer and research center.
+Please, take a look at the "License.txt" file for more detailed information regarding the usage and distribution of these source codes.
+
+ACKNOWLEDGEMENT:
+---------------
+
+This work has been partially supported by the:
+MINECO grant TIN2016-79095-C2-2-R (SMOG-DEV);
+CAM grant S2013/ICE-3095 (CIBERDINE);
+co-funded with European FEDER funds;
+partially supported by the UC3M's grant Programa de Ayudas para la Movilidad.
+The authors would like to thank the Allatori technical team for its valuable assistance, and, also, the authors of the AMD and PraGuard datasets which made their repositories available to us.
+'''
+# ************************ End of General Information ************************
+
+# ************************ Module Information ************************
+'''
+MAIN FUNCTIONALITY:
+------------------
+
+This module schedules the Android applications on the pool of extraction processes.
+The cost of every app is estimated from cheap signals read from the central directory of the .apk file (its size and the uncompressed size of each classes*.dex file),
+apps are dispatched longest first, large multidex apps are split so that their .dex files run on different processes,
+and the number of processes is adapted to the available cores and memory.
+'''
+# ************************ End of Module Information  ************************
+
+# ************************ Importing Modules ************************
+
+import os
+import zipfile
+import multiprocessing
+from feature_extraction.Disassembly import dex_member_pattern
+
+# ************************ End of Importing Modules ************************
+
+# ************************ Initialization ************************
+
+cfg_cost_weight = 3                                     # Cost of a byte of .dex file, as androguard also builds the CFGs of every .dex file
+apk_cost_weight = 0.1                                   # Cost of each byte of the .apk file (reading and unzipping it), relative to a byte of .dex file
+base_rss_bytes = 48 << 20                               # RSS of an extraction process before it takes an app
+rss_per_dex_byte = 250                                  # RSS per byte of .dex file parsed by androguard (100 to 250 on the synthetic apps of benchmarks/)
+min_split_dex_bytes = 4 << 20                           # Multidex apps with fewer .dex bytes than this are not split (each part reads the .apk file again)
+
+# ********************* End of Initialization *********************
+
+# ********************* Functions *********************
+
+# --------------- Estimating the cost of each app ---------------
+
+def Dex_Members(appfile):
+    # (member, uncompressed size) of every classes*.dex file, in the order of the .apk file; only the central directory is read
+    try:
+        with zipfile.ZipFile(appfile, 'r') as zip_ref:
+            return [(info.filename, info.file_size) for info in zip_ref.infolist() if dex_member_pattern.match(info.filename)]
+    except (zipfile.BadZipfile, IOError, OSError):
+        return []                                       # The extractors report the broken app
+
+
+def Task_Cost(apk_bytes, dex_members):
+    cost = apk_cost_weight * apk_bytes
+    for member, dex_bytes in dex_members:
+        cost += dex_bytes * cfg_cost_weight
+    return cost
+
+
+def Task_Memory(dex_members):
+    return base_rss_bytes + rss_per_dex_byte * sum(dex_bytes for member, dex_bytes in dex_members)
+
+
+def Plan_Tasks(apps, split_app=None):
+    # Tasks are (cost, memory, appfile, member) with member None for a whole app, longest first.
+    # split_app(appfile) may keep a large multidex app whole (e.g. when its features are cached).
+    tasks = []
+    for appfile in apps:
+        apk_bytes = os.path.getsize(appfile)
+        dex_members = Dex_Members(appfile)
+        if len(dex_members) > 1 and sum(dex_bytes for member, dex_bytes in dex_members) >= min_split_dex_bytes and (split_app is None or split_app(appfile)):
+            for member, dex_bytes in dex_members:
+                tasks.append((Task_Cost(apk_bytes / len(dex_members), [(member, dex_bytes)]), Task_Memory([(member, dex_bytes)]), appfile, member))
+        else:
+            tasks.append((Task_Cost(apk_bytes, dex_members), Task_Memory(dex_members), appfile, None))
+    tasks.sort(key=lambda task: (-task[0], task[2], task[3]))
+    return tasks
+
+# --------------- End of Estimating the cost of each app ---------------
+
+# --------------- Sizing the pool of processes ---------------
+
+def Available_Cores():
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))             # Cores this process may run on (python 3 only)
+    return multiprocessing.cpu_count()
+
+
+def Available_Memory():
+    # Bytes of memory available without swapping, or None when unknown
+    try:
+        with open('/proc/meminfo', 'r') as meminfo:
+            for line in meminfo:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (IOError, OSError):
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def Worker_Count(tasks, num_procs=None):
+    # Longest first, the largest tasks run at the same time, so the pool only grows while their memory fits in the available memory
+    if num_procs:
+        return max(min(num_procs, len(tasks)), 1)       # Set by the user
+    procs = min(Available_Cores(), len(tasks))
+    memory = Available_Memory()
+    if memory is not None:
+        needed = 0
+        for num_procs, task in enumerate(sorted(tasks, key=lambda task: -task[1])[:procs]):
+            needed += task[1]
+            if needed > memory:
+                procs = num_procs
+                break
+    return max(procs, 1)
+
+
+def Dex_Threads(num_procs, dex_threads=None):
+    # .dex files of one app disassembled at the same time: the cores the pool leaves idle are shared among its processes
+    if dex_threads:
+        return dex_threads                              # Set by the user
+    return max(Available_Cores() // max(num_procs, 1), 1)
+
+# --------------- End of Sizing the pool of processes ---------------
+
+# ********************* End of Functions *********************
@@ -0,0 +1,267 @@
+# ************************ General Information ************************
+'''
+VERSION:
+-------
+
+Version (by release date): 2019-11-25
+
+DEVELOPER INFORMATION:
+---------------------
+
+Name: Omid Mirzaei
+Laboratory: Computer Security Lab (COSEC)
+University: Universidad Carlos III de Madrid
+Website: https://cosec.inf.uc3m.es/~omid-mirzaei/
+
+PUBLICATION:
+-----------
+
+AndrODet: An Adaptive Android Obfuscation Detector
+O. Mirzaei, J. M. de Fuentes, J. E. Tapiador, L. Gonzalez-Manzano
+Future Generation Computer Systems, Elsevier (January 2019)
+
+COPYRIGHT NOTICE:
+----------------
+
+All rights reserved for the above developer and research center.
+Please, take a look at the "License.txt" file for more detailed information regarding the usage and distribution of these source codes.
+
+ACKNOWLEDGEMENT:
+---------------
+
+This work has been partially supported by the:
+MINECO grant TIN2016-79095-C2-2-R (SMOG-DEV);
+CAM grant S2013/ICE-3095 (CIBERDINE);
+co-funded with European FEDER funds;
+partially supported by the UC3M's grant Programa de Ayudas para la Movilidad.
+The authors would like to thank the Allatori technical team for its valuable assistance, and, also, the authors of the AMD and PraGuard datasets which made their repositories available to us.
+'''
+# ************************ End of General Information ************************
+
+# ************************ Module Information ************************
+'''
+MAIN FUNCTIONALITY:
+------------------
+
+This module runs the feature extraction tasks on a supervised pool of processes.
+Unlike multiprocessing.Pool, a task which runs longer than its time limit, or whose process (with its dexdump children) grows beyond its memory limit, is killed,
+a process which crashes is replaced, and every process is recycled after a number of tasks. Failed tasks are retried, and handed back to the caller once they failed every attempt.
+'''
+# ************************ End of Module Information  ************************
+
+# ************************ Importing Modules ************************
+
+import os
+import time
+import select
+import signal
+import multiprocessing
+from collections import deque
+
+# ************************ End of Importing Modules ************************
+
+# ************************ Initialization ************************
+
+poll_interval = 1.0                                     # Seconds between two checks of the time and memory limits
+
+# ********************* End of Initialization *********************
+
+# ********************* Functions *********************
+
+# --------------- Running tasks in a worker process ---------------
+
+def Worker_Loop(connection, function, max_tasks):
+    # The process leads its own process group, so that dexdump and any other child is killed along with it
+    os.setpgrp()
+    num_tasks = 0
+    while max_tasks is None or num_tasks < max_tasks:
+        try:
+            message = connection.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+        task_id, task = message
+        try:
+            connection.send((task_id, 'ok', function(task)))
+        except Exception as error:
+            connection.send((task_id, 'error', '%s: %s' %(type(error).__name__, error)))
+        num_tasks += 1
+    connection.close()
+
+# --------------- End of Running tasks in a worker process ---------------
+
+# --------------- Measuring the memory of the worker processes ---------------
+
+def Process_Group_RSS():
+    # RSS in bytes of every process group, summed over its processes (RLIMIT_RSS is not enforced by Linux, so the pool measures it)
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    group_rss = {}
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(os.path.join('/proc', pid, 'stat'), 'r') as stat_file:
+                stat = stat_file.read()
+        except (IOError, OSError):
+            continue                                    # The process ended in the meantime
+        fields = stat[stat.rindex(')') + 2:].split()    # The command name may contain spaces
+        group = int(fields[2])
+        group_rss[group] = group_rss.get(group, 0) + int(fields[21]) * page_size
+    return group_rss
+
+# --------------- End of Measuring the memory of the worker processes ---------------
+
+# ********************* End of Functions *********************
+
+# ********************* Classes *********************
+
+# --------------- Supervising a pool of worker processes ---------------
+
+class Pool_Worker():
+
+    def __init__(self, function, max_tasks):
+        self.connection, child_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=Worker_Loop, args=(child_connection, function, max_tasks))
+        self.process.daemon = True
+        self.process.start()
+        child_connection.close()                        # Only the worker holds its end, so the pipe breaks when the worker dies
+        self.num_tasks = 0                              # Tasks finished by the worker
+        self.task = None                                # (task id, task, attempts) of the running task
+        self.start = None                               # Time the running task started
+
+    def send(self, task_id, task, attempts):
+        self.task = (task_id, task, attempts)
+        self.start = time.time()
+        self.connection.send((task_id, task))
+
+    def kill(self):
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except OSError:
+            pass                                        # Already gone
+        self.retire()
+
+    def retire(self):
+        self.process.join()
+        self.connection.close()
+
+
+class Supervised_Pool():
+
+    def __init__(self, function, processes, timeout=None, max_rss_bytes=None, max_tasks_per_child=None, retries=1):
+        self.function = function                        # Function run on every task
+        self.processes = processes                      # Number of worker processes
+        self.timeout = timeout                          # Seconds a task may run (None: no limit)
+        self.max_rss_bytes = max_rss_bytes              # RSS a worker and its children may reach (None: no limit)
+        self.max_tasks_per_child = max_tasks_per_child  # Tasks after which a worker is replaced by a fresh one (None: never)
+        self.retries = retries                          # Times a failed task is tried again
+        self.workers = [self.start_worker() for _ in range(processes)]
+
+    def start_worker(self):
+        return Pool_Worker(self.function, self.max_tasks_per_child)
+
+    def replace_worker(self, worker, kill=True):
+        if kill:
+            worker.kill()
+        else:
+            worker.retire()
+        self.workers[self.workers.index(worker)] = self.start_worker()
+
+    def imap_unordered(self, tasks, failed=None):
+        # Yields function(task) for every task as soon as it is done, and failed(task, reason) for every task which failed every attempt.
+        # tasks is a list, or a function called whenever a process is idle, which returns the next task, None when there is none yet,
+        # and raises StopIteration when there will be no more.
+        if callable(tasks):
+            next_task = tasks
+        else:
+            remaining = iter(tasks)
+            next_task = lambda: next(remaining)
+        pending = deque()                                                       # Failed tasks to be tried again
+        num_tasks = 0
+        exhausted = False
+        while True:
+            for worker in self.workers:
+                if worker.task is not None:
+                    continue
+                task = None
+                if not exhausted:
+                    try:
+                        task = next_task()
+                    except StopIteration:
+                        exhausted = True
+                if task is not None:
+                    worker.send(num_tasks, task, 0)
+                    num_tasks += 1
+                elif pending:
+                    worker.send(*pending.popleft())                           # Tried again once the other tasks had their turn
+                else:
+                    break
+            busy = [worker for worker in self.workers if worker.task is not None]
+            if exhausted and not pending and not busy:
+                break
+            try:
+                ready, _, _ = select.select([worker.connection for worker in busy], [], [], poll_interval)
+            except select.error:
+                ready = []                                                      # Interrupted by a signal (python 2 does not retry)
+            failures = []
+            for worker in busy:
+                if worker.connection not in ready:
+                    continue
+                try:
+                    task_id, status, result = worker.connection.recv()
+                except (EOFError, IOError):
+                    worker.process.join()
+                    failures.append((worker, 'worker died (exit code %s)' %worker.process.exitcode, True))
+                    continue
+                worker.num_tasks += 1
+                if status != 'ok':
+                    failures.append((worker, result, False))                  # The task raised an exception, the worker goes on
+                    continue
+                worker.task = None
+                if self.max_tasks_per_child and worker.num_tasks >= self.max_tasks_per_child:
+                    self.replace_worker(worker, kill=False)                     # The worker exits by itself after its last task
+                yield result
+            # ********************** Checking the time and memory limits **********************
+            now = time.time()
+            group_rss = Process_Group_RSS() if self.max_rss_bytes else {}
+            for worker in busy:
+                if worker.task is None or any(failed_worker is worker for failed_worker, reason, broken in failures):
+                    continue
+                if self.timeout and now - worker.start > self.timeout:
+                    failures.append((worker, 'timed out after %d s' %self.timeout, True))
+                elif self.max_rss_bytes and group_rss.get(worker.process.pid, 0) > self.max_rss_bytes:
+                    failures.append((worker, 'used %d MB of memory' %(group_rss[worker.process.pid] >> 20), True))
+            # ********************** End of Checking the time and memory limits **********************
+            for worker, reason, broken in failures:
+                task_id, task, attempts = worker.task
+                worker.task = None
+                if broken:
+                    self.replace_worker(worker)                                 # Killed with its dexdump and other children
+                elif self.max_tasks_per_child and worker.num_tasks >= self.max_tasks_per_child:
+                    self.replace_worker(worker, kill=False)
+                if attempts < self.retries:
+                    pending.append((task_id, task, attempts + 1))
+                elif failed is not None:
+                    yield failed(task, reason)
+
+    def close(self):
+        for worker in self.workers:
+            try:
+                worker.connection.send(None)
+            except (IOError, OSError):
+                pass
+
+    def join(self):
+        for worker in self.workers:
+            worker.process.join()
+            worker.connection.close()
+
+    def terminate(self):
+        for worker in self.workers:
+            if worker.process.exitcode is None:         # Still running (or not joined yet)
+                worker.kill()
+
+# --------------- End of Supervising a pool of worker processes ---------------
+
+# ********************* End of Classes *********************
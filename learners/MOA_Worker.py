@@ -0,0 +1,144 @@
+# ************************ General Information ************************
+'''
+VERSION:
+-------
+
+Version (by release date): 2019-11-25
+
+DEVELOPER INFORMATION:
+---------------------
+
+Name: Omid Mirzaei
+Laboratory: Computer Security Lab (COSEC)
+University: Universidad Carlos III de Madrid
+Website: https://cosec.inf.uc3m.es/~omid-mirzaei/
+
+PUBLICATION:
+-----------
+
+AndrODet: An Adaptive Android Obfuscation Detector
+O. Mirzaei, J. M. de Fuentes, J. E. Tapiador, L. Gonzalez-Manzano
+Future Generation Computer Systems, Elsevier (January 2019)
+
+COPYRIGHT NOTICE:
+----------------
+
+All rights reserved for the above developer and research center.
+Please, take a look at the "License.txt" file for more detailed information regarding the usage and distribution of these source codes.
+
+ACKNOWLEDGEMENT:
+---------------
+
+This work has been partially supported by the:
+MINECO grant TIN2016-79095-C2-2-R (SMOG-DEV);
+CAM grant S2013/ICE-3095 (CIBERDINE);
+co-funded with European FEDER funds;
+partially supported by the UC3M's grant Programa de Ayudas para la Movilidad.
+The authors would like to thank the Allatori technical team for its valuable assistance, and, also, the authors of the AMD and PraGuard datasets which made their repositories available to us.
+'''
+# ************************ End of General Information ************************
+
+# ************************ Module Information ************************
+'''
+MAIN FUNCTIONALITY:
+------------------
+
+This module starts a long-running MOA worker (MOA/worker/AndrODetWorker.java) which keeps the IR, SE and CF learners in memory, and streams instances to it one by one.
+Every instance is tested and, then, used for training, and the prediction is returned in the same format as the prediction files of EvaluatePrequential.
+'''
+# ************************ End of Module Information  ************************
+
+# ************************ Importing Modules ************************
+
+import os
+import subprocess
+
+# ************************ End of Importing Modules ************************
+
+# ************************ Initialization ************************
+
+worker_class = 'AndrODetWorker'                         # Main class of the MOA worker
+
+# ********************* End of Initialization *********************
+
+# ********************* Functions *********************
+
+def Worker_Built(moa_dir):
+    # build.sh must have compiled the current source: the class file is not empty, and not older than AndrODetWorker.java
+    class_file = os.path.join(moa_dir, 'worker', 'classes', worker_class + '.class')
+    source_file = os.path.join(moa_dir, 'worker', worker_class + '.java')
+    if not os.path.isfile(class_file) or os.path.getsize(class_file) == 0:
+        return False
+    return not os.path.isfile(source_file) or os.path.getmtime(class_file) >= os.path.getmtime(source_file)
+
+
+def Format_Instance(features):
+    # Values are written with repr so that no precision is lost on the way to the JVM
+    return ','.join(repr(float(value)) for value in features)
+
+# ********************* End of Functions *********************
+
+# ********************* Classes *********************
+
+# --------------- Talking to the MOA worker ---------------
+
+class MOA_Worker():
+
+    def __init__(self, moa_dir):
+        class_path = os.pathsep.join([os.path.join(moa_dir, 'moa.jar'), os.path.join(moa_dir, 'worker', 'classes')])
+        if not Worker_Built(moa_dir):
+            raise Exception('MOA worker is not built, or is older than its source, run %s first' %os.path.join(moa_dir, 'worker', 'build.sh'))
+        self.process = subprocess.Popen(['java', '-cp', class_path, \
+                                         '-javaagent:' + os.path.join(moa_dir, 'sizeofag-1.0.0.jar'), worker_class], \
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE, universal_newlines=True)
+        self.modules = set()                                # Modules whose learner is open in the worker
+
+    def request(self, lines, expected=None):
+        # Every command gets exactly one reply line; a failed command ('ERROR <message>') raises, and so does any reply but the expected one
+        try:
+            for line in lines:
+                self.process.stdin.write(line + '\n')
+            self.process.stdin.flush()
+        except (IOError, OSError):
+            raise Exception('MOA worker exited unexpectedly')
+        reply = self.process.stdout.readline()
+        if not reply:
+            raise Exception('MOA worker exited unexpectedly')
+        reply = reply.rstrip('\n')
+        if reply.startswith('ERR'):
+            raise Exception('MOA worker: %s' %reply.split(' ', 1)[-1])
+        if expected is not None and reply != expected:
+            raise Exception('MOA worker: unexpected reply %r' %reply)
+        return reply
+
+    def open_learner(self, module, learner, class_col_num, arff_header):
+        # The learner is built once from its MOA command-line string (e.g. 'meta.LeveragingBag -s 20') and stays warm
+        # A learner given as 'file:<checkpoint>' is restored from a checkpoint written by save_learner
+        self.request(['OPEN %s %s %s' %(module, class_col_num, learner)] + arff_header.rstrip('\n').split('\n'), 'OK')
+        self.modules.add(module)
+
+    def test_then_train(self, module, features):
+        # Returns '<predicted class>,<real class>\n', the same as a line of 'predictions_<module>_module'
+        return self.request(['TEST %s %s' %(module, Format_Instance(features))]) + '\n'
+
+    def test_then_train_batch(self, module, all_features):
+        # MOA learns one instance per TEST command, so the batch is sent one app at a time
+        return [self.test_then_train(module, features) for features in all_features]
+
+    def save_learner(self, module, checkpoint_file):
+        # The checkpoint is written next to the old one and, then, renamed, so that a crash never leaves a truncated model
+        self.request(['SAVE %s %s' %(module, os.path.abspath(checkpoint_file) + '.tmp')], 'OK')
+        os.rename(checkpoint_file + '.tmp', checkpoint_file)
+
+    def close(self):
+        if self.process.poll() is None:
+            try:
+                self.request(['QUIT'])
+            except Exception:
+                pass
+            self.process.stdin.close()
+            self.process.wait()
+
+# --------------- End of Talking to the MOA worker ---------------
+
+# ********************* End of Classes *********************
@@ -0,0 +1,179 @@
+# ************************ General Information ************************
+'''
+VERSION:
+-------
+
+Version (by release date): 2019-11-25
+
+DEVELOPER INFORMATION:
+---------------------
+
+Name: Omid Mirzaei
+Laboratory: Computer Security Lab (COSEC)
+University: Universidad Carlos III de Madrid
+Website: https://cosec.inf.uc3m.es/~omid-mirzaei/
+
+PUBLICATION:
+-----------
+
+AndrODet: An Adaptive Android Obfuscation Detector
+O. Mirzaei, J. M. de Fuentes, J. E. Tapiador, L. Gonzalez-Manzano
+Future Generation Computer Systems, Elsevier (January 2019)
+
+COPYRIGHT NOTICE:
+----------------
+
+All rights reserved for the above developer and research center.
+Please, take a look at the "License.txt" file for more detailed information regarding the usage and distribution of these source codes.
+
+ACKNOWLEDGEMENT:
+---------------
+
+This work has been partially supported by the:
+MINECO grant TIN2016-79095-C2-2-R (SMOG-DEV);
+CAM grant S2013/ICE-3095 (CIBERDINE);
+co-funded with European FEDER funds;
+partially supported by the UC3M's grant Programa de Ayudas para la Movilidad.
+The authors would like to thank the Allatori technical team for its valuable assistance, and, also, the authors of the AMD and PraGuard datasets which made their repositories available to us.
+'''
+# ************************ End of General Information ************************
+
+# ************************ Module Information ************************
+'''
+MAIN FUNCTIONALITY:
+------------------
+
+This module is an in-process alternative to the MOA worker, which needs no JVM.
+Every detection module is learned by an online bagging ensemble of incremental logistic regression models (Oza and Russell, with Poisson(6) weights as in LeveragingBag).
+The ensemble is vectorized with NumPy: all of its members are tested and trained on an instance at once.
+A batch of instances (one row per app) is tested and trained on in one call, with the Poisson weights of the whole batch drawn at once; its instances are still
+tested before they are learned, one after the other, so the predictions are the same as those of test_then_train.
+'''
+# ************************ End of Module Information  ************************
+
+# ************************ Importing Modules ************************
+
+import os
+import re
+import pickle
+import numpy as np
+
+# ************************ End of Importing Modules ************************
+
+# ************************ Initialization ************************
+
+default_ensemble_size = 20                              # Number of members of the ensemble (as in 'meta.LeveragingBag -s 20')
+poisson_lambda = 6.0                                    # Mean of the Poisson weight of each instance for each member
+learning_rate = 0.05                                    # Step of the stochastic gradient descent
+l2_penalty = 1e-4                                       # L2 regularization of the weights
+
+# ********************* End of Initialization *********************
+
+# ********************* Classes *********************
+
+# --------------- Online bagging of incremental logistic regression models ---------------
+
+class Online_Bagging():
+
+    def __init__(self, num_features, ensemble_size=default_ensemble_size, seed=1):
+        self.num_features = num_features                            # Number of features (class excluded)
+        self.ensemble_size = ensemble_size                          # Number of members
+        self.random = np.random.RandomState(seed)                   # Source of the Poisson weights
+        self.num_seen = 0                                           # Number of instances trained on
+        self.mean = np.zeros(num_features)                          # Running mean of each feature
+        self.sum_squares = np.zeros(num_features)                   # Running sum of squared deviations of each feature (Welford)
+        self.weights = np.zeros((ensemble_size, num_features))      # One row of weights per member
+        self.bias = np.zeros(ensemble_size)                         # Bias of each member
+
+    def standardize(self, x):
+        if self.num_seen < 2:
+            return x - self.mean
+        std = np.sqrt(self.sum_squares / (self.num_seen - 1))
+        std[std == 0] = 1.0
+        return (x - self.mean) / std
+
+    def probabilities(self, z):
+        # Probability of class 1 according to each member
+        return 1.0 / (1.0 + np.exp(-np.clip(self.weights.dot(z) + self.bias, -30, 30)))
+
+    def predict(self, x):
+        # Nothing is predicted but class 0 before the first training instance, as MOA does
+        if self.num_seen == 0:
+            return 0
+        return int(self.probabilities(self.standardize(x)).mean() >= 0.5)
+
+    def train(self, x, y, k=None):
+        # k: Poisson weight of the instance for each member (drawn here unless the caller drew it)
+        # ********************** Updating the running statistics of the features **********************
+        self.num_seen += 1
+        delta = x - self.mean
+        self.mean += delta / self.num_seen
+        self.sum_squares += delta * (x - self.mean)
+        # ********************** End of Updating the running statistics of the features **********************
+        # ********************** One gradient step per member, weighted by its Poisson draw **********************
+        z = self.standardize(x)
+        if k is None:
+            k = self.random.poisson(poisson_lambda, self.ensemble_size)
+        gradient = k * (self.probabilities(z) - y)
+        self.weights -= learning_rate * (np.outer(gradient, z) + l2_penalty * self.weights)
+        self.bias -= learning_rate * gradient
+        # ********************** End of One gradient step per member, weighted by its Poisson draw **********************
+
+    def test_then_train(self, x, y):
+        x = np.nan_to_num(np.asarray(x, dtype=float))
+        prediction = self.predict(x)
+        self.train(x, y)
+        return prediction
+
+    def test_then_train_batch(self, X, y):
+        # X: one row of features per instance. The weights of every instance are drawn in one go, in the same order as one draw per instance
+        X = np.nan_to_num(np.asarray(X, dtype=float))
+        y = np.asarray(y, dtype=float)
+        K = self.random.poisson(poisson_lambda, (len(y), self.ensemble_size))
+        predictions = np.zeros(len(y), dtype=int)
+        for idx in range(len(y)):
+            predictions[idx] = self.predict(X[idx])
+            self.train(X[idx], y[idx], K[idx])
+        return predictions
+
+# --------------- End of Online bagging of incremental logistic regression models ---------------
+
+# --------------- Serving the learners in process, like the MOA worker ---------------
+
+class Online_Bagging_Worker():
+
+    def __init__(self):
+        self.learners = {}                                  # Learner of each module
+
+    def open_learner(self, module, learner, class_col_num, arff_header):
+        # A learner given as 'file:<checkpoint>' is restored from a checkpoint written by save_learner
+        if learner.startswith('file:'):
+            with open(learner[len('file:'):], 'rb') as checkpoint:
+                self.learners[module] = pickle.load(checkpoint)
+            return
+        ensemble_size = re.search(r'-s\s+([0-9]+)', learner)            # Only the ensemble size of the MOA learner is used
+        ensemble_size = int(ensemble_size.group(1)) if ensemble_size else default_ensemble_size
+        self.learners[module] = Online_Bagging(int(class_col_num) - 1, ensemble_size)
+
+    def test_then_train(self, module, features):
+        # Returns '<predicted class>,<real class>\n', the same as a line of 'predictions_<module>_module'
+        prediction = self.learners[module].test_then_train(features[:-1], features[-1])
+        return '%d,%d\n' %(prediction, int(features[-1]))
+
+    def test_then_train_batch(self, module, all_features):
+        # all_features: one row of features and class per app; returns one line of 'predictions_<module>_module' per app
+        data = np.asarray(all_features, dtype=float).reshape(len(all_features), -1)
+        predictions = self.learners[module].test_then_train_batch(data[:, :-1], data[:, -1])
+        return ['%d,%d\n' %(prediction, int(real_class)) for prediction, real_class in zip(predictions, data[:, -1])]
+
+    def save_learner(self, module, checkpoint_file):
+        with open(checkpoint_file + '.tmp', 'wb') as checkpoint:
+            pickle.dump(self.learners[module], checkpoint, 2)
+        os.rename(checkpoint_file + '.tmp', checkpoint_file)
+
+    def close(self):
+        self.learners = {}
+
+# --------------- End of Serving the learners in process, like the MOA worker ---------------
+
+# ********************* End of Classes *********************
@@ -0,0 +1,85 @@
+# ************************ General Information ************************
+'''
+VERSION:
+-------
+
+Version (by release date): 2019-11-25
+
+DEVELOPER INFORMATION:
+---------------------
+
+Name: Omid Mirzaei
+Laboratory: Computer Security Lab (COSEC)
+University: Universidad Carlos III de Madrid
+Website: https://cosec.inf.uc3m.es/~omid-mirzaei/
+
+PUBLICATION:
+-----------
+
+AndrODet: An Adaptive Android Obfuscation Detector
+O. Mirzaei, J. M. de Fuentes, J. E. Tapiador, L. Gonzalez-Manzano
+Future Generation Computer Systems, Elsevier (January 2019)
+
+COPYRIGHT NOTICE:
+----------------
+
+All rights reserved for the above developer and research center.
+Please, take a look at the "License.txt" file for more detailed information regarding the usage and distribution of these source codes.
+
+ACKNOWLEDGEMENT:
+---------------
+
+This work has been partially supported by the:
+MINECO grant TIN2016-79095-C2-2-R (SMOG-DEV);
+CAM grant S2013/ICE-3095 (CIBERDINE);
+co-funded with European FEDER funds;
+partially supported by the UC3M's grant Programa de Ayudas para la Movilidad.
+The authors would like to thank the Allatori technical team for its valuable assistance, and, also, the authors of the AMD and PraGuard datasets which made their repositories available to us.
+'''
+# ************************ End of General Information ************************
+
+# ************************ Module Information ************************
+'''
+MAIN FUNCTIONALITY:
+------------------
+
+This module replays the output of a real dexdump, recorded by Record_Dexdump.py, for the tests which compare the features with that output.
+The recorded output of a .dex file is found by the SHA-256 digest of the file; a .dex file which was not recorded is an error.
+
+USAGE:
+-----
+
+python Dexdump_Replay.py -d classes.dex
+'''
+# ************************ End of Module Information  ************************
+
+# ************************ Importing Modules ************************
+
+import os
+import sys
+import shutil
+import hashlib
+
+# ************************ End of Importing Modules ************************
+
+# ************************ Initialization ************************
+
+Outputs_Dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'dexdump')     # Recorded 'dexdump -d' outputs, named <SHA-256 of the .dex file>.txt
+
+# ********************* End of Initialization *********************
+
+# ********************* Functions *********************
+
+def Output_File(dex_file):
+    with open(dex_file, 'rb') as dex:
+        return os.path.join(Outputs_Dir, hashlib.sha256(dex.read()).hexdigest() + '.txt')
+
+# ********************* End of Functions *********************
+
+if __name__ == '__main__':
+    output_file = Output_File(sys.argv[-1])
+    if not os.path.isfile(output_file):
+        sys.stderr.write('No recorded dexdump output for %s (%s)\n' %(sys.argv[-1], output_file))
+        sys.exit(1)
+    with open(output_file, 'rb') as output:
+        shutil.copyfileobj(output, getattr(sys.stdout, 'buffer', sys.stdout))
@@ -0,0 +1,137 @@
+# ************************ General Information ************************
+'''
+VERSION:
+-------
+
+Version (by release date): 2019-11-25
+
+DEVELOPER INFORMATION:
+---------------------
+
+Name: Omid Mirzaei
+Laboratory: Computer Security Lab (COSEC)
+University: Universidad Carlos III de Madrid
+Website: https://cosec.inf.uc3m.es/~omid-mirzaei/
+
+PUBLICATION:
+-----------
+
+AndrODet: An Adaptive Android Obfuscation Detector
+O. Mirzaei, J. M. de Fuentes, J. E. Tapiador, L. Gonzalez-Manzano
+Future Generation Computer Systems, Elsevier (January 2019)
+
+COPYRIGHT NOTICE:
+----------------
+
+All rights reserved for the above developer and research center.
+Please, take a look at the "License.txt" file for more detailed information regarding the usage and distribution of these source codes.
+
+ACKNOWLEDGEMENT:
+---------------
+
+This work has been partially supported by the:
+MINECO grant TIN2016-79095-C2-2-R (SMOG-DEV);
+CAM grant S2013/ICE-3095 (CIBERDINE);
+co-funded with European FEDER funds;
+partially supported by the UC3M's grant Programa de Ayudas para la Movilidad.
+The authors would like to thank the Allatori technical team for its valuable assistance, and, also, the authors of the AMD and PraGuard datasets which made their repositories available to us.
+'''
+# ************************ End of General Information ************************
+
+# ************************ Module Information ************************
+'''
+MAIN FUNCTIONALITY:
+------------------
+
+This module stands in for dexdump in the tests which only compare AndrODet with itself, where the dexdump binary of the repository cannot run (it is built for macOS).
+It is built on androguard, like the native backend, so it must not be used to compare the backends (see Real_Dexdump_Dir in Sample_Apps.py).
+It prints 'dexdump -d <file>' as dexdump lays it out (classes, fields, methods and the code of every method), reading the .dex file with androguard.
+Only what the parsers of AndrODet read is laid out exactly: descriptors, the '#<n>' lines and the name/type/access/code lines of fields and methods,
+and the const-string, goto and nop instructions.
+
+USAGE:
+-----
+
+python Dexdump_Stub.py -d '/Directory/of/androguard' classes.dex
+'''
+# ************************ End of Module Information  ************************
+
+# ************************ Importing Modules ************************
+
+import os
+import sys
+
+# ************************ End of Importing Modules ************************
+
+# ************************ Initialization ************************
+
+Home_Dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))                 # Home directory
+const_string_opcode = 0x1a                                                              # Opcode of const-string
+
+# ********************* End of Initialization *********************
+
+# ********************* Functions *********************
+
+def Print_Member(idx, class_name, name, descriptor, access_flags):
+    sys.stdout.write("    #%-14d : (in %s)\n" %(idx, class_name))
+    sys.stdout.write("      name          : '%s'\n" %name)
+    sys.stdout.write("      type          : '%s'\n" %descriptor)
+    sys.stdout.write("      access        : 0x%04x ()\n" %access_flags)
+
+
+def Print_Code(class_name, method):
+    code = method.get_code()
+    if code is None:
+        sys.stdout.write("      code          : (none)\n\n")
+        return
+    sys.stdout.write("      code          -\n")
+    sys.stdout.write("      registers     : %d\n" %code.get_registers_size())
+    sys.stdout.write("      insns size    : %d 16-bit code units\n" %code.get_insns_size())
+    sys.stdout.write("%06x:                                        |[%06x] %s.%s:%s\n" %(0, 0, class_name, method.get_name(), method.get_descriptor().replace(' ', '')))
+    idx = 0
+    for ins in method.get_instructions():
+        if ins.get_op_value() == const_string_opcode:
+            text = 'const-string v%d, "%s" // string@%04x' %(ins.AA, ins.get_raw_string(), ins.BBBB)
+        else:
+            text = ('%s %s' %(ins.get_name(), ins.get_output())).rstrip()
+        sys.stdout.write("%06x: %-38s |%04x: %s\n" %(idx, '', idx // 2, text))
+        idx += ins.get_length()
+    sys.stdout.write("      catches       : (none)\n")
+    sys.stdout.write("      positions     : \n")
+    sys.stdout.write("      locals        : \n\n")
+
+
+def Dump_Dex(dex_file):
+    from androguard.core.bytecodes import dvm
+    with open(dex_file, 'rb') as dex:
+        dalvik_vm = dvm.DalvikVMFormat(dex.read())
+    sys.stdout.write("Processing '%s'...\nOpened '%s', DEX version '035'\n" %(dex_file, dex_file))
+    for class_idx, cls in enumerate(dalvik_vm.get_classes()):
+        class_name = cls.get_name()
+        class_data = cls.get_class_data()
+        sys.stdout.write("Class #%-13d-\n" %class_idx)
+        sys.stdout.write("  Class descriptor  : '%s'\n" %class_name)
+        sys.stdout.write("  Access flags      : 0x%04x ()\n" %cls.get_access_flags())
+        sys.stdout.write("  Superclass        : '%s'\n" %cls.get_superclassname())
+        sys.stdout.write("  Interfaces        -\n")
+        for title, members in [('Static fields', 'get_static_fields'), ('Instance fields', 'get_instance_fields')]:
+            sys.stdout.write("  %-18s-\n" %title)
+            for idx, field in enumerate(getattr(class_data, members)() if class_data is not None else []):
+                Print_Member(idx, class_name, field.get_name(), field.get_descriptor(), field.get_access_flags())
+        for title, members in [('Direct methods', 'get_direct_methods'), ('Virtual methods', 'get_virtual_methods')]:
+            sys.stdout.write("  %-18s-\n" %title)
+            for idx, method in enumerate(getattr(class_data, members)() if class_data is not None else []):
+                Print_Member(idx, class_name, method.get_name(), method.get_descriptor().replace(' ', ''), method.get_access_flags())
+                Print_Code(class_name, method)
+        sys.stdout.write("  source_file_idx   : 0 ()\n\n")
+
+# ********************* End of Functions *********************
+
+# ********************* Main Body *********************
+
+if __name__ == '__main__':
+
+    # dexdump [-d] <file>; androguard is taken from the repository unless ANDROGUARD_DIR is given
+    sys.path.insert(0, os.environ.get('ANDROGUARD_DIR', os.path.join(Home_Dir, 'androguard-master')))
+    Dump_Dex(sys.argv[-1])
+# ********************* End of Main Body *********************
@@ -0,0 +1,117 @@
+# ************************ General Information ************************
+'''
+VERSION:
+-------
+
+Version (by release date): 2019-11-25
+
+DEVELOPER INFORMATION:
+---------------------
+
+Name: Omid Mirzaei
+Laboratory: Computer Security Lab (COSEC)
+University: Universidad Carlos III de Madrid
+Website: https://cosec.inf.uc3m.es/~omid-mirzaei/
+
+PUBLICATION:
+-----------
+
+AndrODet: An Adaptive Android Obfuscation Detector
+O. Mirzaei, J. M. de Fuentes, J. E. Tapiador, L. Gonzalez-Manzano
+Future Generation Computer Systems, Elsevier (January 2019)
+
+COPYRIGHT NOTICE:
+----------------
+
+All rights reserved for the above developer and research center.
+Please, take a look at the "License.txt" file for more detailed information regarding the usage and distribution of these source codes.
+
+ACKNOWLEDGEMENT:
+---------------
+
+This work has been partially supported by the:
+MINECO grant TIN2016-79095-C2-2-R (SMOG-DEV);
+CAM grant S2013/ICE-3095 (CIBERDINE);
+co-funded with European FEDER funds;
+partially supported by the UC3M's grant Programa de Ayudas para la Movilidad.
+The authors would like to thank the Allatori technical team for its valuable assistance, and, also, the authors of the AMD and PraGuard datasets which made their repositories available to us.
+'''
+# ************************ End of General Information ************************
+
+# ************************ Module Information ************************
+'''
+MAIN FUNCTIONALITY:
+------------------
+
+This module stands in for the MOA worker (MOA/worker/AndrODetWorker.java) in the tests, so that the python side of its protocol is tested without a JVM.
+It answers every command with exactly one line, as the MOA worker does: the ARFF header of an OPEN command is read even when the command is malformed,
+and failed commands are answered with 'ERROR <message>'. Every instance is predicted as class 0.
+With the argument 'crash', it exits without replying to the first TEST command.
+'''
+# ************************ End of Module Information  ************************
+
+# ************************ Importing Modules ************************
+
+import sys
+
+# ************************ End of Importing Modules ************************
+
+# ********************* Functions *********************
+
+def Read_Header():
+    lines = []
+    for line in iter(sys.stdin.readline, ''):
+        lines.append(line)
+        if line.strip().lower().startswith('@data'):
+            break
+    return lines
+
+
+def Reply(line):
+    sys.stdout.write(line + '\n')
+    sys.stdout.flush()
+
+
+def Serve(crash=False):
+    modules = {}                                        # Number of attributes of each open module
+    for line in iter(sys.stdin.readline, ''):
+        line = line.strip()
+        if not line:
+            continue
+        command = line.split(' ', 3)
+        if command[0] == 'QUIT':
+            Reply('OK')
+            return
+        elif command[0] == 'OPEN':
+            header = Read_Header()
+            if len(command) != 4 or not command[2].isdigit():
+                Reply('ERROR Malformed OPEN command: %s' %line)
+            else:
+                modules[command[1]] = len([header_line for header_line in header if header_line.lower().startswith('@attribute')])
+                Reply('OK')
+        elif command[0] == 'TEST' and len(command) == 3:
+            if crash:
+                sys.exit(1)
+            values = command[2].split(',')
+            if command[1] not in modules:
+                Reply('ERROR Module %s is not open' %command[1])
+            elif len(values) != modules[command[1]]:
+                Reply('ERROR Expected %d values, got %d' %(modules[command[1]], len(values)))
+            else:
+                Reply('0,%d' %int(float(values[-1])))
+        elif command[0] == 'SAVE' and len(command) >= 3:
+            with open(line.split(' ', 2)[2], 'w') as checkpoint:
+                checkpoint.write('fake learner\n')
+            Reply('OK')
+        else:
+            Reply('ERROR Unknown command: %s' %line)
+
+# ********************* End of Functions *********************
+
+# ********************* Main Body *********************
+
+if __name__ == '__main__':
+
+    # Started as 'java -cp <class path> -javaagent:<agent> AndrODetWorker [crash]' by learners/MOA_Worker.py, through the java script of the test
+    Serve('crash' in sys.argv[1:])
+# ********************* End of Main Body *********************
@@ -0,0 +1,85 @@
+# ************************ General Information ************************
+'''
+VERSION:
+-------
+
+Version (by release date): 2019-11-25
+
+DEVELOPER INFORMATION:
+---------------------
+
+Name: Omid Mirzaei
+Laboratory: Computer Security Lab (COSEC)
+University: Universidad Carlos III de Madrid
+Website: https://cosec.inf.uc3m.es/~omid-mirzaei/
+
+PUBLICATION:
+-----------
+
+AndrODet: An Adaptive Android Obfuscation Detector
+O. Mirzaei, J. M. de Fuentes, J. E. Tapiador, L. Gonzalez-Manzano
+Future Generation Computer Systems, Elsevier (January 2019)
+
+COPYRIGHT NOTICE:
+----------------
+
+All rights reserved for the above developer and research center.
+Please, take a look at the "License.txt" file for more detailed information regarding the usage and distribution of these source codes.
+
+ACKNOWLEDGEMENT:
+---------------
+
+This work has been partially supported by the:
+MINECO grant TIN2016-79095-C2-2-R (SMOG-DEV);
+CAM grant S2013/ICE-3095 (CIBERDINE);
+co-funded with European FEDER funds;
+partially supported by the UC3M's grant Programa de Ayudas para la Movilidad.
+The authors would like to thank the Allatori technical team for its valuable assistance, and, also, the authors of the AMD and PraGuard datasets which made their repositories available to us.
+'''
+# ************************ End of General Information ************************
+
+# ************************ Module Information ************************
+'''
+MAIN FUNCTIONALITY:
+------------------
+
+This module records the output of a real dexdump ('dexdump -d') for every .dex file of the sample apps (see Sample_Apps.py) into tests/data/dexdump,
+so that the backends are compared with it on hosts where no dexdump runs (see Dexdump_Replay.py).
+Run it again, and commit its files, whenever the sample apps change.
+
+USAGE:
+-----
+
+DEXDUMP_DIR='/Directory/of/dexdump' python tests/Record_Dexdump.py
+'''
+# ************************ End of Module Information  ************************
+
+# ************************ Importing Modules ************************
+
+import os
+import sys
+import shutil
+import zipfile
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tests import Sample_Apps
+from tests import Dexdump_Replay
+
+# ************************ End of Importing Modules ************************
+
+if __name__ == '__main__':
+    dexdump = os.path.join(os.environ.get('DEXDUMP_DIR', os.path.join(Sample_Apps.Home_Dir, 'dexdump')), 'dexdump')
+    if not Sample_Apps.Runs([dexdump]):
+        sys.exit('dexdump %s does not run on this host, set DEXDUMP_DIR' %dexdump)
+    if not os.path.isdir(Dexdump_Replay.Outputs_Dir):
+        os.makedirs(Dexdump_Replay.Outputs_Dir)
+    work_dir = tempfile.mkdtemp(prefix='androdet_record_')
+    try:
+        for dex_file in Sample_Apps.Corpus_Dex_Files(Sample_Apps.Build_Corpus(os.path.join(work_dir, 'apps')), work_dir):
+            with open(Dexdump_Replay.Output_File(dex_file), 'wb') as output:
+                subprocess.check_call([dexdump, '-d', dex_file], stdout=output)
+            print('Recorded %s' %Dexdump_Replay.Output_File(dex_file))
+    finally:
+        shutil.rmtree(work_dir)
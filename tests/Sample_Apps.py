@@ -0,0 +1,170 @@
+# ************************ General Information ************************
+'''
+VERSION:
+-------
+
+Version (by release date): 2019-11-25
+
+DEVELOPER INFORMATION:
+---------------------
+
+Name: Omid Mirzaei
+Laboratory: Computer Security Lab (COSEC)
+University: Universidad Carlos III de Madrid
+Website: https://cosec.inf.uc3m.es/~omid-mirzaei/
+
+PUBLICATION:
+-----------
+
+AndrODet: An Adaptive Android Obfuscation Detector
+O. Mirzaei, J. M. de Fuentes, J. E. Tapiador, L. Gonzalez-Manzano
+Future Generation Computer Systems, Elsevier (January 2019)
+
+COPYRIGHT NOTICE:
+----------------
+
+All rights reserved for the above developer and research center.
+Please, take a look at the "License.txt" file for more detailed information regarding the usage and distribution of these source codes.
+
+ACKNOWLEDGEMENT:
+---------------
+
+This work has been partially supported by the:
+MINECO grant TIN2016-79095-C2-2-R (SMOG-DEV);
+CAM grant S2013/ICE-3095 (CIBERDINE);
+co-funded with European FEDER funds;
+partially supported by the UC3M's grant Programa de Ayudas para la Movilidad.
+The authors would like to thank the Allatori technical team for its valuable assistance, and, also, the authors of the AMD and PraGuard datasets which made their repositories available to us.
+'''
+# ************************ End of General Information ************************
+
+# ************************ Module Information ************************
+'''
+MAIN FUNCTIONALITY:
+------------------
+
+This module builds the Android applications the tests run AndrODet on: one app per sample .dex file of androguard (androguard-master/examples),
+a multidex app made of two of them, and a synthetic multidex app with renamed identifiers, encrypted strings and goto/nop padding (benchmarks/Synthetic_APK.py).
+It also finds a dexdump to run: the one of the directory given by DEXDUMP_DIR, the one of the repository if it runs on this host, or, otherwise,
+the output of a real dexdump recorded by Record_Dexdump.py (Real_Dexdump_Dir). The tests which only compare AndrODet with itself may fall back
+on Dexdump_Stub.py (Dexdump_Dir), which is built on androguard and so proves nothing about the features of dexdump.
+
+The tests run with the python 2 interpreter of androguard, from the home directory:
+
+python -m unittest discover -s tests -t .
+'''
+# ************************ End of Module Information  ************************
+
+# ************************ Importing Modules ************************
+
+import os
+import sys
+import hashlib
+import zipfile
+import subprocess
+from benchmarks import Synthetic_APK
+from tests import Dexdump_Replay
+
+# ************************ End of Importing Modules ************************
+
+# ************************ Initialization ************************
+
+Home_Dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))                 # Home directory
+Androguard_Dir = os.path.join(Home_Dir, 'androguard-master')                            # Directory of androguard
+Examples_Dir = os.path.join(Androguard_Dir, 'examples', 'android')                      # Sample apps of androguard, with their classes.dex in bin/
+Small_Samples = ['Demo1', 'Demo1StealSource', 'TC', 'TCDiff']                           # Sample .dex files analyzed in a few seconds
+Large_Samples = ['TestsAndroguard', 'gtalksms']                                         # Sample .dex files with thousands of methods
+Labels = ['IR/YES', 'SE/NO', 'CF/YES', 'IR/NO', 'SE/YES', 'CF/NO']                       # Folders the apps are spread over, as AndrODet_MOA.py expects them
+
+# ********************* End of Initialization *********************
+
+# ********************* Functions *********************
+
+def Sample_Dex(sample):
+    with open(os.path.join(Examples_Dir, sample, 'bin', 'classes.dex'), 'rb') as dex_file:
+        return dex_file.read()
+
+
+def Write_APK(apk_file, dex_files):
+    # dex_files are the contents of classes.dex, classes2.dex, ...
+    if not os.path.isdir(os.path.dirname(apk_file)):
+        os.makedirs(os.path.dirname(apk_file))
+    with zipfile.ZipFile(apk_file, 'w', zipfile.ZIP_DEFLATED) as zip_ref:
+        zip_ref.writestr('AndroidManifest.xml', '<manifest/>')
+        for idx, dex in enumerate(dex_files):
+            zip_ref.writestr('classes.dex' if idx == 0 else 'classes%d.dex' %(idx + 1), dex)
+
+
+def Build_Corpus(corpus_dir, large=True):
+    # Paths of the apps written into corpus_dir, spread over the folders of Labels
+    samples = Small_Samples + (Large_Samples if large else [])
+    apps = [('sample_%s' %sample.lower(), [Sample_Dex(sample)]) for sample in samples]
+    apps.append(('multidex_tc', [Sample_Dex('TC'), Sample_Dex('TCDiff')]))
+    apk_files = []
+    for idx, (name, dex_files) in enumerate(apps):
+        apk_files.append(os.path.join(corpus_dir, Labels[idx % len(Labels)], name + '.apk'))
+        Write_APK(apk_files[-1], dex_files)
+    apk_files.append(os.path.join(corpus_dir, Labels[len(apps) % len(Labels)], 'synthetic_multidex.apk'))
+    if not os.path.isdir(os.path.dirname(apk_files[-1])):
+        os.makedirs(os.path.dirname(apk_files[-1]))
+    Synthetic_APK.Generate_APK(apk_files[-1], 7, 30, 4, 3, 2, num_dex=2, renamed=True, encrypted=True, padding=3)
+    return apk_files
+
+
+def Runs(command):
+    try:
+        with open(os.devnull, 'w') as devnull:
+            subprocess.call(command, stdout=devnull, stderr=devnull)
+        return True
+    except OSError:
+        return False                                    # e.g. a binary built for another system
+
+
+def Corpus_Dex_Files(apk_files, work_dir):
+    # Paths of the distinct classes*.dex files of the apps, copied out of them into work_dir
+    dex_files = {}
+    for apk_file in apk_files:
+        with zipfile.ZipFile(apk_file, 'r') as zip_ref:
+            for member in zip_ref.namelist():
+                if member.startswith('classes') and member.endswith('.dex'):
+                    dex = zip_ref.read(member)
+                    digest = hashlib.sha256(dex).hexdigest()
+                    if digest not in dex_files:
+                        dex_files[digest] = os.path.join(work_dir, digest + '.dex')
+                        with open(dex_files[digest], 'wb') as dex_file:
+                            dex_file.write(dex)
+    return sorted(dex_files.values())
+
+
+def Wrapper_Dir(work_dir, name, script):
+    # Directory of a 'dexdump' which runs script
+    wrapper_dir = os.path.join(work_dir, name)
+    if not os.path.isdir(wrapper_dir):
+        os.makedirs(wrapper_dir)
+    with open(os.path.join(wrapper_dir, 'dexdump'), 'w') as dexdump:
+        dexdump.write('#!/bin/sh\nexec "%s" "%s" "$@"\n' %(sys.executable, os.path.join(Home_Dir, 'tests', script)))
+    os.chmod(os.path.join(wrapper_dir, 'dexdump'), 0o755)
+    return wrapper_dir
+
+
+def Real_Dexdump_Dir(work_dir, apk_files):
+    # Directory of a real dexdump, or of the replay of its recorded output for every .dex file of apk_files; None if there is neither
+    dexdump_dir = os.environ.get('DEXDUMP_DIR', os.path.join(Home_Dir, 'dexdump'))
+    if Runs([os.path.join(dexdump_dir, 'dexdump')]):
+        return dexdump_dir
+    dex_dir = os.path.join(work_dir, 'dex_files')
+    if not os.path.isdir(dex_dir):
+        os.makedirs(dex_dir)
+    if all(os.path.isfile(Dexdump_Replay.Output_File(dex_file)) for dex_file in Corpus_Dex_Files(apk_files, dex_dir)):
+        return Wrapper_Dir(work_dir, 'dexdump_replay', 'Dexdump_Replay.py')
+    return None
+
+
+def Dexdump_Dir(work_dir):
+    # Directory of the dexdump the tests which compare AndrODet with itself run: a real one if it runs, Dexdump_Stub.py otherwise
+    dexdump_dir = os.environ.get('DEXDUMP_DIR', os.path.join(Home_Dir, 'dexdump'))
+    if Runs([os.path.join(dexdump_dir, 'dexdump')]):
+        return dexdump_dir
+    return Wrapper_Dir(work_dir, 'dexdump_stub', 'Dexdump_Stub.py')
+
+# ********************* End of Functions *********************
@@ -0,0 +1,87 @@
+# ************************ General Information ************************
+'''
+VERSION:
+-------
+
+Version (by release date): 2019-11-25
+
+DEVELOPER INFORMATION:
+---------------------
+
+Name: Omid Mirzaei
+Laboratory: Computer Security Lab (COSEC)
+University: Universidad Carlos III de Madrid
+Website: https://cosec.inf.uc3m.es/~omid-mirzaei/
+
+PUBLICATION:
+-----------
+
+AndrODet: An Adaptive Android Obfuscation Detector
+O. Mirzaei, J. M. de Fuentes, J. E. Tapiador, L. Gonzalez-Manzano
+Future Generation Computer Systems, Elsevier (January 2019)
+
+COPYRIGHT NOTICE:
+----------------
+
+All rights reserved for the above developer and research center.
+Please, take a look at the "License.txt" file for more detailed information regarding the usage and distribution of these source codes.
+
+ACKNOWLEDGEMENT:
+---------------
+
+This work has been partially supported by the:
+MINECO grant TIN2016-79095-C2-2-R (SMOG-DEV);
+CAM grant S2013/ICE-3095 (CIBERDINE);
+co-funded with European FEDER funds;
+partially supported by the UC3M's grant Programa de Ayudas para la Movilidad.
+The authors would like to thank the Allatori technical team for its valuable assistance, and, also, the authors of the AMD and PraGuard datasets which made their repositories available to us.
+'''
+# ************************ End of General Information ************************
+
+# ************************ Module Information ************************
+'''
+MAIN FUNCTIONALITY:
+------------------
+
+This module tests that the dexdump and native backends give identical IR, SE and CF feature vectors for the sample apps (see Sample_Apps.py).
+The dexdump backend reads the output of a real dexdump, or its output recorded by Record_Dexdump.py; the test fails when there is neither,
+as Dexdump_Stub.py is built on androguard, like the native backend, and comparing the two would prove nothing.
+'''
+# ************************ End of Module Information  ************************
+
+# ************************ Importing Modules ************************
+
+import os
+import shutil
+import tempfile
+import unittest
+import AndrODet_Backends
+from tests import Sample_Apps
+
+# ************************ End of Importing Modules ************************
+
+# ********************* Classes *********************
+
+class Backends_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='androdet_backends_')
+        self.apk_files = Sample_Apps.Build_Corpus(os.path.join(self.work_dir, 'apps'))
+        self.dexdump_dir = Sample_Apps.Real_Dexdump_Dir(self.work_dir, self.apk_files)
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def test_identical_features(self):
+        if self.dexdump_dir is None:
+            self.fail('No real dexdump output to compare the native backend with: set DEXDUMP_DIR to a dexdump which runs on this host, '
+                      'or record its output with tests/Record_Dexdump.py on a host where one runs')
+        for appfile in self.apk_files:
+            features_dexdump, features_native = AndrODet_Backends.compare_backends(appfile, self.dexdump_dir, Sample_Apps.Androguard_Dir)
+            self.assertTrue(features_dexdump[0] and features_dexdump[2], appfile)                   # SE fails in both backends for an app without strings
+            self.assertEqual(features_dexdump, features_native, appfile)
+
+# ********************* End of Classes *********************
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+# ************************ General Information ************************
+'''
+VERSION:
+-------
+
+Version (by release date): 2019-11-25
+
+DEVELOPER INFORMATION:
+---------------------
+
+Name: Omid Mirzaei
+Laboratory: Computer Security Lab (COSEC)
+University: Universidad Carlos III de Madrid
+Website: https://cosec.inf.uc3m.es/~omid-mirzaei/
+
+PUBLICATION:
+-----------
+
+AndrODet: An Adaptive Android Obfuscation Detector
+O. Mirzaei, J. M. de Fuentes, J. E. Tapiador, L. Gonzalez-Manzano
+Future Generation Computer Systems, Elsevier (January 2019)
+
+COPYRIGHT NOTICE:
+----------------
+
+All rights reserved for the above developer and research center.
+Please, take a look at the "License.txt" file for more detailed information regarding the usage and distribution of these source codes.
+
+ACKNOWLEDGEMENT:
+---------------
+
+This work has been partially supported by the:
+MINECO grant TIN2016-79095-C2-2-R (SMOG-DEV);
+CAM grant S2013/ICE-3095 (CIBERDINE);
+co-funded with European FEDER funds;
+partially supported by the UC3M's grant Programa de Ayudas para la Movilidad.
+The authors would like to thank the Allatori technical team for its valuable assistance, and, also, the authors of the AMD and PraGuard datasets which made their repositories available to us.
+'''
+# ************************ End of General Information ************************
+
+# ************************ Module Information ************************
+'''
+MAIN FUNCTIONALITY:
+------------------
+
+This module tests the distributed extraction on localhost: a coordinator and two worker nodes, each one a process of its own,
+must store the same IR, SE and CF features as a local run over the sample apps (see Sample_Apps.py).
+'''
+# ************************ End of Module Information  ************************
+
+# ************************ Importing Modules ************************
+
+import os
+import sys
+import time
+import shutil
+import socket
+import tempfile
+import unittest
+import subprocess
+from tests import Sample_Apps
+
+# ************************ End of Importing Modules ************************
+
+# ************************ Initialization ************************
+
+Authkey = 'androdet-test-key'                                                           # Key shared by the coordinator and the worker nodes
+Timeout = 300                                                                           # Seconds a run may take
+
+# ********************* End of Initialization *********************
+
+# ********************* Functions *********************
+
+def Free_Port():
+    probe = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    probe.bind(('127.0.0.1', 0))
+    port = probe.getsockname()[1]
+    probe.close()
+    return port
+
+
+def Wait(process, timeout):
+    # Exit code of the process, or None if it is still running after timeout seconds (python 2 has no timeout in Popen.wait)
+    deadline = time.time() + timeout
+    while process.poll() is None and time.time() < deadline:
+        time.sleep(0.1)
+    return process.poll()
+
+# ********************* End of Functions *********************
+
+# ********************* Classes *********************
+
+class Coordinator_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='androdet_coordinator_')
+        self.apps_dir = os.path.join(self.work_dir, 'apps')
+        Sample_Apps.Build_Corpus(self.apps_dir, large=False)
+        self.dexdump_dir = Sample_Apps.Dexdump_Dir(self.work_dir)
+        self.processes = []
+
+    def tearDown(self):
+        for process in self.processes:
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+        shutil.rmtree(self.work_dir)
+
+    def start(self, name, *arguments):
+        # AndrODet_MOA.py runs from the home directory, as it finds MOA there; its output goes to <name>.log
+        command = [sys.executable, 'AndrODet_MOA.py', '-d', self.dexdump_dir, '-g', Sample_Apps.Androguard_Dir, '-o', os.path.join(self.work_dir, name), \
+                   '-l', 'python', '--no_cache', '-x', 'memory'] + list(arguments)
+        with open(os.path.join(self.work_dir, name + '.log'), 'w') as log:
+            process = subprocess.Popen(command, cwd=Sample_Apps.Home_Dir, stdout=log, stderr=subprocess.STDOUT)
+        self.processes.append(process)
+        return process
+
+    def finish(self, name, process):
+        with open(os.path.join(self.work_dir, name + '.log'), 'r') as log:
+            self.assertEqual(Wait(process, Timeout), 0, log.read())
+
+    def wait_for_port(self, process, port):
+        # Worker nodes connect right away, so they are only started once the coordinator listens
+        deadline = time.time() + Timeout
+        while time.time() < deadline and process.poll() is None:
+            try:
+                socket.create_connection(('127.0.0.1', port), 1).close()
+                return
+            except socket.error:
+                time.sleep(0.1)
+        self.fail('The coordinator did not listen on port %d' %port)
+
+    def exported_features(self, name, module):
+        # Rows of the features of module in the feature store of run name, in the order of the apps
+        csv_file = os.path.join(self.work_dir, '%s_%s.csv' %(name, module))
+        with open(os.devnull, 'w') as devnull:
+            subprocess.check_call([sys.executable, 'AndrODet_Export.py', '-s', os.path.join(self.work_dir, name, 'feature_store'), '-m', module, '-f', 'csv', '-o', csv_file], \
+                                  cwd=Sample_Apps.Home_Dir, stdout=devnull)
+        with open(csv_file, 'r') as rows:
+            lines = rows.read().splitlines()
+        return lines[:1] + sorted(lines[1:])
+
+    def test_authkey_required(self):
+        for role in ['--coordinator', '--worker']:
+            process = self.start('no_authkey', '-a', self.apps_dir, role, '127.0.0.1:%d' %Free_Port())
+            self.assertEqual(Wait(process, Timeout), 2)                                 # parser.error
+
+    def test_same_features_as_local_run(self):
+        self.finish('local', self.start('local', '-a', self.apps_dir))
+        port = Free_Port()
+        coordinator = self.start('coordinator', '-a', self.apps_dir, '--coordinator', '127.0.0.1:%d' %port, '--authkey', Authkey)
+        self.wait_for_port(coordinator, port)
+        workers = [self.start('worker_%d' %idx, '--worker', '127.0.0.1:%d' %port, '--authkey', Authkey, '-p', '1') for idx in range(2)]
+        self.finish('coordinator', coordinator)
+        for idx, worker in enumerate(workers):
+            self.finish('worker_%d' %idx, worker)
+        for module in ['IR', 'SE', 'CF']:
+            local_features = self.exported_features('local', module)
+            self.assertTrue(len(local_features) > 1, module)
+            self.assertEqual(self.exported_features('coordinator', module), local_features, module)
+
+# ********************* End of Classes *********************
+
+if __name__ == '__main__':
+    unittest.main()
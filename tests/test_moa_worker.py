@@ -0,0 +1,197 @@
+# ************************ General Information ************************
+'''
+VERSION:
+-------
+
+Version (by release date): 2019-11-25
+
+DEVELOPER INFORMATION:
+---------------------
+
+Name: Omid Mirzaei
+Laboratory: Computer Security Lab (COSEC)
+University: Universidad Carlos III de Madrid
+Website: https://cosec.inf.uc3m.es/~omid-mirzaei/
+
+PUBLICATION:
+-----------
+
+AndrODet: An Adaptive Android Obfuscation Detector
+O. Mirzaei, J. M. de Fuentes, J. E. Tapiador, L. Gonzalez-Manzano
+Future Generation Computer Systems, Elsevier (January 2019)
+
+COPYRIGHT NOTICE:
+----------------
+
+All rights reserved for the above developer and research center.
+Please, take a look at the "License.txt" file for more detailed information regarding the usage and distribution of these source codes.
+
+ACKNOWLEDGEMENT:
+---------------
+
+This work has been partially supported by the:
+MINECO grant TIN2016-79095-C2-2-R (SMOG-DEV);
+CAM grant S2013/ICE-3095 (CIBERDINE);
+co-funded with European FEDER funds;
+partially supported by the UC3M's grant Programa de Ayudas para la Movilidad.
+The authors would like to thank the Allatori technical team for its valuable assistance, and, also, the authors of the AMD and PraGuard datasets which made their repositories available to us.
+'''
+# ************************ End of General Information ************************
+
+# ************************ Module Information ************************
+'''
+MAIN FUNCTIONALITY:
+------------------
+
+This module tests the python side of the protocol of the MOA worker (learners/MOA_Worker.py) against a fake worker process (Fake_MOA_Worker.py):
+failed commands raise, and the replies stay in step with the commands after a failure.
+Where javac runs, it also builds the real worker with MOA/worker/build.sh and runs an OPEN/TEST/SAVE/QUIT round against moa.jar.
+'''
+# ************************ End of Module Information  ************************
+
+# ************************ Importing Modules ************************
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+import subprocess
+from distutils.spawn import find_executable
+from learners import MOA_Worker
+from feature_extraction import EFI
+
+# ************************ End of Importing Modules ************************
+
+# ************************ Initialization ************************
+
+Tests_Dir = os.path.dirname(os.path.abspath(__file__))                                 # Directory of the tests
+Learner = 'meta.LeveragingBag -s 20'                                                    # Learner of the IR module
+Class_Col_Num = '16'                                                                    # Class column of the IR features
+MOA_Dir = os.path.join(os.path.dirname(Tests_Dir), 'MOA')                               # MOA of the repository
+
+# ********************* End of Initialization *********************
+
+# ********************* Classes *********************
+
+class MOA_Worker_Test(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='androdet_moa_worker_')
+        self.moa_dir = os.path.join(self.work_dir, 'MOA')
+        os.makedirs(os.path.join(self.moa_dir, 'worker', 'classes'))
+        with open(os.path.join(self.moa_dir, 'worker', 'classes', MOA_Worker.worker_class + '.class'), 'wb') as class_file:
+            class_file.write(b'\xca\xfe\xba\xbe')                                                             # As if build.sh had run
+        self.path = os.environ['PATH']
+
+    def tearDown(self):
+        os.environ['PATH'] = self.path
+        shutil.rmtree(self.work_dir)
+
+    def start_worker(self, *arguments):
+        # The java MOA_Worker starts is a script which runs the fake worker
+        java_dir = os.path.join(self.work_dir, 'bin')
+        if not os.path.isdir(java_dir):
+            os.makedirs(java_dir)
+        with open(os.path.join(java_dir, 'java'), 'w') as java:
+            java.write('#!/bin/sh\nexec "%s" "%s" "$@" %s\n' %(sys.executable, os.path.join(Tests_Dir, 'Fake_MOA_Worker.py'), ' '.join(arguments)))
+        os.chmod(os.path.join(java_dir, 'java'), 0o755)
+        os.environ['PATH'] = java_dir + os.pathsep + self.path
+        return MOA_Worker.MOA_Worker(self.moa_dir)
+
+    def test_malformed_open(self):
+        worker = self.start_worker()
+        try:
+            with self.assertRaises(Exception) as raised:
+                worker.open_learner('IR', Learner, 'sixteen', EFI.arff_header())
+            self.assertIn('Malformed OPEN command', str(raised.exception))
+            # The lines of the header were not taken for commands, so the next commands get their own replies
+            worker.open_learner('IR', Learner, Class_Col_Num, EFI.arff_header())
+            self.assertEqual(worker.test_then_train('IR', [1.0] * 15 + [1]), '0,1\n')
+        finally:
+            worker.close()
+
+    def test_failed_command(self):
+        worker = self.start_worker()
+        try:
+            worker.open_learner('IR', Learner, Class_Col_Num, EFI.arff_header())
+            with self.assertRaises(Exception) as raised:
+                worker.test_then_train('IR', [1.0] * 3)
+            self.assertIn('Expected 16 values, got 3', str(raised.exception))
+            with self.assertRaises(Exception) as raised:
+                worker.test_then_train('SE', [1.0] * 9)
+            self.assertIn('Module SE is not open', str(raised.exception))
+            self.assertEqual(worker.test_then_train('IR', [0.5] * 15 + [0]), '0,0\n')
+        finally:
+            worker.close()
+
+    def test_not_built(self):
+        class_file = os.path.join(self.moa_dir, 'worker', 'classes', MOA_Worker.worker_class + '.class')
+        source_file = os.path.join(self.moa_dir, 'worker', MOA_Worker.worker_class + '.java')
+        open(source_file, 'w').close()
+        os.utime(class_file, (time.time() - 60, time.time() - 60))                               # Built before the source changed
+        with self.assertRaises(Exception) as raised:
+            self.start_worker()
+        self.assertIn('run %s' %os.path.join(self.moa_dir, 'worker', 'build.sh'), str(raised.exception))
+        open(class_file, 'w').close()                                                             # Newer, but empty
+        with self.assertRaises(Exception):
+            self.start_worker()
+
+    def test_worker_exits(self):
+        worker = self.start_worker('crash')
+        try:
+            worker.open_learner('IR', Learner, Class_Col_Num, EFI.arff_header())
+            with self.assertRaises(Exception) as raised:
+                worker.test_then_train('IR', [1.0] * 15 + [1])
+            self.assertIn('exited unexpectedly', str(raised.exception))
+        finally:
+            worker.close()
+
+
+@unittest.skipUnless(find_executable('javac') and find_executable('java'), 'javac and java are needed to build and run the MOA worker')
+class Java_MOA_Worker_Test(unittest.TestCase):
+
+    def setUp(self):
+        # The worker is built into a copy of MOA/worker, next to links to the jars of the repository, so the repository is left as it is
+        self.work_dir = tempfile.mkdtemp(prefix='androdet_java_worker_')
+        self.moa_dir = os.path.join(self.work_dir, 'MOA')
+        os.makedirs(os.path.join(self.moa_dir, 'worker'))
+        for jar in ['moa.jar', 'sizeofag-1.0.0.jar']:
+            os.symlink(os.path.join(MOA_Dir, jar), os.path.join(self.moa_dir, jar))
+        for name in ['build.sh', MOA_Worker.worker_class + '.java']:
+            shutil.copy2(os.path.join(MOA_Dir, 'worker', name), os.path.join(self.moa_dir, 'worker', name))
+        subprocess.check_call(['bash', os.path.join(self.moa_dir, 'worker', 'build.sh')])
+
+    def tearDown(self):
+        shutil.rmtree(self.work_dir)
+
+    def test_round(self):
+        self.assertTrue(MOA_Worker.Worker_Built(self.moa_dir))
+        checkpoint = os.path.join(self.work_dir, 'IR_module.model')
+        worker = MOA_Worker.MOA_Worker(self.moa_dir)
+        try:
+            worker.open_learner('IR', Learner, Class_Col_Num, EFI.arff_header())
+            for idx in range(20):
+                prediction, real_class = worker.test_then_train('IR', [float(idx % 2)] * 15 + [idx % 2]).strip().split(',')
+                self.assertIn(prediction, ['0', '1'])
+                self.assertEqual(real_class, str(idx % 2))
+            worker.save_learner('IR', checkpoint)
+            self.assertTrue(os.path.getsize(checkpoint) > 0)
+            with self.assertRaises(Exception) as raised:
+                worker.open_learner('SE', Learner, 'nine', EFI.arff_header())
+            self.assertIn('Malformed OPEN command', str(raised.exception))
+        finally:
+            worker.close()
+        self.assertEqual(worker.process.returncode, 0)                                          # QUIT was answered and the JVM exited
+        worker = MOA_Worker.MOA_Worker(self.moa_dir)
+        try:
+            worker.open_learner('IR', 'file:' + checkpoint, Class_Col_Num, EFI.arff_header())     # Restored from the checkpoint
+            self.assertEqual(worker.test_then_train('IR', [1.0] * 15 + [1]).strip().split(',')[1], '1')
+        finally:
+            worker.close()
+
+# ********************* End of Classes *********************
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+# ************************ General Information ************************
+'''
+VERSION:
+-------
+
+Version (by release date): 2019-11-25
+
+DEVELOPER INFORMATION:
+---------------------
+
+Name: Omid Mirzaei
+Laboratory: Computer Security Lab (COSEC)
+University: Universidad Carlos III de Madrid
+Website: https://cosec.inf.uc3m.es/~omid-mirzaei/
+
+PUBLICATION:
+-----------
+
+AndrODet: An Adaptive Android Obfuscation Detector
+O. Mirzaei, J. M. de Fuentes, J. E. Tapiador, L. Gonzalez-Manzano
+Future Generation Computer Systems, Elsevier (January 2019)
+
+COPYRIGHT NOTICE:
+----------------
+
+All rights reserved for the above developer and research center.
+Please, take a look at the "License.txt" file for more detailed information regarding the usage and distribution of these source codes.
+
+ACKNOWLEDGEMENT:
+---------------
+
+This work has been partially supported by the:
+MINECO grant TIN2016-79095-C2-2-R (SMOG-DEV);
+CAM grant S2013/ICE-3095 (CIBERDINE);
+co-funded with European FEDER funds;
+partially supported by the UC3M's grant Programa de Ayudas para la Movilidad.
+The authors would like to thank the Allatori technical team for its valuable assistance, and, also, the authors of the AMD and PraGuard datasets which made their repositories available to us.
+'''
+# ************************ End of General Information ************************
+
+# ************************ Module Information ************************
+'''
+MAIN FUNCTIONALITY:
+------------------
+
+This module tests that the in-process learners (learners/Online_Bagging.py) give the same predictions, and end up with the same model,
+whether a batch of apps is tested and trained on in one call or one app at a time.
+'''
+# ************************ End of Module Information  ************************
+
+# ************************ Importing Modules ************************
+
+import unittest
+import numpy as np
+from learners import Online_Bagging
+
+# ************************ End of Importing Modules ************************
+
+# ************************ Initialization ************************
+
+Num_Features = 15                                                                       # As many features as the IR module
+Num_Apps = 200                                                                          # Apps of the batch
+
+# ********************* End of Initialization *********************
+
+# ********************* Functions *********************
+
+def Random_Features(seed):
+    # Features of two classes apart from each other, with a missing value, and their classes
+    random = np.random.RandomState(seed)
+    y = random.randint(0, 2, Num_Apps)
+    X = random.normal(0, 1, (Num_Apps, Num_Features)) + 2 * y[:, np.newaxis]
+    X[3, 4] = np.nan
+    return X, y
+
+# ********************* End of Functions *********************
+
+# ********************* Classes *********************
+
+class Online_Bagging_Test(unittest.TestCase):
+
+    def test_batch_as_instances(self):
+        X, y = Random_Features(7)
+        one_by_one = Online_Bagging.Online_Bagging(Num_Features)
+        batch = Online_Bagging.Online_Bagging(Num_Features)
+        predictions = [one_by_one.test_then_train(X[idx], y[idx]) for idx in range(Num_Apps)]
+        self.assertEqual(list(batch.test_then_train_batch(X, y)), predictions)
+        self.assertTrue(np.array_equal(batch.weights, one_by_one.weights))
+        self.assertTrue(np.array_equal(batch.bias, one_by_one.bias))
+        self.assertTrue(sum(predictions[Num_Apps // 2:]) > 0)                              # The learner did learn
+
+    def test_worker_batch(self):
+        X, y = Random_Features(11)
+        all_features = [list(X[idx]) + [y[idx]] for idx in range(Num_Apps)]
+        one_by_one = Online_Bagging.Online_Bagging_Worker()
+        batch = Online_Bagging.Online_Bagging_Worker()
+        for worker in [one_by_one, batch]:
+            worker.open_learner('IR', 'meta.LeveragingBag -s 20', str(Num_Features + 1), None)
+        predictions = [one_by_one.test_then_train('IR', features) for features in all_features]
+        self.assertEqual(batch.test_then_train_batch('IR', all_features), predictions)
+
+# ********************* End of Classes *********************
+
+if __name__ == '__main__':
+    unittest.main()